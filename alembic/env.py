@@ -1,3 +1,4 @@
+import os
 import sys
 from logging.config import fileConfig
 from pathlib import Path
@@ -19,6 +20,10 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# same database as the service when DB_URL is set
+if os.environ.get("DB_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DB_URL"])
+
 # add your model's MetaData object here
 from uav_service.db import Base  # noqa
 
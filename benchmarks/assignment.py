@@ -0,0 +1,74 @@
+"""
+Drone-to-target assignment: total travel distance and runtime per method.
+
+    python benchmarks/assignment.py --fleets 10 50 100 500 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from uav_service.logic.compute import assign_drones_to_targets, calculate_bridge_targets
+from uav_service.logic.models import Coordinates3D, Drone
+
+METHODS = ("projection", "hungarian")
+
+
+def make_scenario(n_drones: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    base = np.array([0.0, 0.0, 10.0])
+    # bridge long enough to use about a fifth of the fleet
+    length = 7.0 * max(2, n_drones // 5)
+    user = np.array([length * 0.8, length * 0.6, 0.0])
+
+    drones = [
+        Drone(label=f"UAV_{i + 1}", coordinates=Coordinates3D(x=x, y=y, z=z))
+        for i, (x, y, z) in enumerate(
+            rng.uniform([-50, -50, 5], [length, length, 40], (n_drones, 3)).tolist()
+        )
+    ]
+    targets = calculate_bridge_targets(base, user, 7.0, n_drones)
+
+    return drones, targets, base, user
+
+
+def total_distance(assignments) -> float:
+    return sum(
+        float(
+            np.linalg.norm(
+                target
+                - np.array([d.coordinates.x, d.coordinates.y, d.coordinates.z], float)
+            )
+        )
+        for d, target in assignments
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleets", type=int, nargs="+", default=[10, 50, 100, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'drones':>7} {'targets':>7} {'method':>11} {'distance':>11} {'ms':>9}")
+    for n_drones in args.fleets:
+        drones, targets, base, user = make_scenario(n_drones)
+
+        for method in METHODS:
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                assignments = assign_drones_to_targets(
+                    drones, targets, base, user, method=method
+                )
+            elapsed = (time.perf_counter() - started) / args.repeat
+
+            print(
+                f"{n_drones:>7} {len(targets):>7} {method:>11}"
+                f" {total_distance(assignments):>11.1f} {elapsed * 1000:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
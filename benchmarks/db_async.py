@@ -0,0 +1,118 @@
+"""
+Concurrent simulation writes from one event loop on SQLite: the sync
+session in the DB thread pool (``run_db``) vs ``AsyncSession`` (aiosqlite),
+with the event loop lag measured alongside.
+
+    python benchmarks/db_async.py --concurrency 32 --simulations 10
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from uav_service.db import Base, User
+from uav_service.db.engine import (get_async_engine, get_async_session_factory,
+                                   get_engine, get_session_factory)
+from uav_service.db.logic import (persist_full_simulation,
+                                  persist_full_simulation_async)
+from uav_service.executors import run_db, shutdown_executors
+
+import uav_service.db.sqlite  # noqa
+
+from persistence import make_simulation  # noqa: E402
+
+
+def simulation_record(user_id: int, drones, trajectories) -> dict:
+    return dict(
+        user_id=user_id,
+        base={"x": 0.0, "y": 0.0, "z": 10.0},
+        user={"x": 100.0, "y": 100.0, "z": 0.0},
+        algorithm_params={"max_distance": 10, "step_size": 1.0},
+        drones=drones,
+        trajectories=trajectories,
+        bulk=True,
+    )
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """
+    Worst delay of a periodic wake-up, seconds.
+    """
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(url: str, mode: str, args: argparse.Namespace, drones, trajectories):
+    engine = get_engine(url)
+    Base.metadata.create_all(engine)
+    session_factory = get_session_factory(engine)
+
+    with session_factory() as session:
+        user = User(email="bench@example.com", hashed_password="-")
+        session.add(user)
+        session.commit()
+        record = simulation_record(user.id, drones, trajectories)
+
+    async_engine = get_async_engine(url)
+    async_session_factory = get_async_session_factory(async_engine)
+
+    async def write_sync():
+        def persist():
+            with session_factory() as session:
+                persist_full_simulation(session, **record)
+
+        for _ in range(args.simulations):
+            await run_db(persist)
+
+    async def write_async():
+        for _ in range(args.simulations):
+            async with async_session_factory() as session:
+                await persist_full_simulation_async(session, **record)
+
+    writer = write_sync if mode == "sync" else write_async
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    worst_lag = await lag
+
+    await async_engine.dispose()
+    engine.dispose()
+
+    return args.concurrency * args.simulations / elapsed, worst_lag
+
+
+async def main(args: argparse.Namespace) -> None:
+    drones, trajectories = make_simulation(args.drones, args.steps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sync", "async"):
+            url = f"sqlite+pysqlite:///{Path(tmp) / f'{mode}.sqlite'}"
+            per_sec, worst_lag = await run(url, mode, args, drones, trajectories)
+            print(
+                f"{mode:>6}: {per_sec:10,.1f} simulations/sec"
+                f"  max loop lag {worst_lag * 1000:8.1f}ms"
+                f" ({args.concurrency} concurrent writers)"
+            )
+
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--simulations", type=int, default=10)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Simulation write throughput under parallel writers on SQLite:
+default engine vs the tuned ``get_engine`` profile.
+
+    python benchmarks/db_concurrency.py --writers 8 --simulations 20
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from uav_service.db import Base, User
+from uav_service.db.engine import get_engine, get_session_factory
+from uav_service.db.logic import persist_full_simulation
+
+import uav_service.db.sqlite  # noqa
+
+from persistence import make_simulation  # noqa: E402
+
+
+def run(engine, writers: int, simulations: int, drones, trajectories) -> float:
+    Base.metadata.create_all(engine)
+    session_factory = get_session_factory(engine)
+
+    with session_factory() as session:
+        user = User(email="bench@example.com", hashed_password="-")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+    def write(_):
+        for _ in range(simulations):
+            with session_factory() as session:
+                persist_full_simulation(
+                    session,
+                    user_id=user_id,
+                    base={"x": 0.0, "y": 0.0, "z": 10.0},
+                    user={"x": 100.0, "y": 100.0, "z": 0.0},
+                    algorithm_params={"max_distance": 10, "step_size": 1.0},
+                    drones=drones,
+                    trajectories=trajectories,
+                    bulk=True,
+                )
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(writers) as pool:
+        list(pool.map(write, range(writers)))
+    elapsed = time.perf_counter() - started
+
+    engine.dispose()
+    return writers * simulations / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--simulations", type=int, default=20)
+    parser.add_argument("--drones", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    drones, trajectories = make_simulation(args.drones, args.steps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = {
+            "default": lambda url: create_engine(
+                url, connect_args={"timeout": 60}, pool_size=args.writers
+            ),
+            "tuned": get_engine,
+        }
+
+        for name, make_engine in profiles.items():
+            url = f"sqlite+pysqlite:///{Path(tmp) / f'{name}.sqlite'}"
+            per_sec = run(
+                make_engine(url), args.writers, args.simulations, drones, trajectories
+            )
+            print(
+                f"{name:>8}: {per_sec:10,.1f} simulations/sec ({args.writers} writers)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Simulation history reads on a SQLite database seeded with about 1M
+trajectory rows, with and without the history indexes.
+
+    python benchmarks/history.py --simulations 100 --drones 50 --steps 200
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+from uav_service.db import Base, User
+from uav_service.db.engine import get_engine, get_session_factory
+from uav_service.db.logic import (get_simulation, list_simulations,
+                                  load_trajectories, persist_simulations)
+
+from persistence import make_simulation  # noqa: E402
+
+INDEXES = [
+    "ix_configurations_user_id",
+    "ix_drones_configuration_id",
+    "ix_simulations_configuration_id",
+    "ix_simulations_started_at_id",
+    "ix_trajectories_simulation_drone_step",
+]
+
+
+def seed(session_factory, n_simulations: int, n_drones: int, n_steps: int) -> int:
+    drones, trajectories = make_simulation(n_drones, n_steps)
+
+    with session_factory() as session:
+        user = User(email="bench@example.com", hashed_password="-")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+
+        for _ in range(0, n_simulations, 10):
+            persist_simulations(
+                session,
+                simulations=[
+                    dict(
+                        user_id=user_id,
+                        base={"x": 0.0, "y": 0.0, "z": 10.0},
+                        user={"x": 100.0, "y": 100.0, "z": 0.0},
+                        algorithm_params={"max_distance": 10, "step_size": 1.0},
+                        drones=drones,
+                        trajectories=trajectories,
+                    )
+                    for _ in range(10)
+                ],
+                bulk=True,
+            )
+
+    return user_id
+
+
+def measure(session_factory, engine, user_id: int, repeat: int) -> dict[str, float]:
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    timings: dict[str, float] = {}
+
+    with session_factory() as session:
+        simulation_ids = list(
+            session.scalars(text("SELECT id FROM simulations ORDER BY id"))
+        )
+        target_id = simulation_ids[len(simulation_ids) // 2]
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            page = list_simulations(session, user_id=user_id, limit=20)
+            last = page[-1]
+            list_simulations(
+                session, user_id=user_id, limit=20, before=(last.started_at, last.id)
+            )
+        timings["list 2 pages, ms"] = (time.perf_counter() - started) / repeat * 1000
+
+        queries = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            session.expire_all()
+            get_simulation(session, simulation_id=target_id, user_id=user_id)
+            load_trajectories(session, simulation_id=target_id)
+        timings["details, ms"] = (time.perf_counter() - started) / repeat * 1000
+        timings["details, queries"] = queries / repeat
+
+    event.remove(engine, "before_cursor_execute", count)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--simulations", type=int, default=100)
+    parser.add_argument("--drones", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(f"sqlite+pysqlite:///{Path(tmp) / 'history.sqlite'}")
+        Base.metadata.create_all(engine)
+        session_factory = get_session_factory(engine)
+
+        started = time.perf_counter()
+        user_id = seed(session_factory, args.simulations, args.drones, args.steps)
+        rows = args.simulations * args.drones * args.steps
+        elapsed = time.perf_counter() - started
+        print(f"seeded {rows:,} trajectory rows in {elapsed:.1f}s")
+
+        indexed = measure(session_factory, engine, user_id, args.repeat)
+
+        with engine.begin() as conn:
+            for name in INDEXES:
+                conn.execute(text(f"DROP INDEX {name}"))
+        plain = measure(session_factory, engine, user_id, args.repeat)
+
+        engine.dispose()
+
+    print(f"{'':>18} {'no indexes':>12} {'indexes':>12}")
+    for name in indexed:
+        print(f"{name:>18} {plain[name]:>12.2f} {indexed[name]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Latency of concurrent mixed traffic (heavy compute + login) against the
+in-process ASGI app, on a temporary SQLite database.
+
+    python benchmarks/load.py --clients 16 --requests 10 --drones 100
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+
+def percentile(values: list[float], q: float) -> float:
+    return float(np.percentile(np.asarray(values) * 1000, q))
+
+
+def compute_payload(n_drones: int, step_size: float) -> dict:
+    rng = random.Random(n_drones)
+    return {
+        "user": {"x": 250.0, "y": 150.0},
+        "base": {"x": 0.0, "y": 0.0, "z": 10.0},
+        "step_size": step_size,
+        "initial_drone_positions": [
+            {
+                "label": f"UAV_{i + 1}",
+                "coordinates": {
+                    "x": rng.uniform(0, 250),
+                    "y": rng.uniform(0, 150),
+                    "z": rng.uniform(5, 30),
+                },
+            }
+            for i in range(n_drones)
+        ],
+    }
+
+
+async def run(
+    clients: int, requests: int, n_drones: int, step_size: float
+) -> tuple[float, dict[str, list[float]]]:
+    """
+    Total time and per-endpoint latencies (seconds) of the mixed traffic.
+    """
+    # imported late: the DB file is resolved relative to the working directory
+    from uav_service.asgi import build_app
+    from uav_service.db import Base
+    from uav_service.db.session import engine
+    from uav_service.executors import shutdown_executors
+    from uav_service.settings import settings
+
+    Base.metadata.create_all(engine)
+
+    app = build_app()
+    base = "http://bench" + settings.misc.base_api_path
+    credentials = {"email": "bench@example.com", "password": "bench"}
+    payload = compute_payload(n_drones, step_size)
+    latencies: dict[str, list[float]] = defaultdict(list)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url=base, timeout=None
+    ) as client:
+        response = await client.post("/auth/register", json=credentials)
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        # warm up process pool
+        await client.post("/uav/compute/", json=payload, headers=headers)
+
+        async def worker(i: int) -> None:
+            for _ in range(requests):
+                if i % 2:
+                    name, call = "compute", client.post(
+                        "/uav/compute/", json=payload, headers=headers
+                    )
+                else:
+                    name, call = "login", client.post("/auth/login", json=credentials)
+
+                started = time.perf_counter()
+                response = await call
+                latencies[name].append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    shutdown_executors()
+
+    return elapsed, latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    elapsed, latencies = await run(
+        args.clients, args.requests, args.drones, args.step_size
+    )
+
+    print(f"{args.clients} clients, {elapsed:.2f}s total")
+    for name, values in sorted(latencies.items()):
+        print(
+            f"{name:>8}: n={len(values):4d}"
+            f"  p50={percentile(values, 50):8.1f}ms"
+            f"  p99={percentile(values, 99):8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--drones", type=int, default=100)
+    parser.add_argument("--step-size", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        asyncio.run(main(args))
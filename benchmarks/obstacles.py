@@ -0,0 +1,131 @@
+"""
+Obstacle-aware planning on synthetic city blocks: grid compilation, routed
+bridge targets and the whole compute over fleet sizes.
+
+    python benchmarks/obstacles.py --blocks 10 --fleets 150 300 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from uav_service.logic.compute import (
+    calculate_routed_bridge_targets,
+    compute_drone_positions,
+)
+from uav_service.logic.models import (
+    BoxObstacle,
+    Coordinates,
+    Coordinates3D,
+    Drone,
+    ObstacleMap,
+)
+from uav_service.logic.obstacles import VoxelGrid, get_voxel_grid
+
+BLOCK = 30.0
+STREET = 20.0
+
+
+def make_city(blocks: int, seed: int = 0) -> ObstacleMap:
+    """
+    ``blocks`` x ``blocks`` buildings 20-80 m tall separated by streets.
+    """
+    rng = np.random.default_rng(seed)
+    pitch = BLOCK + STREET
+
+    obstacles = [
+        BoxObstacle(
+            x_min=i * pitch,
+            y_min=j * pitch,
+            x_max=i * pitch + BLOCK,
+            y_max=j * pitch + BLOCK,
+            z_max=float(rng.uniform(20, 80)),
+        )
+        for i in range(blocks)
+        for j in range(blocks)
+    ]
+    return ObstacleMap(id=seed, resolution=2.0, clearance=1.0, obstacles=obstacles)
+
+
+def street(k: np.ndarray | int) -> np.ndarray | float:
+    """
+    Coordinate of the middle of the street after the k-th row of buildings.
+    """
+    return BLOCK + STREET / 2 + (BLOCK + STREET) * k
+
+
+def make_fleet(n_drones: int, blocks: int, seed: int = 0):
+    """
+    Drones at street level, in the streets between the buildings.
+    """
+    rng = np.random.default_rng(seed)
+
+    streets = street(rng.integers(0, blocks - 1, n_drones))
+    along = rng.uniform(0, (BLOCK + STREET) * blocks, n_drones)
+    heights = rng.uniform(5, 15, n_drones)
+
+    return [
+        Drone(label=f"UAV_{i + 1}", coordinates=Coordinates3D(x=x, y=y, z=z))
+        for i, (x, y, z) in enumerate(zip(streets, along, heights))
+    ]
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main(args: argparse.Namespace) -> None:
+    city = make_city(args.blocks)
+
+    base = Coordinates3D(x=-5.0, y=-5.0, z=10.0)
+    user = Coordinates(x=street(args.blocks - 2), y=street(args.blocks - 4))
+
+    compile_time = timed(
+        lambda: VoxelGrid.from_obstacles(
+            city.obstacles, city.resolution, city.clearance
+        )
+    )
+    grid = get_voxel_grid(city)
+    print(
+        f"{args.blocks ** 2} buildings, grid {grid.shape}:"
+        f" compiled in {compile_time * 1000:.1f}ms"
+    )
+
+    base_point = np.array([base.x, base.y, base.z])
+    user_point = np.array([user.x, user.y, 0.0])
+    targets = []
+    targets_time = timed(
+        lambda: targets.extend(
+            calculate_routed_bridge_targets(
+                base_point, user_point, 7.0, max(args.fleets), grid
+            )
+        )
+    )
+    print(f"{len(targets)} routed bridge targets in {targets_time * 1000:.1f}ms")
+
+    for n_drones in args.fleets:
+        drones = make_fleet(n_drones, args.blocks)
+        elapsed = min(
+            timed(
+                lambda: compute_drone_positions(
+                    user_coordinates=user,
+                    base_coordinates=base,
+                    drones=drones,
+                    step_size=1.0,
+                    obstacle_map=city,
+                )
+            )
+            for _ in range(args.rounds)
+        )
+        print(f"{n_drones:>6} drones: compute {elapsed * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=10)
+    parser.add_argument("--fleets", type=int, nargs="+", default=[150, 300, 500])
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""
+Trajectory persistence throughput on SQLite, ORM path vs bulk path.
+
+    python benchmarks/persistence.py --drones 50 --steps 200 --repeat 5
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from uav_service.db import Base, User
+from uav_service.db.engine import get_engine, get_session_factory
+from uav_service.db.logic import persist_full_simulation
+from uav_service.logic.trajectories import DroneTrajectories
+
+import uav_service.db.sqlite  # noqa
+
+
+def make_simulation(n_drones: int, n_steps: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    labels = [f"UAV_{i + 1}" for i in range(n_drones)]
+
+    drones = [
+        {
+            "label": label,
+            "coordinates": {"x": x, "y": y, "z": z, "yaw": 0.0},
+        }
+        for label, (x, y, z) in zip(labels, rng.uniform(0, 100, (n_drones, 3)).tolist())
+    ]
+    trajectories = DroneTrajectories.from_padded(
+        labels=labels,
+        positions=rng.uniform(0, 100, (n_drones, n_steps, 4)),
+        steps=np.full(n_drones, n_steps),
+    )
+
+    return drones, trajectories
+
+
+def run(n_drones: int, n_steps: int, repeat: int, bulk: bool) -> float:
+    drones, trajectories = make_simulation(n_drones, n_steps)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = get_engine(f"sqlite+pysqlite:///{Path(tmp) / 'bench.sqlite'}")
+        Base.metadata.create_all(engine)
+        session_factory = get_session_factory(engine)
+
+        with session_factory() as session:
+            user = User(email="bench@example.com", hashed_password="-")
+            session.add(user)
+            session.commit()
+            user_id = user.id
+
+        elapsed = 0.0
+        for _ in range(repeat):
+            with session_factory() as session:
+                started = time.perf_counter()
+                persist_full_simulation(
+                    session,
+                    user_id=user_id,
+                    base={"x": 0.0, "y": 0.0, "z": 10.0},
+                    user={"x": 100.0, "y": 100.0, "z": 0.0},
+                    algorithm_params={"max_distance": 10, "step_size": 1.0},
+                    drones=drones,
+                    trajectories=trajectories,
+                    bulk=bulk,
+                )
+                elapsed += time.perf_counter() - started
+
+        engine.dispose()
+
+    return n_drones * n_steps * repeat / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drones", type=int, default=50)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for bulk in (False, True):
+        rows_per_sec = run(args.drones, args.steps, args.repeat, bulk)
+        mode = "bulk" if bulk else "orm"
+        print(f"{mode:>5}: {rows_per_sec:12,.0f} trajectory rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Multi-user relay networks: relays of one shared network against separate
+bridges per user, and the whole compute over user and fleet sizes.
+
+    python benchmarks/relays.py --users 10 30 60 --fleet 600
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from uav_service.logic.compute import (
+    calculate_bridge_targets,
+    compute_relay_network_positions,
+)
+from uav_service.logic.models import Coordinates, Coordinates3D, Drone
+from uav_service.logic.relays import relay_network, relay_tree
+
+SPACING = 7.0
+
+
+def make_scenario(n_users: int, n_drones: int, area: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+
+    users = [
+        Coordinates(x=x, y=y)
+        for x, y in rng.uniform(area * 0.1, area, (n_users, 2)).tolist()
+    ]
+    drones = [
+        Drone(label=f"UAV_{i + 1}", coordinates=Coordinates3D(x=x, y=y, z=z))
+        for i, (x, y, z) in enumerate(
+            rng.uniform([0, 0, 5], [area, area, 40], (n_drones, 3)).tolist()
+        )
+    ]
+    return users, drones
+
+
+def timed(func, rounds: int):
+    result, best = None, float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main(args: argparse.Namespace) -> None:
+    base = Coordinates3D(x=0.0, y=0.0, z=10.0)
+    base_point = np.array([base.x, base.y, base.z])
+
+    for n_users in args.users:
+        users, drones = make_scenario(n_users, args.fleet, args.area)
+        user_points = np.array([[u.x, u.y, 0.0] for u in users])
+
+        network, tree_time = timed(
+            lambda: relay_network(
+                relay_tree(base_point, user_points, SPACING), SPACING
+            ),
+            args.rounds,
+        )
+        separate = sum(
+            len(calculate_bridge_targets(base_point, user, SPACING, args.fleet * 100))
+            for user in user_points
+        )
+
+        try:
+            (trajectories, chains), compute_time = timed(
+                lambda: compute_relay_network_positions(
+                    users=users,
+                    base_coordinates=base,
+                    drones=drones,
+                    max_drone_spacing=SPACING,
+                    step_size=args.step_size,
+                ),
+                args.rounds,
+            )
+        except ValueError as e:
+            print(f"{n_users:>4} users: {e}")
+            continue
+
+        print(
+            f"{n_users:>4} users: {len(network.targets):>5} shared relays"
+            f" ({separate} as separate bridges), tree {tree_time * 1000:7.1f}ms,"
+            f" compute {compute_time * 1000:8.1f}ms,"
+            f" longest chain {max(map(len, chains))}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--fleet", type=int, default=600)
+    parser.add_argument("--area", type=float, default=400.0)
+    parser.add_argument("--step-size", type=float, default=3.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
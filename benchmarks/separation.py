@@ -0,0 +1,91 @@
+"""
+Separation check and conflict resolution over whole plans, per fleet size.
+
+    python benchmarks/separation.py --fleets 50 200 500 --min-distance 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from uav_service.logic.compute import compute_drone_positions
+from uav_service.logic.models import Coordinates, Coordinates3D, Drone
+from uav_service.logic.separation import find_conflicts, resolve_conflicts
+
+METHODS = ("altitude", "delay")
+
+
+def make_plan(n_drones: int, step_size: float, seed: int = 0):
+    """
+    Plan that uses about the whole fleet: a bridge of ``n_drones`` targets.
+    """
+    rng = np.random.default_rng(seed)
+
+    length = 7.0 * n_drones
+    user = Coordinates(x=length * 0.8, y=length * 0.6)
+    drones = [
+        Drone(label=f"UAV_{i + 1}", coordinates=Coordinates3D(x=x, y=y, z=z))
+        for i, (x, y, z) in enumerate(
+            rng.uniform(
+                [-50, -50, 5], [user.x + 50, user.y + 50, 40], (n_drones + 5, 3)
+            ).tolist()
+        )
+    ]
+
+    return compute_drone_positions(
+        user_coordinates=user,
+        base_coordinates=Coordinates3D(x=0.0, y=0.0, z=10.0),
+        drones=drones,
+        step_size=step_size,
+        assignment="hungarian",
+    )
+
+
+def timed(func, rounds: int):
+    result, best = None, float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def main(args: argparse.Namespace) -> None:
+    for n_drones in args.fleets:
+        plan = make_plan(n_drones, args.step_size)
+        conflicts, elapsed = timed(
+            lambda: find_conflicts(plan, args.min_distance), args.rounds
+        )
+        print(
+            f"{len(plan):>6} drones x {int(plan.steps.max()):>5} steps:"
+            f" {len(conflicts):>4} conflicts found in {elapsed * 1000:8.1f}ms"
+        )
+
+        for method in METHODS:
+            resolved, elapsed = timed(
+                lambda: resolve_conflicts(
+                    plan,
+                    args.min_distance,
+                    method,
+                    step_size=args.step_size,
+                    layer_spacing=3.0,
+                    delay_steps=3,
+                    max_rounds=8,
+                ),
+                args.rounds,
+            )
+            left = len(find_conflicts(resolved, args.min_distance))
+            print(
+                f"{'':>6} {method:>8}: {left:>4} left after {elapsed * 1000:8.1f}ms,"
+                f" {int(resolved.steps.max())} steps"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleets", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--min-distance", type=float, default=5.0)
+    parser.add_argument("--step-size", type=float, default=3.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
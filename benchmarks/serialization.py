@@ -0,0 +1,74 @@
+"""
+Compute response encodings per fleet size: serialization CPU time and
+payload size of the pydantic response model, stdlib json, orjson, msgpack
+and packed float32/float64 trajectories.
+
+    python benchmarks/serialization.py --fleets 50 200 500 --step-size 1
+"""
+
+import argparse
+import json
+import time
+
+from uav_service.views.encoding import (MsgpackResponse, ORJSONResponse,
+                                        msgpack, pack_trajectories)
+from uav_service.views.models import UavComputeResponse
+
+from separation import make_plan  # noqa: E402
+
+HEADER = {
+    "base_coordinates": {"x": 0.0, "y": 0.0, "z": 10.0, "yaw": 0.0},
+    "user_coordinates": {"x": 100.0, "y": 100.0},
+    "simulation_id": 1,
+    "conflicts": [],
+}
+
+
+def timed(func, rounds: int):
+    result, best = None, float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def encoders(plan):
+    """
+    Every encoding as a function of the plan to the response body, the
+    JSON ones including the conversion of the arrays to plain structures.
+    """
+    content = lambda: {**HEADER, "drone_positions": plan.to_jsonable()}  # noqa
+
+    yield "pydantic", lambda: UavComputeResponse.model_validate(
+        content()
+    ).model_dump_json().encode()
+    yield "json", lambda: json.dumps(content()).encode()
+    yield "orjson", lambda: ORJSONResponse(content()).body
+    if msgpack is not None:
+        yield "msgpack", lambda: MsgpackResponse(content()).body
+    yield "packed f32", lambda: pack_trajectories(HEADER, plan, dtype="<f4")
+    yield "packed f64", lambda: pack_trajectories(HEADER, plan, dtype="<f8")
+
+
+def main(args: argparse.Namespace) -> None:
+    for n_drones in args.fleets:
+        plan = make_plan(n_drones, args.step_size)
+        print(f"{len(plan):>6} drones, {len(plan.data)} points")
+
+        baseline = None
+        for name, encode in encoders(plan):
+            body, elapsed = timed(encode, args.rounds)
+            baseline = baseline or elapsed
+            print(
+                f"{name:>12}: {elapsed * 1000:8.1f}ms ({baseline / elapsed:5.1f}x),"
+                f" {len(body) / 1024:9.1f}KiB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleets", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--step-size", type=float, default=1.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,354 @@
+"""
+Benchmark suite of the compute pipeline, persistence and the HTTP stack,
+with results saved to JSON for regression comparison.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --parts compute --quick --compare results.json
+
+Parts:
+  compute      -- calculate_bridge_targets, assign_drones_to_targets,
+                  generate_dh_trajectory_simple (drone by drone) and
+                  compute_drone_positions over fleet sizes, bridge lengths
+                  and step sizes
+  persistence  -- persist_full_simulation on a temporary SQLite file
+  http         -- in-process ASGI load test (see load.py)
+
+With ``--compare`` the median of every case is compared with the baseline
+file and the exit status is 1 if any case is slower than ``--threshold``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from load import run as run_load
+from persistence import make_simulation
+from uav_service.db import Base, User
+from uav_service.db.engine import get_engine, get_session_factory
+from uav_service.db.logic import persist_full_simulation
+from uav_service.logic.compute import (assign_drones_to_targets,
+                                       calculate_bridge_targets,
+                                       compute_drone_positions,
+                                       generate_dh_trajectory_simple)
+from uav_service.logic.models import Coordinates, Coordinates3D, Drone
+from uav_service.settings import settings
+
+PARTS = ("compute", "persistence", "http")
+MAX_DRONE_SPACING = 7.0
+
+
+def summarize(times: list[float]) -> dict[str, float]:
+    return {
+        "rounds": len(times),
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "p99": float(np.percentile(times, 99)),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def measure(func: Callable[[], object], rounds: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        func()
+
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    return summarize(times)
+
+
+def make_bridge(n_drones: int, bridge: float, seed: int = 0):
+    """
+    Fleet scattered around a bridge that needs ``bridge`` share of it.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_targets = max(1, round(n_drones * bridge))
+    length = MAX_DRONE_SPACING * (n_targets + 1) - 0.5
+
+    base = np.array([0.0, 0.0, 10.0])
+    user = np.array([length * 0.8, length * 0.6, 0.0])
+
+    drones = [
+        Drone(label=f"UAV_{i + 1}", coordinates=Coordinates3D(x=x, y=y, z=z))
+        for i, (x, y, z) in enumerate(
+            rng.uniform([-20, -20, 5], [user[0], user[1], 40], (n_drones, 3)).tolist()
+        )
+    ]
+
+    return drones, base, user
+
+
+def bench_compute(args: argparse.Namespace) -> list[dict]:
+    results = []
+
+    def record(name: str, params: dict, func: Callable[[], object]):
+        results.append(
+            {"name": f"compute.{name}", "params": params, **measure(func, args.rounds)}
+        )
+        print(f"{name:>30} {params} {results[-1]['median'] * 1000:10.3f}ms")
+
+    for n_drones in args.fleets:
+        for bridge in args.bridges:
+            drones, base, user = make_bridge(n_drones, bridge)
+            params = {"drones": n_drones, "bridge": bridge}
+
+            record(
+                "calculate_bridge_targets",
+                params,
+                lambda: calculate_bridge_targets(
+                    base, user, MAX_DRONE_SPACING, n_drones
+                ),
+            )
+
+            targets = calculate_bridge_targets(base, user, MAX_DRONE_SPACING, n_drones)
+            for method in ("projection", "hungarian"):
+                record(
+                    "assign_drones_to_targets",
+                    {**params, "method": method},
+                    lambda: assign_drones_to_targets(
+                        drones, targets, base, user, method=method
+                    ),
+                )
+
+            assignments = assign_drones_to_targets(drones, targets, base, user)
+            for step_size in args.step_sizes:
+                record(
+                    "generate_dh_trajectory_simple",
+                    {**params, "step_size": step_size},
+                    lambda: [
+                        generate_dh_trajectory_simple(
+                            start=np.array(
+                                [d.coordinates.x, d.coordinates.y, d.coordinates.z]
+                            ),
+                            target=target,
+                            user=user,
+                            step_size=step_size,
+                            initial_yaw_deg=d.coordinates.yaw,
+                        )
+                        for d, target in assignments
+                    ],
+                )
+                record(
+                    "compute_drone_positions",
+                    {**params, "step_size": step_size},
+                    lambda: compute_drone_positions(
+                        user_coordinates=Coordinates(x=user[0], y=user[1]),
+                        base_coordinates=Coordinates3D(
+                            x=base[0], y=base[1], z=base[2]
+                        ),
+                        drones=drones,
+                        max_drone_spacing=MAX_DRONE_SPACING,
+                        step_size=step_size,
+                    ),
+                )
+
+    return results
+
+
+def bench_persistence(args: argparse.Namespace) -> list[dict]:
+    results = []
+
+    for n_drones in args.fleets:
+        drones, trajectories = make_simulation(n_drones, args.steps)
+
+        for bulk, storage in ((False, "rows"), (True, "rows"), (True, "blob")):
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = get_engine(f"sqlite+pysqlite:///{Path(tmp) / 'bench.sqlite'}")
+                Base.metadata.create_all(engine)
+                session_factory = get_session_factory(engine)
+
+                with session_factory() as session:
+                    user = User(email="bench@example.com", hashed_password="-")
+                    session.add(user)
+                    session.commit()
+                    user_id = user.id
+
+                def persist():
+                    with session_factory() as session:
+                        persist_full_simulation(
+                            session,
+                            user_id=user_id,
+                            base={"x": 0.0, "y": 0.0, "z": 10.0},
+                            user={"x": 100.0, "y": 100.0, "z": 0.0},
+                            algorithm_params={"max_distance": 10, "step_size": 1.0},
+                            drones=drones,
+                            trajectories=trajectories,
+                            bulk=bulk,
+                            storage=storage,
+                        )
+
+                params = {
+                    "drones": n_drones,
+                    "steps": args.steps,
+                    "bulk": bulk,
+                    "storage": storage,
+                }
+                results.append(
+                    {
+                        "name": "persistence.persist_full_simulation",
+                        "params": params,
+                        **measure(persist, args.rounds),
+                    }
+                )
+                print(
+                    f"{'persist_full_simulation':>30} {params}"
+                    f" {results[-1]['median'] * 1000:10.3f}ms"
+                )
+
+                engine.dispose()
+
+    return results
+
+
+def bench_http(args: argparse.Namespace) -> list[dict]:
+    results = []
+
+    # repeated identical requests of the load test would be served from the
+    # cache, unless CACHE_ENABLED is set explicitly
+    if "CACHE_ENABLED" not in os.environ:
+        settings.cache.enabled = False
+
+    # the app database is resolved relative to the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            elapsed, latencies = asyncio.run(
+                run_load(args.clients, args.requests, args.http_drones, 1.0)
+            )
+        finally:
+            os.chdir(cwd)
+
+    for endpoint, times in sorted(latencies.items()):
+        params = {
+            "clients": args.clients,
+            "requests": args.requests,
+            "drones": args.http_drones,
+        }
+        results.append(
+            {"name": f"http.{endpoint}", "params": params, **summarize(times)}
+        )
+        print(
+            f"{endpoint:>30} {params} {results[-1]['median'] * 1000:10.3f}ms"
+            f" (p99 {results[-1]['p99'] * 1000:.3f}ms)"
+        )
+
+    return results
+
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def case_key(result: dict) -> str:
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> bool:
+    """
+    Print median ratios against the baseline, True if nothing regressed.
+    """
+    baseline = {
+        case_key(r): r for r in json.loads(baseline_path.read_text())["results"]
+    }
+
+    ok = True
+    for result in results:
+        before = baseline.get(case_key(result))
+        if before is None:
+            continue
+
+        ratio = result["median"] / before["median"]
+        regressed = ratio > 1 + threshold
+        ok = ok and not regressed
+
+        print(
+            f"{'REGRESSED' if regressed else 'ok':>9} {ratio:6.2f}x"
+            f" {result['name']} {result['params']}"
+        )
+
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--parts", nargs="+", choices=PARTS, default=list(PARTS))
+    parser.add_argument("--quick", action="store_true", help="small grid, few rounds")
+    parser.add_argument(
+        "--fleets", type=int, nargs="+", default=[5, 20, 100, 500, 1000]
+    )
+    parser.add_argument(
+        "--bridges",
+        type=float,
+        nargs="+",
+        default=[0.1, 0.5],
+        help="share of the fleet the bridge needs",
+    )
+    parser.add_argument("--step-sizes", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--steps", type=int, default=200, help="persistence steps")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--http-drones", type=int, default=100)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path, help="baseline results file")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.quick:
+        # only options left at their defaults are reduced
+        for option, value in (("fleets", [5, 100]), ("rounds", 3), ("requests", 3)):
+            if getattr(args, option) == parser.get_default(option):
+                setattr(args, option, value)
+
+    benches = {
+        "compute": bench_compute,
+        "persistence": bench_persistence,
+        "http": bench_http,
+    }
+    results = [r for part in args.parts for r in benches[part](args)]
+
+    if args.output:
+        args.output.write_text(
+            json.dumps({"machine": machine_info(), "results": results}, indent=2)
+        )
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Waypoint simplification of whole plans per fleet size: kept points, JSON
+payload and blob storage sizes, simplify and interpolate timings.
+
+    python benchmarks/waypoints.py --fleets 50 200 500 --step-size 1
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from uav_service.db.blobs import encode_steps, encode_trajectory
+from uav_service.logic.trajectories import DroneTrajectories
+from uav_service.logic.waypoints import Waypoints, interpolate, simplify
+
+from separation import make_plan  # noqa: E402
+
+
+def timed(func, rounds: int):
+    result, best = None, float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def blob_size(trajectories: DroneTrajectories | Waypoints) -> int:
+    """
+    Total size of the zlib trajectory blobs of all drones.
+    """
+    if isinstance(trajectories, Waypoints):
+        return sum(
+            len(encode_trajectory(points, compression="zlib"))
+            + len(encode_steps(steps))
+            for _, points, steps in trajectories.items()
+        )
+    return sum(
+        len(encode_trajectory(points, compression="zlib"))
+        for _, points in trajectories.items()
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    for n_drones in args.fleets:
+        plan = make_plan(n_drones, args.step_size)
+
+        waypoints, simplify_time = timed(
+            lambda: simplify(plan, args.position_tolerance, args.yaw_tolerance),
+            args.rounds,
+        )
+        dense, interpolate_time = timed(lambda: interpolate(waypoints), args.rounds)
+
+        position_error = np.linalg.norm(dense.data[:, :3] - plan.data[:, :3], axis=1)
+        yaw_error = np.abs((dense.data[:, 3] - plan.data[:, 3] + 180.0) % 360.0 - 180.0)
+
+        payload = len(json.dumps(plan.to_jsonable()))
+        waypoint_payload = len(
+            json.dumps(
+                {
+                    "drone_positions": waypoints.trajectories.to_jsonable(),
+                    "waypoint_steps": waypoints.jsonable_steps(),
+                }
+            )
+        )
+
+        print(
+            f"{len(plan):>6} drones: {len(plan.data):>7} steps ->"
+            f" {len(waypoints.trajectories.data):>6} waypoints"
+            f" in {simplify_time * 1000:6.1f}ms,"
+            f" back in {interpolate_time * 1000:6.1f}ms"
+            f" (max error {position_error.max():.3f}m {yaw_error.max():.2f}deg)"
+        )
+        print(
+            f"{'':>6} json {payload / 1024:9.1f}KiB ->"
+            f" {waypoint_payload / 1024:7.1f}KiB,"
+            f" blobs {blob_size(plan) / 1024:7.1f}KiB ->"
+            f" {blob_size(waypoints) / 1024:6.1f}KiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fleets", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--step-size", type=float, default=1.0)
+    parser.add_argument("--position-tolerance", type=float, default=0.05)
+    parser.add_argument("--yaw-tolerance", type=float, default=0.5)
+    parser.add_argument("--rounds", type=int, default=3)
+    main(parser.parse_args())
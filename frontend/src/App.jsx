@@ -14,6 +14,10 @@ import InfoPanel from './components/InfoPanel';
 import StatusBar from './components/StatusBar';
 import LoginPage from './components/LoginPage';
 import RegisterPage from './components/RegisterPage';
+import {
+  decodeTrajectories,
+  TRAJECTORIES_MEDIA_TYPE,
+} from './trajectories';
 
 const API_URL = 'http://localhost:8000/api/uav-service/uav/compute/';
 
@@ -102,7 +106,7 @@ function MainApp() {
 
       const resp = await fetch(API_URL, {
         method: 'POST',
-        headers: getAuthHeaders(),
+        headers: { ...getAuthHeaders(), Accept: TRAJECTORIES_MEDIA_TYPE },
         body: JSON.stringify(payload),
       });
 
@@ -120,26 +124,25 @@ function MainApp() {
         throw new Error(`Server error: ${resp.status}`);
       }
 
-      const data = await resp.json();
+      const { labels, offsets, points } = decodeTrajectories(
+        await resp.arrayBuffer()
+      );
 
-      if (data.drone_positions) {
-        const labels = Object.keys(data.drone_positions);
-        const maxLen = Math.max(
-          ...Object.values(data.drone_positions).map((t) => t.length)
-        );
+      if (labels.length) {
+        const lengths = labels.map((_, i) => offsets[i + 1] - offsets[i]);
+        const maxLen = Math.max(...lengths);
 
         const steps = [];
         for (let s = 0; s < maxLen; s++) {
           steps.push(
-            labels.map((label) => {
-              const track = data.drone_positions[label];
-              const p = track[Math.min(s, track.length - 1)];
+            labels.map((label, i) => {
+              const p = 4 * (offsets[i] + Math.min(s, lengths[i] - 1));
               return {
                 label,
-                x: p.x,
-                y: p.y,
-                z: p.z,
-                yaw: p.yaw,
+                x: points[p],
+                y: points[p + 1],
+                z: points[p + 2],
+                yaw: points[p + 3],
               };
             })
           );
@@ -0,0 +1,48 @@
+// Packed trajectories of the compute endpoint
+// (Accept: application/x-uav-trajectories), see
+// src/uav_service/views/encoding.py for the layout.
+
+export const TRAJECTORIES_MEDIA_TYPE = 'application/x-uav-trajectories';
+
+const MAGIC = 'UAVT';
+const HEADER_SIZE = 24;
+const WITH_STEPS = 1;
+
+const align = (offset) => offset + ((8 - (offset % 8)) % 8);
+
+export const decodeTrajectories = (buffer) => {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(
+    ...new Uint8Array(buffer, 0, MAGIC.length)
+  );
+  if (magic !== MAGIC) {
+    throw new Error('Not a packed trajectories response');
+  }
+
+  const floatSize = view.getUint8(5);
+  const flags = view.getUint16(6, true);
+  const nDrones = view.getUint32(8, true);
+  const nPoints = view.getUint32(12, true);
+  const metaLength = view.getUint32(16, true);
+
+  let offset = HEADER_SIZE;
+  const meta = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, offset, metaLength))
+  );
+  offset = align(offset + metaLength);
+
+  // every section starts 8-byte aligned, typed arrays view it in place
+  const offsets = new Uint32Array(buffer, offset, nDrones + 1);
+  offset = align(offset + offsets.byteLength);
+
+  let steps = null;
+  if (flags & WITH_STEPS) {
+    steps = new Uint32Array(buffer, offset, nPoints);
+    offset = align(offset + steps.byteLength);
+  }
+
+  const Float = floatSize === 8 ? Float64Array : Float32Array;
+  const points = new Float(buffer, offset, nPoints * 4);
+
+  return { meta, labels: meta.labels, offsets, steps, points };
+};
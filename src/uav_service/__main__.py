@@ -1,11 +1,13 @@
 import uvicorn
 
+from uav_service.settings import settings
 
-def run() -> None:
+
+def run_dev() -> None:
     uvicorn_params: dict[str, object] = {
         "factory": True,
-        "port": 8000,
-        "host": "0.0.0.0",
+        "port": settings.server.port,
+        "host": settings.server.host,
         "reload": True,
     }
     uvicorn.run(
@@ -14,5 +16,18 @@ def run() -> None:
     )
 
 
+def run_prod() -> None:
+    from uav_service import server
+
+    server.run()
+
+
+def run() -> None:
+    if settings.server.mode == "prod":
+        run_prod()
+    else:
+        run_dev()
+
+
 if __name__ == "__main__":
     run()
@@ -1,10 +1,28 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from uav_service import metrics
+from uav_service.db.session import async_engine
+from uav_service.executors import shutdown_executors
+from uav_service.settings import settings
 from uav_service.views.auth import router as auth_router
+from uav_service.views.encoding import ORJSONResponse
+from uav_service.views.live import router as live_router
+from uav_service.views.metrics import router as metrics_router
+from uav_service.views.obstacles import router as obstacles_router
 from uav_service.views.routers import router as uav_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_executors()
+    await async_engine.dispose()
+    metrics.close()
+
+
 def make_fastapi_app(
     title: str,
     base_api_path: str,
@@ -14,6 +32,8 @@ def make_fastapi_app(
         openapi_url=f"{base_api_path}/docs/json/",
         docs_url=f"{base_api_path}/docs/swagger/",
         redoc_url=f"{base_api_path}/docs/redoc/",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
     app.add_middleware(
         CORSMiddleware,
@@ -25,5 +45,11 @@ def make_fastapi_app(
 
     app.include_router(uav_router, prefix=base_api_path)
     app.include_router(auth_router, prefix=base_api_path)
+    app.include_router(live_router, prefix=base_api_path)
+    app.include_router(obstacles_router, prefix=base_api_path)
+
+    if settings.metrics.enabled:
+        app.add_middleware(metrics.MetricsMiddleware)
+        app.include_router(metrics_router)
 
     return app
@@ -1,16 +1,21 @@
+import time
+
 from fastapi import Depends, HTTPException, Request
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from uav_service.auth.cache import token_cache, user_cache
 from uav_service.auth.constants import ALGORITHM
-from uav_service.db.dependencies import get_db
+from uav_service.db.dependencies import get_async_db
 from uav_service.db.tables import User
+from uav_service.metrics import stage
 from uav_service.settings import settings
 
 
-def get_current_user(
+async def get_current_user(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
     auth_header = request.headers.get("Authorization")
 
@@ -19,19 +24,73 @@ def get_current_user(
 
     token = auth_header.split(" ")[1]
 
-    try:
-        payload = jwt.decode(token, settings.misc.secret_key, algorithms=[ALGORITHM])
+    with stage("auth"):
+        user_id = verify_access_token(token)
+        user = user_cache.get(user_id)
+
+        if user is None:
+            user = _cache_user(await db.get(User, user_id), db)
+
+    return user
+
+
+def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    if user.email not in settings.profiling.admin_emails:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    return user
+
+
+def authenticate(token: str, db: Session) -> User:
+    """
+    User of an access token, raises 401 ``HTTPException`` if it is not valid.
+    """
+    user_id = verify_access_token(token)
+    user = user_cache.get(user_id)
 
-        if payload.get("type") != "access":
-            raise HTTPException(status_code=401, detail="Invalid token type")
+    if user is None:
+        user = _cache_user(db.get(User, user_id), db)
 
-        user_id = int(payload["sub"])
+    return user
+
+
+def verify_access_token(token: str) -> int:
+    """
+    User id of an access token, raises 401 ``HTTPException`` if it is not valid.
+    """
+    # already verified and not yet expired token skips the signature check
+    user_id = token_cache.get(token)
+
+    if user_id is None:
+        try:
+            payload = jwt.decode(
+                token, settings.misc.secret_key, algorithms=[ALGORITHM]
+            )
+
+            if payload.get("type") != "access":
+                raise HTTPException(status_code=401, detail="Invalid token type")
 
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+            user_id = int(payload["sub"])
 
-    user = db.get(User, user_id)
+        except JWTError:
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        if "exp" in payload:
+            token_cache.set(token, user_id, expires_at=payload["exp"])
+
+    return user_id
+
+
+def _cache_user(user: User | None, db: Session | AsyncSession) -> User:
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
+    # detached, so commits of this request session do not expire it
+    db.expunge(user)
+    user_cache.set(
+        user.id,
+        user,
+        expires_at=time.time() + settings.auth.user_cache_ttl_seconds,
+    )
+
     return user
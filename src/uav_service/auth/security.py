@@ -1,9 +1,14 @@
 from passlib.context import CryptContext
 import hashlib
 
+from uav_service.settings import settings
+
 pwd_context = CryptContext(
     schemes=["argon2"],
     deprecated="auto",
+    argon2__time_cost=settings.auth.argon2_time_cost,
+    argon2__memory_cost=settings.auth.argon2_memory_cost,
+    argon2__parallelism=settings.auth.argon2_parallelism,
 )
 
 def _prehash_password(password: str) -> str:
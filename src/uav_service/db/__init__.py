@@ -1 +1,2 @@
-from .tables import Base, Configuration, Drone, Simulation, Trajectory, User
+from .tables import (Base, Configuration, Drone, ObstacleMap, Simulation,
+                     Trajectory, TrajectoryBlob, User)
@@ -0,0 +1,63 @@
+import zlib
+
+import numpy as np
+
+# x, y, z, yaw
+POINT_SIZE = 4
+# step indices of waypoints
+STEP_DTYPE = "<i4"
+
+COMPRESSORS = {
+    "zlib": (zlib.compress, zlib.decompress),
+}
+
+
+def encode_trajectory(
+    points: np.ndarray,
+    *,
+    dtype: str = "<f8",
+    compression: str | None = None,
+) -> bytes:
+    """
+    Pack (steps, 4) trajectory array into bytes.
+    """
+    data = np.ascontiguousarray(points, dtype=dtype).tobytes()
+
+    if compression is not None:
+        compress, _ = COMPRESSORS[compression]
+        data = compress(data)
+
+    return data
+
+
+def decode_trajectory(
+    data: bytes,
+    *,
+    n_steps: int,
+    dtype: str,
+    compression: str | None = None,
+) -> np.ndarray:
+    """
+    Unpack bytes produced by ``encode_trajectory`` into (n_steps, 4) array.
+
+    Uncompressed blobs are decoded without copying (read-only array).
+    """
+    if compression is not None:
+        _, decompress = COMPRESSORS[compression]
+        data = decompress(data)
+
+    return np.frombuffer(data, dtype=dtype).reshape(n_steps, POINT_SIZE)
+
+
+def encode_steps(steps: np.ndarray) -> bytes:
+    """
+    Pack step indices of stored waypoints into bytes.
+    """
+    return np.ascontiguousarray(steps, dtype=STEP_DTYPE).tobytes()
+
+
+def decode_steps(data: bytes) -> np.ndarray:
+    """
+    Unpack bytes produced by ``encode_steps``.
+    """
+    return np.frombuffer(data, dtype=STEP_DTYPE).astype(np.int64)
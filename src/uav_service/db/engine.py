@@ -1,13 +1,89 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine, async_sessionmaker,
+                                    create_async_engine)
 from sqlalchemy.orm import sessionmaker
 
+from uav_service.db.sqlite import apply_sqlite_pragmas
+from uav_service.settings import settings
 
-def get_engine(db_url: str):
-    return create_engine(
-        db_url,
-        echo=False,
-        future=True,
-    )
+
+def sqlite_pragmas() -> dict[str, object]:
+    db = settings.db
+    return {
+        "journal_mode": db.sqlite_journal_mode,
+        "synchronous": db.sqlite_synchronous,
+        "mmap_size": db.sqlite_mmap_size,
+        "cache_size": db.sqlite_cache_size,
+        "busy_timeout": db.sqlite_busy_timeout,
+    }
+
+
+# async driver of every sync backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(db_url: str | URL) -> URL:
+    """
+    The same database with the async driver of its backend.
+    """
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def _engine_params(url: URL, **engine_params) -> dict[str, object]:
+    db = settings.db
+    is_sqlite = url.get_backend_name() == "sqlite"
+
+    params: dict[str, object] = {"echo": db.echo}
+
+    # in-memory SQLite uses a single shared connection, no pool to size
+    if not is_sqlite or url.database not in (None, "", ":memory:"):
+        params.update(
+            pool_size=db.pool_size or settings.executor.db_workers,
+            max_overflow=db.max_overflow,
+            pool_timeout=db.pool_timeout,
+            pool_pre_ping=db.pool_pre_ping,
+        )
+        if not is_sqlite:
+            params["pool_recycle"] = db.pool_recycle
+
+    params.update(engine_params)
+    return params
+
+
+def get_engine(db_url: str | None = None, **engine_params):
+    """
+    Engine configured from ``settings.db``; ``engine_params`` override it.
+    """
+    url = make_url(db_url or settings.db.url)
+    engine = create_engine(url, future=True, **_engine_params(url, **engine_params))
+
+    if url.get_backend_name() == "sqlite":
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+
+    return engine
+
+
+def get_async_engine(db_url: str | None = None, **engine_params) -> AsyncEngine:
+    """
+    Async engine (aiosqlite / asyncpg) for the same database as ``get_engine``.
+    """
+    url = async_url(db_url or settings.db.url)
+    engine = create_async_engine(url, **_engine_params(url, **engine_params))
+
+    if url.get_backend_name() == "sqlite":
+        # the global foreign keys listener only sees plain sqlite3 connections
+        apply_sqlite_pragmas(
+            engine.sync_engine, {**sqlite_pragmas(), "foreign_keys": "ON"}
+        )
+
+    return engine
 
 
 def get_session_factory(engine):
@@ -17,3 +93,12 @@ def get_session_factory(engine):
         autocommit=False,
         future=True,
     )
+
+
+def get_async_session_factory(engine: AsyncEngine):
+    return async_sessionmaker(
+        bind=engine,
+        autoflush=False,
+        # objects stay usable after commit without an implicit (async) refresh
+        expire_on_commit=False,
+    )
@@ -1,24 +1,44 @@
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Iterable, List
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
+from sqlalchemy import Table, insert, select, tuple_
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager, defer
 
 from uav_service.auth.security import hash_password
-from uav_service.db.tables import (Configuration, Drone, Simulation,
-                                   Trajectory, User)
+from uav_service.db.blobs import (decode_steps, decode_trajectory,
+                                  encode_steps, encode_trajectory)
+from uav_service.db.tables import (Configuration, Drone, ObstacleMap,
+                                   Simulation, Trajectory, TrajectoryBlob,
+                                   User)
+from uav_service.executors import run_db
+from uav_service.logic.models import Coordinates3D
+from uav_service.logic.models import Drone as DroneState
+from uav_service.logic.models import ObstacleMap as ObstacleMapState
+from uav_service.logic.trajectories import DroneTrajectories
+from uav_service.logic.waypoints import Waypoints, interpolate, simplify
+from uav_service.metrics import stage
+from uav_service.settings import settings
 
 
 def create_user(
     db: Session,
     *,
     email: str,
-    password: str,
+    password: str | None = None,
+    hashed_password: str | None = None,
 ) -> User | None:
+    """
+    Pass either plain ``password`` or an already computed ``hashed_password``.
+    """
     try:
         user = User(
             email=email,
-            hashed_password=hash_password(password),
+            hashed_password=hashed_password or hash_password(password),
         )
         db.add(user)
         db.commit()
@@ -28,6 +48,33 @@ def create_user(
     return user
 
 
+async def create_user_async(
+    db: AsyncSession,
+    *,
+    email: str,
+    password: str | None = None,
+    hashed_password: str | None = None,
+) -> User | None:
+    """
+    ``create_user`` for an ``AsyncSession``.
+
+    Hashing a plain ``password`` here blocks the event loop,
+    prefer passing ``hashed_password``.
+    """
+    try:
+        user = User(
+            email=email,
+            hashed_password=hashed_password or hash_password(password),
+        )
+        db.add(user)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+    await db.refresh(user)
+    return user
+
+
 def create_configuration(
     session: Session,
     *,
@@ -35,9 +82,12 @@ def create_configuration(
     base: Dict[str, float],
     user: Dict[str, float],
     algorithm_params: Dict[str, float],
+    users: List[Dict[str, float]] | None = None,
 ) -> Configuration:
     """
     Persist input state of the system (configuration).
+
+    ``users`` are all ground users of a relay network, ``user`` the first.
     """
 
     config = Configuration(
@@ -48,8 +98,10 @@ def create_configuration(
         user_x=user["x"],
         user_y=user["y"],
         user_z=user["z"],
+        users=users,
         max_distance=algorithm_params["max_distance"],
         step_size=algorithm_params["step_size"],
+        obstacle_map_id=algorithm_params.get("obstacle_map_id"),
     )
 
     session.add(config)
@@ -58,6 +110,102 @@ def create_configuration(
     return config
 
 
+def add_obstacle_map(
+    session: Session,
+    *,
+    user_id: int,
+    name: str,
+    resolution: float,
+    clearance: float,
+    obstacles: List[Dict],
+) -> ObstacleMap:
+    """
+    Add an obstacle map to the session, without committing.
+    """
+
+    obstacle_map = ObstacleMap(
+        user_id=user_id,
+        name=name,
+        resolution=resolution,
+        clearance=clearance,
+        obstacles=obstacles,
+    )
+
+    session.add(obstacle_map)
+    session.flush()
+
+    return obstacle_map
+
+
+async def create_obstacle_map_async(
+    session: AsyncSession, **obstacle_map
+) -> ObstacleMap:
+    """
+    Persist an obstacle map, accepts ``add_obstacle_map`` keyword arguments.
+    """
+
+    try:
+        entity = await session.run_sync(partial(add_obstacle_map, **obstacle_map))
+        await session.commit()
+        return entity
+
+    except Exception:
+        await session.rollback()
+        raise
+
+
+def list_obstacle_maps(session: Session, *, user_id: int) -> List[ObstacleMap]:
+    """
+    User obstacle maps, newest first, without their obstacles loaded.
+    """
+
+    return list(
+        session.scalars(
+            select(ObstacleMap)
+            .options(defer(ObstacleMap.obstacles))
+            .where(ObstacleMap.user_id == user_id)
+            .order_by(ObstacleMap.id.desc())
+        )
+    )
+
+
+def get_obstacle_map(
+    session: Session,
+    *,
+    obstacle_map_id: int,
+    user_id: int,
+) -> ObstacleMap | None:
+    return session.scalar(
+        select(ObstacleMap).where(
+            ObstacleMap.id == obstacle_map_id, ObstacleMap.user_id == user_id
+        )
+    )
+
+
+def load_obstacle_map(
+    session: Session,
+    *,
+    obstacle_map_id: int,
+    user_id: int,
+) -> ObstacleMapState | None:
+    """
+    User obstacle map as passed to the planner.
+    """
+
+    obstacle_map = get_obstacle_map(
+        session, obstacle_map_id=obstacle_map_id, user_id=user_id
+    )
+    if obstacle_map is None:
+        return None
+
+    return ObstacleMapState(
+        id=obstacle_map.id,
+        resolution=obstacle_map.resolution,
+        clearance=obstacle_map.clearance,
+        obstacles=obstacle_map.obstacles,
+    )
+
+
 def create_drones(
     session: Session,
     *,
@@ -86,6 +234,39 @@ def create_drones(
     return label_to_id
 
 
+def create_drones_bulk(
+    session: Session,
+    *,
+    configuration_id: int,
+    drones: Iterable[Dict],
+) -> dict[str, int]:
+    """
+    Persist initial drone states with a single multi-row INSERT ... RETURNING.
+    """
+
+    rows = [
+        {
+            "configuration_id": configuration_id,
+            "label": drone["label"],
+            "init_x": drone["coordinates"]["x"],
+            "init_y": drone["coordinates"]["y"],
+            "init_z": drone["coordinates"]["z"],
+            "init_yaw": drone["coordinates"]["yaw"],
+        }
+        for drone in drones
+    ]
+
+    if not rows:
+        return {}
+
+    result = session.execute(
+        insert(Drone).returning(Drone.id, Drone.label, sort_by_parameter_order=True),
+        rows,
+    )
+
+    return {label: drone_id for drone_id, label in result}
+
+
 def start_simulation(
     session: Session,
     *,
@@ -110,33 +291,378 @@ def save_trajectories(
     session: Session,
     *,
     simulation_id: int,
-    trajectories: dict[str, list[dict]],
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
     label_to_id: dict[str, int],
 ):
     """
     Persist trajectories using drone labels.
     """
 
-    for label, steps in trajectories.items():
+    for label, step_indices, points in _drone_rows(trajectories):
         drone_id = label_to_id.get(label)
 
         if drone_id is None:
             raise ValueError(f"Unknown drone label: {label}")
 
-        for step_index, step in enumerate(steps):
+        for step_index, (x, y, z, yaw) in zip(step_indices, points):
             session.add(
                 Trajectory(
                     simulation_id=simulation_id,
                     drone_id=drone_id,
                     step_index=step_index,
-                    x=step["x"],
-                    y=step["y"],
-                    z=step["z"],
-                    yaw=step["yaw"],
+                    x=x,
+                    y=y,
+                    z=z,
+                    yaw=yaw,
                 )
             )
 
 
+def save_trajectories_bulk(
+    session: Session,
+    *,
+    simulation_id: int,
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+    label_to_id: dict[str, int],
+):
+    """
+    Persist trajectories with one executemany INSERT, bypassing the ORM unit of work.
+    """
+
+    _insert_rows(
+        session,
+        Trajectory.__table__,
+        simulation_id=simulation_id,
+        rows=_point_rows(trajectories),
+        label_to_id=label_to_id,
+    )
+
+
+def save_trajectory_blobs(
+    session: Session,
+    *,
+    simulation_id: int,
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+    label_to_id: dict[str, int],
+    dtype: str = "<f8",
+    compression: str | None = None,
+):
+    """
+    Persist every drone trajectory as one packed binary row.
+    """
+
+    _insert_rows(
+        session,
+        TrajectoryBlob.__table__,
+        simulation_id=simulation_id,
+        rows=_blob_rows(trajectories, dtype=dtype, compression=compression),
+        label_to_id=label_to_id,
+    )
+
+
+def save_trajectory_rows(
+    session: Session,
+    *,
+    simulation_id: int,
+    trajectories: "TrajectoryRows",
+    label_to_id: dict[str, int],
+):
+    """
+    Persist trajectory rows built beforehand by ``trajectory_rows``.
+    """
+
+    _insert_rows(
+        session,
+        trajectories.table,
+        simulation_id=simulation_id,
+        rows=trajectories.rows,
+        label_to_id=label_to_id,
+    )
+
+
+@dataclass
+class TrajectoryRows:
+    """
+    INSERT rows of every drone trajectory, keyed by drone label, without
+    the simulation and drone ids, and the table they go to.
+    """
+
+    table: Table
+    rows: Dict[str, List[Dict]]
+
+
+def trajectory_rows(
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+    *,
+    storage: str = "rows",
+) -> TrajectoryRows:
+    """
+    The trajectory rows ``add_simulation`` would write, built without a
+    session: waypoint simplification and blob encoding included.
+    """
+
+    trajectories = _stored_trajectories(trajectories)
+
+    if storage == "blob":
+        return TrajectoryRows(
+            TrajectoryBlob.__table__, _blob_rows(trajectories, **_blob_format())
+        )
+    if storage == "rows":
+        return TrajectoryRows(Trajectory.__table__, _point_rows(trajectories))
+    raise ValueError(f"Unknown trajectory storage: {storage}")
+
+
+def _point_rows(
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+) -> Dict[str, List[Dict]]:
+    """
+    One row per stored point of every drone.
+    """
+    return {
+        label: [
+            {"step_index": step_index, "x": x, "y": y, "z": z, "yaw": yaw}
+            for step_index, (x, y, z, yaw) in zip(step_indices, points)
+        ]
+        for label, step_indices, points in _drone_rows(trajectories)
+    }
+
+
+def _blob_rows(
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+    *,
+    dtype: str,
+    compression: str | None,
+) -> Dict[str, List[Dict]]:
+    """
+    One packed row per drone.
+    """
+    rows = {}
+
+    for label, step_indices, points in _drone_rows(trajectories):
+        points = np.array(points, float).reshape(-1, 4)
+        rows[label] = [
+            {
+                "n_steps": len(points),
+                "dtype": dtype,
+                "compression": compression,
+                "data": encode_trajectory(points, dtype=dtype, compression=compression),
+                "step_index": (
+                    encode_steps(step_indices)
+                    if isinstance(trajectories, Waypoints)
+                    else None
+                ),
+            }
+        ]
+
+    return rows
+
+
+def _insert_rows(
+    session: Session,
+    table: Table,
+    *,
+    simulation_id: int,
+    rows: Dict[str, List[Dict]],
+    label_to_id: dict[str, int],
+):
+    """
+    Fill in the simulation and drone ids and INSERT ``rows`` with one executemany.
+    """
+
+    all_rows = []
+
+    for label, drone_rows in rows.items():
+        drone_id = label_to_id.get(label)
+
+        if drone_id is None:
+            raise ValueError(f"Unknown drone label: {label}")
+
+        for row in drone_rows:
+            row["simulation_id"] = simulation_id
+            row["drone_id"] = drone_id
+        all_rows.extend(drone_rows)
+
+    if all_rows:
+        session.execute(insert(table), all_rows)
+
+
+def load_trajectories(
+    session: Session,
+    *,
+    simulation_id: int,
+) -> DroneTrajectories:
+    """
+    Read simulation trajectories back, from blobs if present, rows otherwise.
+
+    Stored waypoints are interpolated back to one point per step.
+    """
+
+    blobs = session.execute(
+        select(
+            Drone.label,
+            TrajectoryBlob.n_steps,
+            TrajectoryBlob.dtype,
+            TrajectoryBlob.compression,
+            TrajectoryBlob.data,
+            TrajectoryBlob.step_index,
+        )
+        .join(Drone, Drone.id == TrajectoryBlob.drone_id)
+        .where(TrajectoryBlob.simulation_id == simulation_id)
+        .order_by(TrajectoryBlob.drone_id)
+    ).all()
+
+    if blobs:
+        labels = [blob.label for blob in blobs]
+        arrays = [
+            decode_trajectory(
+                blob.data,
+                n_steps=blob.n_steps,
+                dtype=blob.dtype,
+                compression=blob.compression,
+            )
+            for blob in blobs
+        ]
+        step_indices = [
+            (
+                decode_steps(blob.step_index)
+                if blob.step_index is not None
+                else np.arange(blob.n_steps)
+            )
+            for blob in blobs
+        ]
+    else:
+        rows = session.execute(
+            select(
+                Drone.label,
+                Trajectory.step_index,
+                Trajectory.x,
+                Trajectory.y,
+                Trajectory.z,
+                Trajectory.yaw,
+            )
+            .join(Drone, Drone.id == Trajectory.drone_id)
+            .where(Trajectory.simulation_id == simulation_id)
+            .order_by(Trajectory.drone_id, Trajectory.step_index)
+        ).all()
+
+        labels, arrays, step_indices = [], [], []
+        for label, step_index, x, y, z, yaw in rows:
+            if not labels or labels[-1] != label:
+                labels.append(label)
+                arrays.append([])
+                step_indices.append([])
+            arrays[-1].append((x, y, z, yaw))
+            step_indices[-1].append(step_index)
+
+    if not labels:
+        return DroneTrajectories.empty()
+
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum([len(points) for points in arrays], out=offsets[1:])
+
+    return interpolate(
+        Waypoints(
+            DroneTrajectories(
+                labels, np.concatenate([np.asarray(a, float) for a in arrays]), offsets
+            ),
+            np.concatenate([np.asarray(s, np.int64) for s in step_indices]),
+        )
+    )
+
+
+def list_simulations(
+    session: Session,
+    *,
+    user_id: int,
+    limit: int,
+    before: tuple[datetime, int] | None = None,
+) -> List[Simulation]:
+    """
+    User simulations, newest first, keyset-paginated by (started_at, id).
+    """
+
+    query = (
+        select(Simulation)
+        .join(Simulation.configuration)
+        .options(contains_eager(Simulation.configuration))
+        .where(Configuration.user_id == user_id)
+        .order_by(Simulation.started_at.desc(), Simulation.id.desc())
+        .limit(limit)
+    )
+
+    if before is not None:
+        query = query.where(tuple_(Simulation.started_at, Simulation.id) < before)
+
+    return list(session.scalars(query))
+
+
+def get_simulation(
+    session: Session,
+    *,
+    simulation_id: int,
+    user_id: int,
+) -> Simulation | None:
+    """
+    User simulation with its configuration and initial drones
+    (trajectories are read with ``load_trajectories``).
+    """
+
+    return session.scalar(
+        select(Simulation)
+        .join(Simulation.configuration)
+        .options(
+            contains_eager(Simulation.configuration).selectinload(Configuration.drones)
+        )
+        .where(Simulation.id == simulation_id, Configuration.user_id == user_id)
+    )
+
+
+def current_drones(
+    simulation: Simulation,
+    trajectories: DroneTrajectories,
+) -> List[DroneState]:
+    """
+    Drones of a simulation where it left them: at the end of their
+    trajectory, or at the initial position if they did not fly.
+    """
+
+    drones = []
+    for d in sorted(simulation.configuration.drones, key=lambda d: d.id):
+        if d.label in trajectories:
+            x, y, z, yaw = trajectories[d.label][-1].tolist()
+        else:
+            x, y, z, yaw = d.init_x, d.init_y, d.init_z, d.init_yaw
+        drones.append(
+            DroneState(label=d.label, coordinates=Coordinates3D(x=x, y=y, z=z, yaw=yaw))
+        )
+    return drones
+
+
+def _step_rows(steps: np.ndarray | list[dict]) -> List:
+    """
+    (x, y, z, yaw) rows of either a columnar array or a list of step dicts.
+    """
+    if isinstance(steps, np.ndarray):
+        return steps.tolist()
+    return [(s["x"], s["y"], s["z"], s["yaw"]) for s in steps]
+
+
+def _drone_rows(
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+) -> Iterator[Tuple[str, Iterable[int], List]]:
+    """
+    (label, step indices, (x, y, z, yaw) rows) of every drone.
+    """
+    if isinstance(trajectories, Waypoints):
+        for label, points, steps in trajectories.items():
+            yield label, steps.tolist(), points.tolist()
+        return
+
+    for label, steps in trajectories.items():
+        points = _step_rows(steps)
+        yield label, range(len(points)), points
+
+
 def finish_simulation(
     session: Session,
     *,
@@ -147,7 +673,34 @@ def finish_simulation(
     simulation.success = success
 
 
-def persist_full_simulation(
+def _blob_format() -> Dict:
+    """
+    ``save_trajectory_blobs`` format taken from ``settings.db``.
+    """
+    compression = settings.db.trajectory_blob_compression
+    return dict(
+        dtype=settings.db.trajectory_blob_dtype,
+        compression=None if compression == "none" else compression,
+    )
+
+
+def _stored_trajectories(
+    trajectories: DroneTrajectories | Waypoints | dict[str, list[dict]],
+) -> DroneTrajectories | Waypoints | dict[str, list[dict]]:
+    """
+    Waypoints of columnar trajectories with ``settings.db.trajectory_waypoints``,
+    the trajectories themselves otherwise.
+    """
+    if settings.db.trajectory_waypoints and isinstance(trajectories, DroneTrajectories):
+        return simplify(
+            trajectories,
+            settings.waypoints.position_tolerance,
+            settings.waypoints.yaw_tolerance,
+        )
+    return trajectories
+
+
+def add_simulation(
     session: Session,
     *,
     user_id: int,
@@ -155,44 +708,194 @@ def persist_full_simulation(
     user: Dict[str, float],
     algorithm_params: Dict[str, float],
     drones: Iterable[Dict],
-    trajectories: Dict[int, List[Dict]],
+    trajectories: DroneTrajectories | Dict[str, List[Dict]],
+    bulk: bool = False,
+    storage: str = "rows",
+    users: List[Dict[str, float]] | None = None,
+) -> Simulation:
+    """
+    Add full simulation lifecycle to the session, without committing.
+
+    With ``bulk=True`` drones and trajectories are written with multi-row
+    INSERT statements instead of one ORM object per row.
+    With ``storage="blob"`` every trajectory is stored as one packed row
+    (format taken from ``settings.db``).
+    With ``settings.db.trajectory_waypoints`` only the waypoints within
+    ``settings.waypoints`` tolerances of columnar trajectories are stored.
+    ``TrajectoryRows`` are stored as they are, whatever ``storage``.
+    """
+
+    _create_drones = create_drones_bulk if bulk else create_drones
+    _save_trajectories = save_trajectories_bulk if bulk else save_trajectories
+
+    if isinstance(trajectories, TrajectoryRows):
+        _save_trajectories = save_trajectory_rows
+    elif storage == "blob":
+        _save_trajectories = partial(save_trajectory_blobs, **_blob_format())
+    elif storage != "rows":
+        raise ValueError(f"Unknown trajectory storage: {storage}")
+
+    trajectories = _stored_trajectories(trajectories)
+
+    config = create_configuration(
+        session,
+        user_id=user_id,
+        base=base,
+        user=user,
+        algorithm_params=algorithm_params,
+        users=users,
+    )
+
+    drone_label_to_id = _create_drones(
+        session,
+        configuration_id=config.id,
+        drones=drones,
+    )
+
+    simulation = start_simulation(
+        session,
+        configuration_id=config.id,
+    )
+
+    _save_trajectories(
+        session,
+        simulation_id=simulation.id,
+        trajectories=trajectories,
+        label_to_id=drone_label_to_id,
+    )
+
+    finish_simulation(session, simulation=simulation, success=True)
+
+    return simulation
+
+
+def persist_full_simulation(
+    session: Session,
+    *,
+    bulk: bool = False,
+    storage: str = "rows",
+    **simulation,
 ) -> int:
     """
     Atomic persistence of full simulation lifecycle.
+
+    Accepts ``add_simulation`` keyword arguments.
     """
 
     try:
-        config = create_configuration(
-            session,
-            user_id=user_id,
-            base=base,
-            user=user,
-            algorithm_params=algorithm_params,
-        )
+        with stage("db.persist"):
+            simulation_entity = add_simulation(
+                session, bulk=bulk, storage=storage, **simulation
+            )
+        with stage("db.commit"):
+            session.commit()
+        return simulation_entity.id
 
-        drone_label_to_id = create_drones(
-            session,
-            configuration_id=config.id,
-            drones=drones,
-        )
+    except Exception:
+        session.rollback()
+        raise
 
-        simulation = start_simulation(
-            session,
-            configuration_id=config.id,
-        )
 
-        save_trajectories(
-            session,
-            simulation_id=simulation.id,
-            trajectories=trajectories,
-            label_to_id=drone_label_to_id,
-        )
+def persist_simulations(
+    session: Session,
+    *,
+    simulations: Iterable[Dict],
+    bulk: bool = False,
+    storage: str = "rows",
+) -> List[int]:
+    """
+    Atomic persistence of several simulations in one transaction.
 
-        finish_simulation(session, simulation=simulation, success=True)
+    Every item holds ``add_simulation`` keyword arguments.
+    """
 
-        session.commit()
-        return simulation.id
+    try:
+        with stage("db.persist"):
+            entities = [
+                add_simulation(session, bulk=bulk, storage=storage, **simulation)
+                for simulation in simulations
+            ]
+        with stage("db.commit"):
+            session.commit()
+        return [entity.id for entity in entities]
 
     except Exception:
         session.rollback()
         raise
+
+
+def _with_trajectory_rows(simulations: List[Dict], storage: str) -> List[Dict]:
+    """
+    ``add_simulation`` keyword arguments with the trajectories turned into
+    ``TrajectoryRows``.
+    """
+    with stage("db.persist"):
+        return [
+            {
+                **simulation,
+                "trajectories": trajectory_rows(
+                    simulation["trajectories"], storage=storage
+                ),
+            }
+            for simulation in simulations
+        ]
+
+
+async def persist_full_simulation_async(
+    session: AsyncSession,
+    *,
+    bulk: bool = False,
+    storage: str = "rows",
+    **simulation,
+) -> int:
+    """
+    ``persist_full_simulation`` for an ``AsyncSession``.
+
+    ``AsyncSession.run_sync`` runs ``add_simulation`` on the event loop, so
+    the trajectory rows are built in the DB thread pool beforehand and only
+    the INSERT statements are left for it.
+    """
+
+    [simulation] = await run_db(_with_trajectory_rows, [simulation], storage)
+
+    try:
+        simulation_entity = await session.run_sync(
+            partial(add_simulation, bulk=bulk, **simulation)
+        )
+        with stage("db.commit"):
+            await session.commit()
+        return simulation_entity.id
+
+    except Exception:
+        await session.rollback()
+        raise
+
+
+async def persist_simulations_async(
+    session: AsyncSession,
+    *,
+    simulations: Iterable[Dict],
+    bulk: bool = False,
+    storage: str = "rows",
+) -> List[int]:
+    """
+    ``persist_simulations`` for an ``AsyncSession``, trajectory rows built
+    as in ``persist_full_simulation_async``.
+    """
+
+    simulations = await run_db(_with_trajectory_rows, list(simulations), storage)
+
+    try:
+        entities = await session.run_sync(
+            lambda sync_session: [
+                add_simulation(sync_session, bulk=bulk, **simulation)
+                for simulation in simulations
+            ]
+        )
+        with stage("db.commit"):
+            await session.commit()
+        return [entity.id for entity in entities]
+
+    except Exception:
+        await session.rollback()
+        raise
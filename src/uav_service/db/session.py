@@ -1,17 +1,13 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from uav_service.db.engine import (get_async_engine, get_async_session_factory,
+                                   get_engine, get_session_factory)
+from uav_service.settings import settings
 
-DATABASE_URL = "sqlite+pysqlite:///./uav.sqlite"
+DATABASE_URL = settings.db.url
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-)
+engine = get_engine(DATABASE_URL)
 
-SessionLocal = sessionmaker(
-    bind=engine,
-    autocommit=False,
-    autoflush=False,
-    future=True,
-)
+SessionLocal = get_session_factory(engine)
+
+async_engine = get_async_engine(DATABASE_URL)
+
+AsyncSessionLocal = get_async_session_factory(async_engine)
@@ -1,9 +1,27 @@
+import sqlite3
+
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
 
 @event.listens_for(Engine, "connect")
 def enable_sqlite_fk(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.close()
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, object]) -> None:
+    """
+    Run ``PRAGMA name=value`` for every new connection of the engine.
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
@@ -1,7 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (JSON, Boolean, DateTime, Float, ForeignKey, Index,
+                        Integer, LargeBinary, String, UniqueConstraint)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -21,10 +22,49 @@ class User(Base):
         back_populates="user",
         cascade="all, delete-orphan",
     )
+    obstacle_maps: Mapped[List["ObstacleMap"]] = relationship(
+        back_populates="user",
+        cascade="all, delete-orphan",
+    )
+
+
+class ObstacleMap(Base):
+    """
+    Buildings and no-fly volumes, ``obstacles`` holds a JSON list of
+    ``BoxObstacle`` / ``PolygonObstacle``.
+
+    Maps are never updated and ids are never reused (compiled voxel grids
+    are cached by id).
+    """
+
+    __tablename__ = "obstacle_maps"
+    __table_args__ = (
+        Index("ix_obstacle_maps_user_id", "user_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    # voxel size and obstacle inflation, meters
+    resolution: Mapped[float] = mapped_column(Float, nullable=False)
+    clearance: Mapped[float] = mapped_column(Float, nullable=False)
+
+    obstacles: Mapped[list] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    user: Mapped["User"] = relationship(back_populates="obstacle_maps")
 
 
 class Configuration(Base):
     __tablename__ = "configurations"
+    __table_args__ = (Index("ix_configurations_user_id", "user_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -42,10 +82,15 @@ class Configuration(Base):
     user_x: Mapped[float] = mapped_column(Float, nullable=False)
     user_y: Mapped[float] = mapped_column(Float, nullable=False)
     user_z: Mapped[float] = mapped_column(Float, nullable=False)
+    # all ground users of a relay network, the first one is user_*
+    users: Mapped[Optional[list]] = mapped_column(JSON)
 
     # Algorithm / bridge parameters
     max_distance: Mapped[float] = mapped_column(Float, nullable=False)
     step_size: Mapped[float] = mapped_column(Float, nullable=False)
+    obstacle_map_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("obstacle_maps.id", ondelete="SET NULL")
+    )
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
@@ -63,6 +108,11 @@ class Configuration(Base):
 
 class Simulation(Base):
     __tablename__ = "simulations"
+    __table_args__ = (
+        Index("ix_simulations_configuration_id", "configuration_id"),
+        # keyset pagination of history
+        Index("ix_simulations_started_at_id", "started_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -80,10 +130,15 @@ class Simulation(Base):
         back_populates="simulation",
         cascade="all, delete-orphan",
     )
+    trajectory_blobs: Mapped[List["TrajectoryBlob"]] = relationship(
+        back_populates="simulation",
+        cascade="all, delete-orphan",
+    )
 
 
 class Drone(Base):
     __tablename__ = "drones"
+    __table_args__ = (Index("ix_drones_configuration_id", "configuration_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -106,10 +161,23 @@ class Drone(Base):
         back_populates="drone",
         cascade="all, delete-orphan",
     )
+    trajectory_blobs: Mapped[List["TrajectoryBlob"]] = relationship(
+        back_populates="drone",
+        cascade="all, delete-orphan",
+    )
 
 
 class Trajectory(Base):
     __tablename__ = "trajectories"
+    __table_args__ = (
+        # replay of a simulation in step order
+        Index(
+            "ix_trajectories_simulation_drone_step",
+            "simulation_id",
+            "drone_id",
+            "step_index",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -132,3 +200,38 @@ class Trajectory(Base):
 
     simulation: Mapped["Simulation"] = relationship(back_populates="trajectories")
     drone: Mapped["Drone"] = relationship(back_populates="trajectories")
+
+
+class TrajectoryBlob(Base):
+    """
+    Whole drone trajectory packed into one binary row.
+
+    ``data`` holds ``n_steps`` x (x, y, z, yaw) values of ``dtype``
+    (numpy dtype string, e.g. "<f4"), optionally ``compression``-ed.
+    For waypoints ``step_index`` holds the step of every stored point as
+    packed int32, NULL if every step is stored.
+    """
+
+    __tablename__ = "trajectory_blobs"
+    __table_args__ = (UniqueConstraint("simulation_id", "drone_id"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    simulation_id: Mapped[int] = mapped_column(
+        ForeignKey("simulations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    drone_id: Mapped[int] = mapped_column(
+        ForeignKey("drones.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    n_steps: Mapped[int] = mapped_column(Integer, nullable=False)
+    dtype: Mapped[str] = mapped_column(String(8), nullable=False)
+    compression: Mapped[Optional[str]] = mapped_column(String(16))
+
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    step_index: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+
+    simulation: Mapped["Simulation"] = relationship(back_populates="trajectory_blobs")
+    drone: Mapped["Drone"] = relationship(back_populates="trajectory_blobs")
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from uav_service import metrics
+from uav_service.settings import settings
+
+T = TypeVar("T")
+
+_compute_executor: Executor | None = None
+_db_executor: ThreadPoolExecutor | None = None
+_hashing_executor: ThreadPoolExecutor | None = None
+
+_hashing_lock = threading.Lock()
+_hashing_in_flight = 0
+
+
+class HashingQueueFull(Exception):
+    """
+    Too many password hashing tasks are running or waiting.
+    """
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=settings.executor.db_workers,
+            thread_name_prefix="uav-db",
+        )
+    return _db_executor
+
+
+def get_compute_executor() -> Executor:
+    global _compute_executor
+
+    if _compute_executor is None:
+        if settings.executor.compute_workers > 0:
+            _compute_executor = ProcessPoolExecutor(
+                max_workers=settings.executor.compute_workers,
+                # forking a process with running event loop threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=metrics.set_directory,
+                initargs=(metrics.directory(),),
+            )
+        else:
+            _compute_executor = get_db_executor()
+    return _compute_executor
+
+
+def _run_and_flush_metrics(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    try:
+        return func(*args, **kwargs)
+    finally:
+        metrics.flush()
+
+
+async def run_compute(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run CPU-bound function off the event loop. Arguments must be picklable.
+    """
+    executor = get_compute_executor()
+    loop = asyncio.get_running_loop()
+
+    if isinstance(executor, ProcessPoolExecutor):
+        call = partial(_run_and_flush_metrics, func, *args, **kwargs)
+    else:
+        call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+    return await loop.run_in_executor(executor, call)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run blocking DB function off the event loop, in a copy of the current context.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_db_executor(),
+        partial(contextvars.copy_context().run, func, *args, **kwargs),
+    )
+
+
+def get_hashing_executor() -> ThreadPoolExecutor:
+    global _hashing_executor
+
+    if _hashing_executor is None:
+        _hashing_executor = ThreadPoolExecutor(
+            max_workers=settings.auth.hashing_workers,
+            thread_name_prefix="uav-hashing",
+        )
+    return _hashing_executor
+
+
+async def run_hashing(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run password hashing in its own bounded pool.
+
+    Raises ``HashingQueueFull`` instead of queueing more than
+    ``hashing_workers + hashing_queue_size`` tasks.
+    """
+    global _hashing_in_flight
+
+    limit = settings.auth.hashing_workers + settings.auth.hashing_queue_size
+
+    with _hashing_lock:
+        if _hashing_in_flight >= limit:
+            metrics.hashing_tasks.inc("rejected")
+            raise HashingQueueFull()
+        _hashing_in_flight += 1
+
+    submitted_at = time.perf_counter()
+
+    def task() -> T:
+        metrics.hashing_queue_wait.observe(time.perf_counter() - submitted_at)
+        return func(*args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(get_hashing_executor(), task)
+    finally:
+        with _hashing_lock:
+            _hashing_in_flight -= 1
+        metrics.hashing_tasks.inc("completed")
+
+
+def shutdown_executors() -> None:
+    global _compute_executor, _db_executor, _hashing_executor
+
+    for executor in (_compute_executor, _db_executor, _hashing_executor):
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    _compute_executor = None
+    _db_executor = None
+    _hashing_executor = None
@@ -0,0 +1,100 @@
+from typing import Tuple
+
+import numpy as np
+
+
+def distance_matrix(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Euclidean distances, shape (len(points), len(targets)).
+    """
+    diff = points[:, None, :] - targets[None, :, :]
+    return np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+
+
+def nearest_candidates(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Indices of points that are among the ``len(targets)`` nearest
+    to at least one target.
+
+    Some optimal assignment of targets to points always uses only these
+    candidates: if a target got a point outside of its m nearest, one of
+    those m points is free (other targets hold at most m - 1 of them) and
+    closer, so swapping cannot increase the total cost.
+    """
+    n_targets = len(targets)
+
+    if len(points) <= n_targets:
+        return np.arange(len(points))
+
+    dist = distance_matrix(points, targets)
+    nearest = np.argpartition(dist, n_targets - 1, axis=0)[:n_targets]
+
+    return np.unique(nearest)
+
+
+def linear_sum_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Minimum cost assignment (Hungarian algorithm, shortest augmenting
+    path with potentials), inner loops vectorized over columns.
+
+    Same contract as ``scipy.optimize.linear_sum_assignment``: returns
+    ``(row_ind, col_ind)`` sorted by row, of length ``min(cost.shape)``.
+    """
+    cost = np.asarray(cost, dtype=float)
+
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+
+    n_rows, n_cols = cost.shape
+
+    # 1-based, index 0 is a fictive column used as the augmenting path root
+    u = np.zeros(n_rows + 1)
+    v = np.zeros(n_cols + 1)
+    row_of_col = np.zeros(n_cols + 1, dtype=int)
+    way = np.zeros(n_cols + 1, dtype=int)
+
+    for i in range(1, n_rows + 1):
+        row_of_col[0] = i
+        j0 = 0
+        min_reduced = np.full(n_cols + 1, np.inf)
+        used = np.zeros(n_cols + 1, dtype=bool)
+
+        while row_of_col[j0] != 0:
+            used[j0] = True
+            i0 = row_of_col[j0]
+
+            free = ~used
+            free[0] = False
+
+            reduced = np.full(n_cols + 1, np.inf)
+            reduced[1:] = cost[i0 - 1] - u[i0] - v[1:]
+
+            improved = free & (reduced < min_reduced)
+            min_reduced[improved] = reduced[improved]
+            way[improved] = j0
+
+            candidates = np.where(free, min_reduced, np.inf)
+            j1 = int(np.argmin(candidates))
+            delta = candidates[j1]
+
+            u[row_of_col[used]] += delta
+            v[used] -= delta
+            min_reduced[free] -= delta
+
+            j0 = j1
+
+        # augment along the found path
+        while j0:
+            j1 = way[j0]
+            row_of_col[j0] = row_of_col[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(row_of_col[1:])
+    rows = row_of_col[1:][cols] - 1
+
+    if transposed:
+        rows, cols = cols, rows
+
+    order = np.argsort(rows)
+    return rows[order], cols[order]
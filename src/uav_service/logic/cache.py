@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from uav_service.logic.trajectories import DroneTrajectories
+from uav_service.settings import settings
+
+# bump when compute results for the same inputs change
+CACHE_VERSION = 1
+
+
+def _canonical(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def compute_cache_key(**inputs) -> str:
+    """
+    Canonical hash of compute keyword arguments.
+    """
+    payload = {"version": CACHE_VERSION}
+    payload.update((name, _canonical(value)) for name, value in inputs.items())
+
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class _DiskTier:
+    """
+    SQLite file shared between worker processes.
+
+    Connections are opened on first use, one per thread of every process,
+    never at import: the preforked server imports this module in the
+    master before forking the workers.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # a connection inherited through fork must not be used
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS compute_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " created_at REAL NOT NULL,"
+                    " labels TEXT NOT NULL,"
+                    " offsets BLOB NOT NULL,"
+                    " data BLOB NOT NULL)"
+                )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[DroneTrajectories]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT labels, offsets, data FROM compute_cache"
+                " WHERE key = ? AND created_at > ?",
+                (key, time.time() - self.ttl_seconds),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        labels, offsets, data = row
+        return DroneTrajectories(
+            json.loads(labels),
+            np.frombuffer(data, dtype="<f8"),
+            np.frombuffer(offsets, dtype="<i8"),
+        )
+
+    def set(self, key: str, value: DroneTrajectories) -> None:
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO compute_cache VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    time.time(),
+                    json.dumps(value.labels),
+                    value.offsets.astype("<i8").tobytes(),
+                    value.data.astype("<f8").tobytes(),
+                ),
+            )
+            conn.execute(
+                "DELETE FROM compute_cache WHERE created_at <= ? OR key NOT IN"
+                " (SELECT key FROM compute_cache"
+                "  ORDER BY created_at DESC LIMIT ?)",
+                (time.time() - self.ttl_seconds, self.max_entries),
+            )
+
+
+class ComputeCache:
+    """
+    LRU + TTL cache of compute results, bounded by total trajectory bytes,
+    with an optional shared on-disk tier.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        ttl_seconds: float,
+        disk_path: str | None = None,
+        disk_max_entries: int = 1024,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, Tuple[float, DroneTrajectories]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk = (
+            _DiskTier(disk_path, disk_max_entries, ttl_seconds) if disk_path else None
+        )
+        self.counters: Dict[str, int] = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: str) -> Optional[DroneTrajectories]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return value
+                self._pop(key)
+
+        value = self._disk.get(key) if self._disk is not None else None
+
+        with self._lock:
+            if value is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._put(key, value)
+            return value
+
+    def set(self, key: str, value: DroneTrajectories) -> None:
+        value.data.flags.writeable = False
+
+        with self._lock:
+            self._put(key, value)
+
+        if self._disk is not None:
+            self._disk.set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _put(self, key: str, value: DroneTrajectories) -> None:
+        if value.data.nbytes > self.max_bytes:
+            return
+
+        self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._bytes += value.data.nbytes
+
+        while self._bytes > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1].data.nbytes
+
+
+compute_cache = ComputeCache(
+    max_bytes=settings.cache.max_bytes,
+    ttl_seconds=settings.cache.ttl_seconds,
+    disk_path=settings.cache.disk_path,
+    disk_max_entries=settings.cache.disk_max_entries,
+)
@@ -5,8 +5,19 @@ from typing import Dict, List, Tuple
 import numpy as np
 from fastapi.exceptions import ValidationException
 
-from uav_service.logic.models import Coordinates, Coordinates3D, Drone
-from uav_service.logic.utils import dh_transform
+from uav_service.logic.assignment import (
+    distance_matrix,
+    linear_sum_assignment,
+    nearest_candidates,
+)
+from uav_service.logic.models import Coordinates, Coordinates3D, Drone, ObstacleMap
+from uav_service.logic.obstacles import VoxelGrid, get_voxel_grid
+from uav_service.logic.relays import relay_network, relay_tree
+from uav_service.logic.separation import resolve_conflicts as separate
+from uav_service.logic.trajectories import DroneTrajectories
+from uav_service.logic.utils import dh_translation
+from uav_service.metrics import stage
+from uav_service.settings import settings
 
 
 # ---------- HELPERS ----------
@@ -101,10 +112,17 @@ def projection_factor_on_segment(p: np.ndarray, a: np.ndarray, b: np.ndarray) ->
     return float(np.dot(p - a, ab) / ab_len_sq)
 
 
-def assign_drones_to_targets(drones, bridge_targets, base, user):
+def assign_drones_to_targets(
+    drones, bridge_targets, base, user, method: str = "projection"
+):
     if not bridge_targets:
         return []
 
+    if method == "hungarian":
+        return assign_drones_to_targets_optimal(drones, bridge_targets)
+    if method != "projection":
+        raise ValueError(f"Unknown assignment method: {method}")
+
     # 1. Select drones closest to the segment
     drones_sorted = sorted(
         drones, key=lambda d: drone_distance_to_bridge_segment(d, base, user)
@@ -129,9 +147,105 @@ def assign_drones_to_targets(drones, bridge_targets, base, user):
 
     return list(zip(drones_ordered, targets_ordered))
 
+
+def assign_drones_to_targets_optimal(drones, bridge_targets):
+    """
+    Assignment with minimal total straight-line travel distance.
+    """
+    positions = np.array(
+        [[d.coordinates.x, d.coordinates.y, d.coordinates.z] for d in drones], float
+    )
+    targets = np.asarray(bridge_targets, float)
+
+    candidates = nearest_candidates(positions, targets)
+    cost = distance_matrix(targets, positions[candidates])
+    target_idx, candidate_idx = linear_sum_assignment(cost)
+
+    return [
+        (drones[candidates[c]], bridge_targets[t])
+        for t, c in zip(target_idx, candidate_idx)
+    ]
+
+
 # ---------- DH TRAJECTORY ----------
 
 
+def generate_dh_trajectories(
+    starts: np.ndarray,
+    targets: np.ndarray,
+    user: np.ndarray,
+    step_size: float | np.ndarray,
+    initial_yaws_deg: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batched DH trajectory generation for all drones at once.
+
+    ``user`` and ``step_size`` are either shared by all drones or given
+    per drone, as (n_drones, 3) and (n_drones,) arrays.
+
+    Returns a pair ``(positions, steps)``:
+      positions -- array (n_drones, n_steps, 4) with x, y, z, yaw columns;
+                   drones with fewer steps are padded with their last point
+      steps     -- array (n_drones,) with the real number of steps per drone
+    """
+    starts = np.asarray(starts, float).reshape(-1, 3)
+    targets = np.asarray(targets, float).reshape(-1, 3)
+    initial_yaws_deg = np.asarray(initial_yaws_deg, float).reshape(-1)
+    user = np.broadcast_to(np.asarray(user, float).reshape(-1, 3), starts.shape)
+    step_size = np.broadcast_to(np.asarray(step_size, float), len(starts))
+
+    if len(starts) == 0:
+        return np.empty((0, 0, 4)), np.empty(0, dtype=int)
+
+    movement = targets - starts
+    dist = np.linalg.norm(movement, axis=1)
+
+    # not moving drones keep a single (start) point
+    steps = np.where(
+        dist < 1e-6, 1, np.maximum(3, np.ceil(dist / step_size).astype(int) + 1)
+    )
+
+    dx, dy, dz = movement.T
+    xy = np.sqrt(dx * dx + dy * dy)
+
+    has_xy = xy > 1e-6
+    move_yaw_rad = np.where(has_xy, np.arctan2(dy, dx), 0.0)
+    pitch = np.where(has_xy, np.arctan2(dz, xy), 0.0)
+
+    step_dist = dist / np.maximum(steps - 1, 1)
+    step_forward = step_dist * np.cos(pitch)
+    step_vertical = step_dist * np.sin(pitch)
+
+    last = (steps - 1)[:, None]
+    k = np.minimum(np.arange(steps.max())[None, :], last)
+
+    # T0 @ T_rel only shifts the DH translation column by the start point
+    pos = starts[:, None, :] + dh_translation(
+        theta=move_yaw_rad[:, None],
+        d=step_vertical[:, None] * k,
+        a=step_forward[:, None] * k,
+    )
+
+    # Final correction
+    pos = np.where((k == last)[..., None], targets[:, None, :], pos)
+
+    # From step 1 -> face user
+    to_user_x = user[:, None, 0] - pos[..., 0]
+    to_user_y = user[:, None, 1] - pos[..., 1]
+    yaw = np.where(
+        (np.abs(to_user_x) < 1e-6) & (np.abs(to_user_y) < 1e-6),
+        0.0,
+        np.degrees(np.arctan2(to_user_y, to_user_x)),
+    )
+
+    # Step 0 -> payload yaw
+    first = k == 0
+    pos = np.where(first[..., None], starts[:, None, :], pos)
+    yaw = np.where(first, initial_yaws_deg[:, None], yaw)
+
+    return np.concatenate([pos, yaw[..., None]], axis=-1), steps
+
+
 def generate_dh_trajectory_simple(
     start: np.ndarray,
     target: np.ndarray,
@@ -139,103 +253,391 @@ def generate_dh_trajectory_simple(
     step_size: float,
     initial_yaw_deg: float,
 ):
-    movement = target - start
-    dist = np.linalg.norm(movement)
+    positions, steps = generate_dh_trajectories(
+        starts=start,
+        targets=target,
+        user=user,
+        step_size=step_size,
+        initial_yaws_deg=initial_yaw_deg,
+    )
+
+    return [
+        Coordinates3D(x=x, y=y, z=z, yaw=yaw)
+        for x, y, z, yaw in positions[0, : steps[0]].tolist()
+    ]
 
-    # if not moving
-    if dist < 1e-6:
-        return [Coordinates3D(x=start[0], y=start[1], z=start[2], yaw=initial_yaw_deg)]
 
-    steps = max(3, math.ceil(dist / step_size) + 1)
+# ---------- OBSTACLE-AWARE PLANNING ----------
 
-    dx, dy, dz = movement
-    xy = math.sqrt(dx * dx + dy * dy)
 
-    move_yaw_rad = math.atan2(dy, dx) if xy > 1e-6 else 0.0
-    pitch = math.atan2(dz, xy) if xy > 1e-6 else 0.0
+def calculate_routed_bridge_targets(
+    base, user, max_drone_spacing, num_available_drones, grid: VoxelGrid
+):
+    """
+    ``calculate_bridge_targets`` that goes around obstacles.
 
-    step_dist = dist / (steps - 1)
-    step_forward = step_dist * math.cos(pitch)
-    step_vertical = step_dist * math.sin(pitch)
+    While the straight base→user line is free the targets are the same.
+    Otherwise they are spread over the legs of a collision free path, with
+    a target at every corner, so neighbouring relays always see each other.
+    """
+    if not grid.segments_blocked(base, user)[0]:
+        return calculate_bridge_targets(
+            base, user, max_drone_spacing, num_available_drones
+        )
+
+    path = grid.find_path(base, user, settings.obstacles.max_expansions)
+    if path is None:
+        raise ValueError("No collision-free path between base and user")
+
+    legs = path[1:] - path[:-1]
+    intervals = np.maximum(
+        1, np.ceil(np.linalg.norm(legs, axis=1) / max_drone_spacing)
+    ).astype(int)
+
+    num_needed = int(intervals.sum()) - 1
+    if num_available_drones < num_needed:
+        raise ValueError("Недостатня кілкість дронів для побудови мережі")
 
-    T0 = np.eye(4)
-    T0[:3, 3] = start
+    # k-th of the leg intervals, the base (first point) is not a target
+    leg = np.repeat(np.arange(len(legs)), intervals)
+    k = np.arange(len(leg)) - np.repeat(np.cumsum(intervals) - intervals, intervals)
+    points = path[leg] + legs[leg] * (k / intervals[leg])[:, None]
 
-    trajectory = []
+    return list(points[1:])
 
-    for k in range(steps):
 
-        if k == 0:
-            pos = start.copy()
-            yaw = initial_yaw_deg  # Use payload yaw
+def polyline_trajectory(
+    waypoints: np.ndarray,
+    user: np.ndarray,
+    step_size: float,
+    initial_yaw_deg: float,
+) -> np.ndarray:
+    """
+    (steps, 4) DH trajectory through the way points, leg after leg.
+    """
+    positions, steps = generate_dh_trajectories(
+        starts=waypoints[:-1],
+        targets=waypoints[1:],
+        user=user,
+        step_size=step_size,
+        initial_yaws_deg=np.full(len(waypoints) - 1, initial_yaw_deg),
+    )
+
+    # every next leg starts where the previous one ended
+    return np.concatenate(
+        [positions[0, : steps[0]]]
+        + [positions[i, 1 : steps[i]] for i in range(1, len(steps))]
+    )
+
+
+def join_bridge(
+    grid: VoxelGrid,
+    starts: np.ndarray,
+    targets: np.ndarray,
+    bridge: np.ndarray,
+    chunk: int = 8,
+) -> List[np.ndarray | None]:
+    """
+    Way points of drones that fly straight to a point of the bridge they
+    can see, then along the bridge to their target (one of its points).
+
+    ``bridge`` is the collision free base→targets→user polyline. Bridge
+    points are tried from the shortest resulting route on, ``chunk`` per
+    drone at a time with all lines of sight checked at once, so the first
+    visible one is the best. None for drones that see no bridge point.
+    """
+    steps = np.linalg.norm(np.diff(bridge, axis=0), axis=1)
+    arc = np.concatenate([[0.0], np.cumsum(steps)])
+    target_index = np.argmin(
+        np.linalg.norm(targets[:, None, :] - bridge[None, :, :], axis=2), axis=1
+    )
+
+    # flight length through every bridge point, ignoring obstacles
+    length = np.linalg.norm(starts[:, None, :] - bridge[None, :, :], axis=2)
+    length += np.abs(arc[None, :] - arc[target_index, None])
+    order = np.argsort(length, axis=1)
+
+    join = np.full(len(starts), -1)
+    for first in range(0, len(bridge), chunk):
+        waiting = np.flatnonzero(join < 0)
+        if len(waiting) == 0:
+            break
+
+        tried = order[waiting, first : first + chunk]
+        rows = np.repeat(waiting, tried.shape[1])
+        visible = ~grid.segments_blocked(starts[rows], bridge[tried.ravel()])
+        visible = visible.reshape(tried.shape)
+
+        found = visible.any(axis=1)
+        join[waiting[found]] = tried[found, np.argmax(visible[found], axis=1)]
+
+    routes: List[np.ndarray | None] = []
+    for start, entry, end in zip(starts, join, target_index):
+        if entry < 0:
+            routes.append(None)
+        elif entry <= end:
+            routes.append(np.vstack([start, bridge[entry : end + 1]]))
         else:
-            a = step_forward * k
-            d = step_vertical * k
+            routes.append(np.vstack([start, bridge[end : entry + 1][::-1]]))
+
+    return routes
 
-            T_rel = dh_transform(theta=move_yaw_rad, d=d, a=a, alpha=0.0)
-            T_step = T0 @ T_rel
-            pos = T_step[:3, 3]
 
-            # From step 1 → face user
-            yaw = angle_deg(pos, user)
+def route_trajectories(
+    grid: VoxelGrid,
+    bridge: np.ndarray,
+    labels: List[str],
+    positions: np.ndarray,
+    steps: np.ndarray,
+    starts: np.ndarray,
+    targets: np.ndarray,
+    user: np.ndarray,
+    step_size: float,
+    initial_yaws_deg: np.ndarray,
+) -> DroneTrajectories:
+    """
+    Straight trajectories (``generate_dh_trajectories`` output) with the ones
+    that cross an obstacle replaced by trajectories around it.
+
+    Drones join the bridge (``join_bridge``) where they can; only the rest,
+    and those whose route turns out blocked, search a path of their own over
+    the grid.
+    """
+    moving = np.linalg.norm(targets - starts, axis=1) > 1e-6
+    blocked = np.flatnonzero(moving & grid.segments_blocked(starts, targets))
 
-        trajectory.append(
-            Coordinates3D(
-                x=float(pos[0]), y=float(pos[1]), z=float(pos[2]), yaw=float(yaw)
+    if len(blocked) == 0:
+        return DroneTrajectories.from_padded(labels, positions, steps)
+
+    routes = join_bridge(grid, starts[blocked], targets[blocked], bridge)
+
+    arrays = [positions[i, : steps[i]] for i in range(len(labels))]
+    for i, path in zip(blocked, routes):
+        # a route along the bridge must still be free leg by leg
+        if path is None or grid.legs_blocked(path).any():
+            path = grid.find_path(
+                starts[i], targets[i], settings.obstacles.max_expansions
             )
-        )
+        if path is None:
+            raise ValueError(f"No collision-free path for drone {labels[i]}")
 
-    # Final correction
-    trajectory[-1].x = target[0]
-    trajectory[-1].y = target[1]
-    trajectory[-1].z = target[2]
-    trajectory[-1].yaw = angle_deg(target, user)
+        arrays[i] = polyline_trajectory(path, user, step_size, initial_yaws_deg[i])
 
-    return trajectory
+    return DroneTrajectories.from_arrays(labels, arrays)
 
 
 # ---------- MAIN PIPELINE ----------
 
+# keyword arguments of compute_drone_positions applied after planning
+SEPARATION_PARAMS = ("min_separation", "resolve_conflicts")
 
-def compute_drone_positions(
+
+def _plan_assignments(
     user_coordinates,
     base_coordinates,
     drones,
     max_drone_spacing=7.0,
     step_size=5.0,
     use_dh_transform=True,
+    assignment="projection",
+    obstacle_map: ObstacleMap | None = None,
 ):
+    """
+    Targets and drone assignment of one scenario, before trajectory generation.
 
+    Returns ``(user, step_size, assignments, routing)``, ``routing`` is the
+    voxel grid of the obstacle map and the bridge polyline, None without a map.
+    """
     if not drones:
-        return {}
+        return None, step_size, [], None
 
     base = np.array([base_coordinates.x, base_coordinates.y, base_coordinates.z], float)
     user = np.array([user_coordinates.x, user_coordinates.y, 0.0], float)
 
-    bridge_targets = calculate_bridge_targets(
-        base, user, max_drone_spacing, len(drones)
+    with stage("compute.targets"):
+        if obstacle_map is None:
+            grid = None
+            bridge_targets = calculate_bridge_targets(
+                base, user, max_drone_spacing, len(drones)
+            )
+        else:
+            grid = get_voxel_grid(obstacle_map)
+            bridge_targets = calculate_routed_bridge_targets(
+                base, user, max_drone_spacing, len(drones), grid
+            )
+    with stage("compute.assignment"):
+        assignments = assign_drones_to_targets(
+            drones, bridge_targets, base, user, method=assignment
+        )
+
+    if grid is None:
+        return user, step_size, assignments, None
+
+    return (
+        user,
+        step_size,
+        assignments,
+        (grid, np.vstack([base, *bridge_targets, user])),
     )
-    assignments = assign_drones_to_targets(drones, bridge_targets, base, user)
 
-    result = {}
 
-    for drone, target in assignments:
-        start = np.array(
-            [drone.coordinates.x, drone.coordinates.y, drone.coordinates.z], float
-        )
+def compute_drone_positions_batch(
+    scenarios: List[Dict],
+) -> List[DroneTrajectories | Exception]:
+    """
+    ``compute_drone_positions`` over several scenarios (dicts of its keyword
+    arguments) with trajectories of all of them generated in one batch.
 
-        # yaw is inside coordinates, correct
-        initial_yaw_deg = float(drone.coordinates.yaw)
+    Results are in scenario order; a failed scenario yields its exception.
+    """
+    results: List[DroneTrajectories | Exception] = []
+    planned = []
 
-        traj = generate_dh_trajectory_simple(
-            start=start,
-            target=target,
-            user=user,
-            step_size=step_size,
-            initial_yaw_deg=initial_yaw_deg,
+    for scenario in scenarios:
+        try:
+            user, step_size, assignments, routing = _plan_assignments(
+                **{k: v for k, v in scenario.items() if k not in SEPARATION_PARAMS}
+            )
+        except Exception as e:
+            results.append(e)
+            continue
+
+        results.append(DroneTrajectories.empty())
+        if assignments:
+            planned.append((len(results) - 1, user, step_size, assignments, routing))
+
+    if not planned:
+        return results
+
+    flat = [
+        (user, step_size, drone, target)
+        for _, user, step_size, assignments, _ in planned
+        for drone, target in assignments
+    ]
+
+    starts = np.array(
+        [[d.coordinates.x, d.coordinates.y, d.coordinates.z] for *_, d, _ in flat],
+        float,
+    )
+    targets = np.array([target for *_, target in flat], float)
+    # yaw is inside coordinates, correct
+    yaws = np.array([d.coordinates.yaw for *_, d, _ in flat], float)
+
+    with stage("compute.trajectories"):
+        positions, steps = generate_dh_trajectories(
+            starts=starts,
+            targets=targets,
+            user=np.array([user for user, *_ in flat], float),
+            step_size=np.array([step_size for _, step_size, *_ in flat], float),
+            initial_yaws_deg=yaws,
         )
 
-        result[drone.label] = traj
+        offset = 0
+        for i, user, step_size, assignments, routing in planned:
+            end = offset + len(assignments)
+            labels = [drone.label for drone, _ in assignments]
+
+            if routing is None:
+                results[i] = DroneTrajectories.from_padded(
+                    labels=labels,
+                    positions=positions[offset:end],
+                    steps=steps[offset:end],
+                )
+            else:
+                try:
+                    results[i] = route_trajectories(
+                        *routing,
+                        labels,
+                        positions[offset:end],
+                        steps[offset:end],
+                        starts[offset:end],
+                        targets[offset:end],
+                        user,
+                        step_size,
+                        yaws[offset:end],
+                    )
+                except ValueError as e:
+                    results[i] = e
+            offset = end
+
+    with stage("compute.separation"):
+        for i, _, step_size, _, routing in planned:
+            if isinstance(results[i], DroneTrajectories):
+                results[i] = _separate(
+                    results[i],
+                    scenarios[i].get("min_separation"),
+                    scenarios[i].get("resolve_conflicts", "none"),
+                    step_size,
+                    grid=routing[0] if routing else None,
+                )
+
+    return results
+
+
+def _separate(
+    trajectories: DroneTrajectories,
+    min_separation: float | None,
+    method: str,
+    step_size: float,
+    grid: VoxelGrid | None = None,
+) -> DroneTrajectories:
+    """
+    ``separation.resolve_conflicts`` with settings defaults, unless
+    ``method`` is "none".
+    """
+    if method == "none":
+        return trajectories
+
+    return separate(
+        trajectories,
+        min_distance=min_separation or settings.separation.min_distance,
+        method=method,
+        step_size=step_size,
+        layer_spacing=settings.separation.layer_spacing,
+        delay_steps=settings.separation.delay_steps,
+        max_rounds=settings.separation.max_rounds,
+        grid=grid,
+    )
+
+
+def compute_drone_positions(
+    user_coordinates,
+    base_coordinates,
+    drones,
+    max_drone_spacing=7.0,
+    step_size=5.0,
+    use_dh_transform=True,
+    assignment="projection",
+    obstacle_map: ObstacleMap | None = None,
+    min_separation: float | None = None,
+    resolve_conflicts: str = "none",
+) -> DroneTrajectories:
+    """
+    Bridge targets, drone assignment and trajectories of one scenario.
+
+    With ``resolve_conflicts`` "altitude" or "delay" drones that come closer
+    than ``min_separation`` (settings default) are moved apart, see
+    ``separation.resolve_conflicts``.
+    """
+    (result,) = compute_drone_positions_batch(
+        [
+            dict(
+                user_coordinates=user_coordinates,
+                base_coordinates=base_coordinates,
+                drones=drones,
+                max_drone_spacing=max_drone_spacing,
+                step_size=step_size,
+                use_dh_transform=use_dh_transform,
+                assignment=assignment,
+                obstacle_map=obstacle_map,
+                min_separation=min_separation,
+                resolve_conflicts=resolve_conflicts,
+            )
+        ]
+    )
+
+    if isinstance(result, Exception):
+        raise result
 
     return result
 
@@ -246,7 +648,11 @@ def compute_drone_bridge_positions(
     drones: List[Drone],
     max_drone_spacing: float = 7.0,
     step_size: float = 1.0,
-):
+    assignment: str = "projection",
+    obstacle_map: ObstacleMap | None = None,
+    min_separation: float | None = None,
+    resolve_conflicts: str = "none",
+) -> DroneTrajectories:
     return compute_drone_positions(
         user_coordinates=user_coordinates,
         base_coordinates=base_coordinates,
@@ -254,4 +660,199 @@ def compute_drone_bridge_positions(
         max_drone_spacing=max_drone_spacing,
         step_size=step_size,
         use_dh_transform=True,
+        assignment=assignment,
+        obstacle_map=obstacle_map,
+        min_separation=min_separation,
+        resolve_conflicts=resolve_conflicts,
+    )
+
+
+# ---------- INCREMENTAL RE-PLANNING ----------
+
+
+def replan_drone_positions(
+    user_coordinates: Coordinates,
+    base_coordinates: Coordinates3D,
+    drones: List[Drone],
+    assigned: List[str],
+    max_drone_spacing: float = 7.0,
+    step_size: float = 1.0,
+    position_tolerance: float = 1e-2,
+    yaw_tolerance: float = 0.5,
+    obstacle_map: ObstacleMap | None = None,
+) -> Tuple[DroneTrajectories, List[str], bool]:
+    """
+    Re-plan the bridge after the user moved.
+
+    ``drones`` hold the current drone positions, ``assigned`` the labels of
+    drones that form the current bridge.
+
+    While the number of bridge targets stays the same, bridge drones keep
+    their order along the bridge and only fly from where they are to their
+    shifted target, other drones are left alone. Otherwise all drones are
+    assigned from scratch.
+
+    Returns ``(plan, changed, full_replan)``:
+      plan        -- trajectories of all bridge drones, a single point for
+                     drones that stay in place
+      changed     -- labels of drones that move or turn beyond the tolerances
+      full_replan -- whether drones were re-assigned
+    """
+    if not drones:
+        return DroneTrajectories.empty(), [], False
+
+    base = np.array([base_coordinates.x, base_coordinates.y, base_coordinates.z], float)
+    user = np.array([user_coordinates.x, user_coordinates.y, 0.0], float)
+
+    grid = get_voxel_grid(obstacle_map) if obstacle_map is not None else None
+    if grid is None:
+        bridge_targets = calculate_bridge_targets(
+            base, user, max_drone_spacing, len(drones)
+        )
+    else:
+        bridge_targets = calculate_routed_bridge_targets(
+            base, user, max_drone_spacing, len(drones), grid
+        )
+
+    assigned = set(assigned)
+    bridge = [d for d in drones if d.label in assigned]
+
+    full_replan = len(bridge) != len(bridge_targets)
+    if full_replan:
+        assignments = assign_drones_to_targets(drones, bridge_targets, base, user)
+    else:
+        # i-th drone from the base keeps the i-th target
+        bridge.sort(
+            key=lambda d: projection_factor_on_segment(
+                np.array([d.coordinates.x, d.coordinates.y, d.coordinates.z], float),
+                base,
+                user,
+            )
+        )
+        assignments = list(zip(bridge, bridge_targets))
+
+    if not assignments:
+        return DroneTrajectories.empty(), [], full_replan
+
+    starts = np.array(
+        [[d.coordinates.x, d.coordinates.y, d.coordinates.z] for d, _ in assignments],
+        float,
+    )
+    yaws = np.array([d.coordinates.yaw for d, _ in assignments], float)
+    targets = np.array([target for _, target in assignments], float)
+
+    # drones already (almost) at their target stay in place and only turn
+    moving = np.linalg.norm(targets - starts, axis=1) > position_tolerance
+    targets = np.where(moving[:, None], targets, starts)
+
+    positions, steps = generate_dh_trajectories(
+        starts=starts,
+        targets=targets,
+        user=user,
+        step_size=step_size,
+        initial_yaws_deg=yaws,
+    )
+
+    to_user = user[None, :2] - starts[:, :2]
+    facing = np.where(
+        np.all(np.abs(to_user) < 1e-6, axis=1),
+        0.0,
+        np.degrees(np.arctan2(to_user[:, 1], to_user[:, 0])),
     )
+    positions[~moving, 0, 3] = facing[~moving]
+
+    turned = np.abs((facing - yaws + 180.0) % 360.0 - 180.0) > yaw_tolerance
+
+    labels = [drone.label for drone, _ in assignments]
+    if grid is None:
+        plan = DroneTrajectories.from_padded(labels, positions, steps)
+    else:
+        plan = route_trajectories(
+            grid,
+            np.vstack([base, *bridge_targets, user]),
+            labels,
+            positions,
+            steps,
+            starts,
+            targets,
+            user,
+            step_size,
+            yaws,
+        )
+    changed = [label for label, c in zip(labels, moving | turned) if c]
+
+    return plan, changed, full_replan
+
+
+# ---------- MULTI-USER RELAY NETWORKS ----------
+
+
+def compute_relay_network_positions(
+    users: List[Coordinates],
+    base_coordinates: Coordinates3D,
+    drones: List[Drone],
+    max_drone_spacing: float = 7.0,
+    step_size: float = 1.0,
+    min_separation: float | None = None,
+    resolve_conflicts: str = "none",
+) -> Tuple[DroneTrajectories, List[List[str]]]:
+    """
+    One relay network from the base to all ``users``.
+
+    Relays are the targets of a Steiner tree approximation over the base
+    and the users (see ``relays.relay_tree``), shared by all users whose
+    chain passes them. The whole fleet is assigned to them in one minimal
+    total distance solve, every relay faces the nearest user it serves.
+
+    Returns ``(trajectories, chains)``, ``chains`` holds the labels of the
+    relays of every user from the base on, in ``users`` order.
+    """
+    if not users:
+        raise ValueError("At least one user is needed")
+
+    base = np.array([base_coordinates.x, base_coordinates.y, base_coordinates.z], float)
+    user_points = np.array([[u.x, u.y, 0.0] for u in users], float)
+
+    with stage("compute.targets"):
+        network = relay_network(
+            relay_tree(base, user_points, max_drone_spacing), max_drone_spacing
+        )
+
+    if len(network.targets) == 0:
+        return DroneTrajectories.empty(), [[] for _ in users]
+    if len(drones) < len(network.targets):
+        raise ValueError("Недостатня кілкість дронів для побудови мережі")
+
+    positions = np.array(
+        [[d.coordinates.x, d.coordinates.y, d.coordinates.z] for d in drones], float
+    )
+
+    with stage("compute.assignment"):
+        candidates = nearest_candidates(positions, network.targets)
+        target_idx, candidate_idx = linear_sum_assignment(
+            distance_matrix(network.targets, positions[candidates])
+        )
+        # rows come back sorted: the drone of every target, in target order
+        assigned = candidates[candidate_idx]
+
+    labels = [drones[i].label for i in assigned.tolist()]
+
+    with stage("compute.trajectories"):
+        padded, steps = generate_dh_trajectories(
+            starts=positions[assigned],
+            targets=network.targets,
+            user=user_points[network.facing],
+            step_size=step_size,
+            initial_yaws_deg=np.array(
+                [drones[i].coordinates.yaw for i in assigned.tolist()], float
+            ),
+        )
+        trajectories = DroneTrajectories.from_padded(labels, padded, steps)
+
+    with stage("compute.separation"):
+        trajectories = _separate(
+            trajectories, min_separation, resolve_conflicts, step_size
+        )
+
+    chains = [[labels[t] for t in chain.tolist()] for chain in network.chains]
+    return trajectories, chains
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Annotated, Literal
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class Coordinates(BaseModel):
@@ -14,3 +16,55 @@ class Coordinates3D(Coordinates):
 class Drone(BaseModel):
     label: str
     coordinates: Coordinates3D
+
+
+class BoxObstacle(BaseModel):
+    type: Literal["box"] = "box"
+    x_min: float
+    y_min: float
+    x_max: float
+    y_max: float
+    z_min: float = 0.0
+    z_max: float
+
+    @model_validator(mode="after")
+    def check_extent(self) -> "BoxObstacle":
+        if self.x_max <= self.x_min or self.y_max <= self.y_min:
+            raise ValueError("box must have x_max > x_min and y_max > y_min")
+        if self.z_max <= self.z_min:
+            raise ValueError("obstacle must have z_max > z_min")
+        return self
+
+
+class PolygonObstacle(BaseModel):
+    """
+    Vertical prism over a simple polygon footprint.
+    """
+
+    type: Literal["polygon"] = "polygon"
+    points: list[Coordinates] = Field(min_length=3)
+    z_min: float = 0.0
+    z_max: float
+
+    @model_validator(mode="after")
+    def check_extent(self) -> "PolygonObstacle":
+        if self.z_max <= self.z_min:
+            raise ValueError("obstacle must have z_max > z_min")
+        return self
+
+
+Obstacle = Annotated[BoxObstacle | PolygonObstacle, Field(discriminator="type")]
+
+
+class ObstacleMap(BaseModel):
+    """
+    Stored obstacle map, as passed to the planner.
+
+    Maps are immutable once stored, so ``id`` identifies the compiled grid.
+    """
+
+    id: int
+    resolution: float = Field(gt=0)
+    # obstacles are inflated by this distance
+    clearance: float = Field(ge=0)
+    obstacles: list[Obstacle]
@@ -0,0 +1,548 @@
+"""
+Obstacle maps compiled into a voxel occupancy grid, vectorized
+segment-vs-grid collision checks and A* routing over the grid.
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from itertools import product
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from uav_service.logic.models import BoxObstacle, Obstacle, ObstacleMap
+from uav_service.settings import settings
+
+SQRT2 = math.sqrt(2.0)
+SQRT3 = math.sqrt(3.0)
+
+# 26-connected neighbourhood of a cell
+NEIGHBOURS = [d for d in product((-1, 0, 1), repeat=3) if d != (0, 0, 0)]
+
+# free cells around the grid the search may use to go around obstacles
+SEARCH_MARGIN = 2
+
+# weighted A*: paths at most this much longer than the shortest one,
+# for orders of magnitude fewer expanded cells among tall buildings
+HEURISTIC_WEIGHT = 1.5
+
+_grids_lock = threading.Lock()
+_grids: OrderedDict[int, "VoxelGrid"] = OrderedDict()
+
+
+class VoxelGrid:
+    """
+    Occupancy of an obstacle map on a uniform grid.
+
+    Cell ``(i, j, k)`` spans ``origin + [i, i + 1) * resolution`` along
+    x (same for y, z) and is occupied if it overlaps an obstacle inflated
+    by the clearance. The grid starts at the ground (z = 0); space outside
+    of it is free.
+    """
+
+    __slots__ = ("origin", "resolution", "occupied", "_search")
+
+    def __init__(self, origin: np.ndarray, resolution: float, occupied: np.ndarray):
+        self.origin = np.asarray(origin, float)
+        self.resolution = float(resolution)
+        self.occupied = occupied
+        self._search: Tuple[bytes, bytes, np.ndarray, np.ndarray] | None = None
+
+    @classmethod
+    def from_obstacles(
+        cls,
+        obstacles: Sequence[Obstacle],
+        resolution: float,
+        clearance: float = 0.0,
+        max_cells: int | None = None,
+    ) -> "VoxelGrid":
+        if not obstacles:
+            return cls(np.zeros(3), resolution, np.zeros((0, 0, 0), bool))
+
+        origin, shape = grid_frame(obstacles, resolution, clearance, max_cells)
+        grid = cls(origin, resolution, np.zeros(shape, bool))
+        for obstacle in obstacles:
+            grid._add(obstacle, clearance)
+
+        return grid
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.occupied.shape
+
+    def _cell_range(self, lo: np.ndarray, hi: np.ndarray) -> Tuple[slice, ...]:
+        """
+        Cells overlapping the [lo, hi] box, clipped to the grid.
+        """
+        start = np.floor((lo - self.origin) / self.resolution).astype(int)
+        stop = np.ceil((hi - self.origin) / self.resolution).astype(int)
+        start = np.clip(start, 0, self.shape)
+        stop = np.clip(stop, 0, self.shape)
+        return tuple(slice(a, b) for a, b in zip(start, stop))
+
+    def _add(self, obstacle: Obstacle, clearance: float):
+        lo, hi = _extent(obstacle)
+        lo, hi = lo - clearance, hi + clearance
+        ix, iy, iz = self._cell_range(lo, hi)
+
+        if isinstance(obstacle, BoxObstacle):
+            self.occupied[ix, iy, iz] = True
+            return
+
+        # prism: cells whose footprint centre is inside the polygon or close
+        # enough to its outline for the cell to overlap the inflated polygon
+        polygon = np.array([[p.x, p.y] for p in obstacle.points], float)
+        xs = self.origin[0] + (np.arange(ix.start, ix.stop) + 0.5) * self.resolution
+        ys = self.origin[1] + (np.arange(iy.start, iy.stop) + 0.5) * self.resolution
+        centres = np.stack(np.meshgrid(xs, ys, indexing="ij"), axis=-1).reshape(-1, 2)
+
+        footprint = points_in_polygon(centres, polygon) | (
+            distance_to_outline(centres, polygon)
+            <= clearance + self.resolution * SQRT2 / 2
+        )
+        self.occupied[ix, iy, iz] |= footprint.reshape(len(xs), len(ys))[..., None]
+
+    def cells(self, points: np.ndarray) -> np.ndarray:
+        """(n, 3) integer cell indices of points, possibly outside the grid."""
+        return np.floor((points - self.origin) / self.resolution).astype(np.int64)
+
+    def blocked(self, points: np.ndarray) -> np.ndarray:
+        """
+        Whether each of the (n, 3) points lies in an occupied cell.
+        """
+        points = np.asarray(points, float).reshape(-1, 3)
+        idx = self.cells(points)
+        inside = np.all((idx >= 0) & (idx < self.shape), axis=1)
+
+        result = np.zeros(len(points), bool)
+        i = idx[inside]
+        result[inside] = self.occupied[i[:, 0], i[:, 1], i[:, 2]]
+        return result
+
+    def segments_blocked(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Whether each segment ``starts[i] -> ends[i]`` crosses an occupied cell.
+
+        Exact: segments are clipped to the grid box, the cells a segment
+        passes through are the ones on both sides of where it crosses a
+        cell boundary, plus those of its end points. All segments are
+        checked at once.
+        """
+        starts = np.asarray(starts, float).reshape(-1, 3)
+        ends = np.asarray(ends, float).reshape(-1, 3)
+        result = np.zeros(len(starts), bool)
+
+        if len(starts) == 0 or self.occupied.size == 0:
+            return result
+
+        enter, leave = _clip_to_box(
+            starts,
+            ends,
+            self.origin,
+            self.origin + np.array(self.shape) * self.resolution,
+        )
+        hit = np.flatnonzero(enter <= leave)
+        if len(hit) == 0:
+            return result
+
+        # clipped segments in cell units
+        direction = ends[hit] - starts[hit]
+        a = (starts[hit] + direction * enter[hit, None] - self.origin) / self.resolution
+        d = direction * (leave - enter)[hit, None] / self.resolution
+
+        segment = [np.arange(len(hit))] * 2
+        cells = [np.floor(a), np.floor(a + d)]
+        for axis in range(3):
+            lo = np.minimum(a[:, axis], a[:, axis] + d[:, axis])
+            hi = np.maximum(a[:, axis], a[:, axis] + d[:, axis])
+            first = np.floor(lo) + 1
+            count = np.maximum(np.ceil(hi) - first, 0).astype(np.int64)
+
+            # ragged: every boundary plane strictly between the end points
+            crossing = np.repeat(np.arange(len(hit)), count)
+            plane = first[crossing] + (
+                np.arange(len(crossing)) - np.repeat(np.cumsum(count) - count, count)
+            )
+            t = (plane - a[crossing, axis]) / d[crossing, axis]
+            after = np.floor(a[crossing] + d[crossing] * t[:, None])
+            after[:, axis] = plane
+            before = after.copy()
+            before[:, axis] -= 1
+
+            segment += [crossing, crossing]
+            cells += [before, after]
+
+        segment = np.concatenate(segment)
+        cells = np.clip(
+            np.concatenate(cells).astype(np.int64), 0, np.array(self.shape) - 1
+        )
+        hits = self.occupied[cells[:, 0], cells[:, 1], cells[:, 2]]
+
+        result[hit] = np.bincount(segment, weights=hits, minlength=len(hit)) > 0
+        return result
+
+    def find_path(
+        self,
+        start: np.ndarray,
+        goal: np.ndarray,
+        max_expansions: int | None = None,
+    ) -> np.ndarray | None:
+        """
+        Collision free polyline ``start -> goal``: weighted A* over the
+        26-connected grid, then shortened by line of sight between its
+        corners (as Theta* paths are).
+
+        Returns (n, 3) way points from ``start`` to ``goal``, None if the
+        goal is unreachable, the search gives up after ``max_expansions``
+        or a leg of the path is blocked after all.
+        """
+        start = np.asarray(start, float)
+        goal = np.asarray(goal, float)
+
+        blocked, near, box_lo, dims = self._search_grid()
+
+        # points outside the search box continue from its closest cell
+        cell_start, cell_goal = np.clip(
+            self.cells(np.stack([start, goal])), box_lo, box_lo + dims - 3
+        )
+
+        cells = _astar(
+            blocked,
+            near,
+            tuple(dims),
+            tuple(cell_start - box_lo + 1),
+            tuple(cell_goal - box_lo + 1),
+            max_expansions,
+        )
+        if cells is None:
+            return None
+        if len(cells) == 1:
+            return np.stack([start, goal])
+
+        # only the cells where the path turns, then the exact end points
+        cells = np.asarray(cells)
+        turns = np.any(np.diff(cells, n=2, axis=0) != 0, axis=1)
+        cells = cells[np.concatenate([[True], turns, [True]])]
+
+        points = self.origin + (cells - 1 + box_lo + 0.5) * self.resolution
+        points[0], points[-1] = start, goal
+
+        points = self.shortcut(points)
+        if self.legs_blocked(points).any():
+            return None
+        return points
+
+    def legs_blocked(self, points: np.ndarray) -> np.ndarray:
+        """
+        Whether each leg of a polyline crosses an occupied cell. An end of
+        the polyline within the clearance of an obstacle does not count,
+        the drone may still leave or reach it.
+        """
+        blocked = self.segments_blocked(points[:-1], points[1:])
+        if len(blocked):
+            start_inside, goal_inside = self.blocked(points[[0, -1]])
+            if start_inside:
+                blocked[0] = self._leaves_blocked(points[1], points[0])
+            if goal_inside:
+                blocked[-1] = self._leaves_blocked(points[-2], points[-1])
+        return blocked
+
+    def _leaves_blocked(self, outside: np.ndarray, inside: np.ndarray) -> bool:
+        """
+        Whether the leg ``outside -> inside`` crosses an occupied cell before
+        the last time it enters the occupied cells around ``inside``,
+        sampled four times per cell.
+        """
+        count = int(np.ceil(np.linalg.norm(inside - outside) / self.resolution * 4))
+        t = np.linspace(0.0, 1.0, max(count, 1) + 1)
+        blocked = self.blocked(outside + t[:, None] * (inside - outside))
+
+        free = np.flatnonzero(~blocked)
+        return len(free) > 0 and bool(blocked[: free[-1]].any())
+
+    def _search_grid(self) -> Tuple[bytes, bytes, np.ndarray, np.ndarray]:
+        """
+        Occupancy of the search box, flattened to bytes for the A* loop.
+
+        The box is the grid with a free margin around it, nothing below
+        ground, padded with an occupied border so that neighbours of a
+        cell need no bounds checks. Returns the bytes, the same for cells
+        next to an occupied one, the cell index of the first box cell and
+        the padded box dimensions.
+        """
+        if self._search is None:
+            box_lo = np.array([-SEARCH_MARGIN, -SEARCH_MARGIN, 0])
+            dims = np.array(self.shape) + SEARCH_MARGIN - box_lo + 2
+
+            padded = np.ones(tuple(dims), np.uint8)
+            padded[1:-1, 1:-1, 1:-1] = 0
+            inner = tuple(
+                slice(1 - lo, 1 - lo + size) for lo, size in zip(box_lo, self.shape)
+            )
+            padded[inner] = self.occupied
+
+            # occupied cells among the 26 neighbours, the border has none
+            near = np.zeros_like(padded)
+            core = (slice(1, -1),) * 3
+            for di, dj, dk in NEIGHBOURS:
+                near[core] |= padded[
+                    1 + di : dims[0] - 1 + di,
+                    1 + dj : dims[1] - 1 + dj,
+                    1 + dk : dims[2] - 1 + dk,
+                ]
+
+            self._search = (padded.tobytes(), near.tobytes(), box_lo, dims)
+
+        return self._search
+
+    def shortcut(self, points: np.ndarray) -> np.ndarray:
+        """
+        Drop way points that the previous kept one can see past.
+        """
+        kept = [0]
+        i = 0
+        while i < len(points) - 1:
+            later = np.arange(i + 1, len(points))
+            visible = later[
+                ~self.segments_blocked(
+                    np.broadcast_to(points[i], (len(later), 3)), points[later]
+                )
+            ]
+            i = int(visible.max()) if len(visible) else i + 1
+            kept.append(i)
+
+        return points[kept]
+
+
+def grid_frame(
+    obstacles: Sequence[Obstacle],
+    resolution: float,
+    clearance: float = 0.0,
+    max_cells: int | None = None,
+) -> Tuple[np.ndarray, Tuple[int, int, int]]:
+    """
+    Origin and shape of the grid covering the (inflated) obstacles,
+    ``ValueError`` if it has more than ``max_cells`` cells.
+    """
+    extents = np.array([_extent(o) for o in obstacles], float)
+    lo = extents[:, 0].min(axis=0) - clearance
+    hi = extents[:, 1].max(axis=0) + clearance
+
+    origin = np.floor(lo / resolution) * resolution
+    origin[2] = 0.0
+    shape = np.maximum(np.ceil((hi - origin) / resolution).astype(int), 1)
+
+    cells = int(np.prod(shape))
+    if max_cells is not None and cells > max_cells:
+        raise ValueError(
+            f"Obstacle map needs {cells} grid cells, more than {max_cells};"
+            " use a coarser resolution"
+        )
+
+    return origin, tuple(int(n) for n in shape)
+
+
+def _extent(obstacle: Obstacle) -> Tuple[np.ndarray, np.ndarray]:
+    if isinstance(obstacle, BoxObstacle):
+        lo = [obstacle.x_min, obstacle.y_min, obstacle.z_min]
+        hi = [obstacle.x_max, obstacle.y_max, obstacle.z_max]
+    else:
+        xs = [p.x for p in obstacle.points]
+        ys = [p.y for p in obstacle.points]
+        lo = [min(xs), min(ys), obstacle.z_min]
+        hi = [max(xs), max(ys), obstacle.z_max]
+
+    lo[2] = max(lo[2], 0.0)
+    return np.array(lo, float), np.array(hi, float)
+
+
+def _clip_to_box(
+    starts: np.ndarray, ends: np.ndarray, lo: np.ndarray, hi: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Segment parameters where each segment enters and leaves the box,
+    ``enter > leave`` if it misses the box (slab method).
+    """
+    direction = ends - starts
+    parallel = np.abs(direction) < 1e-12
+    safe = np.where(parallel, 1.0, direction)
+
+    t0 = (lo - starts) / safe
+    t1 = (hi - starts) / safe
+    inside = (starts >= lo) & (starts <= hi)
+
+    t_min = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t0, t1))
+    t_max = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t0, t1))
+
+    return np.maximum(t_min.max(axis=1), 0.0), np.minimum(t_max.min(axis=1), 1.0)
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Even-odd test of (n, 2) points against a (m, 2) polygon.
+    """
+    px, py = points[:, 0, None], points[:, 1, None]
+    x0, y0 = polygon[None, :, 0], polygon[None, :, 1]
+    x1, y1 = np.roll(polygon, -1, axis=0).T[:, None, :]
+
+    crosses = (y0 > py) != (y1 > py)
+    dy = np.where(y1 == y0, 1.0, y1 - y0)
+    x_cross = x0 + (py - y0) * (x1 - x0) / dy
+
+    return np.logical_xor.reduce(crosses & (px < x_cross), axis=1)
+
+
+def distance_to_outline(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Distance of (n, 2) points to the nearest edge of a (m, 2) polygon.
+    """
+    a = polygon[None, :, :]
+    ab = np.roll(polygon, -1, axis=0)[None, :, :] - a
+    ap = points[:, None, :] - a
+
+    t = np.clip(
+        np.sum(ap * ab, axis=-1) / np.maximum(np.sum(ab * ab, axis=-1), 1e-12), 0, 1
+    )
+    return np.linalg.norm(ap - ab * t[..., None], axis=-1).min(axis=1)
+
+
+def _corners(move: Tuple[int, int, int]) -> List[Tuple[int, int, int]]:
+    """
+    Cells a diagonal move passes next to: the moves along every proper
+    subset of its axes. Empty for moves along one axis.
+    """
+    return [
+        d
+        for d in product(*[(0, m) if m else (0,) for m in move])
+        if d != (0, 0, 0) and d != move
+    ]
+
+
+def _astar(
+    blocked: bytes,
+    near: bytes,
+    dims: Tuple[int, int, int],
+    start: Tuple[int, int, int],
+    goal: Tuple[int, int, int],
+    max_expansions: int | None,
+) -> List[Tuple[int, int, int]] | None:
+    """
+    Cells of the cheapest 26-connected path over the free cells of a
+    flattened grid whose border is occupied. ``start`` and ``goal`` may
+    be occupied: drones within the clearance of an obstacle may still
+    leave or reach it.
+
+    Diagonal moves need all the cells they pass next to free, so that
+    the path never cuts a corner or an edge of an obstacle; ``near`` marks
+    the cells where that needs checking.
+    """
+    _, ny, nz = dims
+    nyz = ny * nz
+
+    def flat(di: int, dj: int, dk: int) -> int:
+        return (di * ny + dj) * nz + dk
+
+    moves = [
+        (
+            flat(di, dj, dk),
+            math.sqrt(di * di + dj * dj + dk * dk),
+            di,
+            dj,
+            dk,
+            [flat(*corner) for corner in _corners((di, dj, dk))],
+        )
+        for di, dj, dk in NEIGHBOURS
+    ]
+
+    gi, gj, gk = goal
+    source = (start[0] * ny + start[1]) * nz + start[2]
+    target = (gi * ny + gj) * nz + gk
+
+    # octile distance to the goal, exact without obstacles, times the weight
+    w1 = HEURISTIC_WEIGHT
+    w2 = HEURISTIC_WEIGHT * (SQRT2 - 1)
+    w3 = HEURISTIC_WEIGHT * (SQRT3 - SQRT2)
+
+    def heuristic(i: int, j: int, k: int) -> float:
+        a, b, c = abs(i - gi), abs(j - gj), abs(k - gk)
+        low, high = min(a, b, c), max(a, b, c)
+        return w1 * high + w2 * (a + b + c - low - high) + w3 * low
+
+    cost = {source: 0.0}
+    parent = {source: -1}
+    closed = bytearray(len(blocked))
+    # ties go to the deeper node
+    heap = [(heuristic(*start), -0.0, source)]
+    expansions = 0
+
+    while heap:
+        _, g, node = heapq.heappop(heap)
+        if closed[node]:
+            continue
+
+        if node == target:
+            path = []
+            while node != -1:
+                i, rest = divmod(node, nyz)
+                path.append((i, *divmod(rest, nz)))
+                node = parent[node]
+            return path[::-1]
+
+        closed[node] = 1
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            return None
+
+        g = -g
+        i, rest = divmod(node, nyz)
+        j, k = divmod(rest, nz)
+        # only the start can be occupied, it may leave any way it can
+        check_corners = near[node] and not blocked[node]
+        for offset, step, di, dj, dk, corners in moves:
+            neighbour = node + offset
+            if (blocked[neighbour] and neighbour != target) or closed[neighbour]:
+                continue
+            if check_corners and any(blocked[node + c] for c in corners):
+                continue
+
+            new_cost = g + step
+            if new_cost < cost.get(neighbour, math.inf):
+                cost[neighbour] = new_cost
+                parent[neighbour] = node
+                heapq.heappush(
+                    heap,
+                    (
+                        new_cost + heuristic(i + di, j + dj, k + dk),
+                        -new_cost,
+                        neighbour,
+                    ),
+                )
+
+    return None
+
+
+def get_voxel_grid(obstacle_map: ObstacleMap) -> VoxelGrid:
+    """
+    Compiled grid of a stored map, cached per map id in this process.
+    """
+    with _grids_lock:
+        grid = _grids.get(obstacle_map.id)
+        if grid is not None:
+            _grids.move_to_end(obstacle_map.id)
+            return grid
+
+    grid = VoxelGrid.from_obstacles(
+        obstacle_map.obstacles,
+        resolution=obstacle_map.resolution,
+        clearance=obstacle_map.clearance,
+        max_cells=settings.obstacles.max_cells,
+    )
+
+    with _grids_lock:
+        _grids[obstacle_map.id] = grid
+        while len(_grids) > settings.obstacles.grid_cache_size:
+            _grids.popitem(last=False)
+
+    return grid
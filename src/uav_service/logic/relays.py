@@ -0,0 +1,258 @@
+"""
+Relay networks that connect several ground users to one base: a Steiner
+tree approximation over the base and the users, relay targets spread
+over its edges and shared by all users whose chains pass them.
+"""
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+# Weiszfeld iterations of the Fermat point of three vertices
+FERMAT_ITERATIONS = 64
+
+
+@dataclass
+class RelayTree:
+    """
+    Tree over the base (vertex 0), the users (vertices 1..n_users) and
+    the Steiner points added after them.
+    """
+
+    points: np.ndarray  # (n_vertices, 3)
+    edges: np.ndarray  # (n_vertices - 1, 2) vertex indices
+    n_users: int
+
+    def neighbours(self) -> List[List[int]]:
+        adjacent: List[List[int]] = [[] for _ in range(len(self.points))]
+        for a, b in self.edges.tolist():
+            adjacent[a].append(b)
+            adjacent[b].append(a)
+        return adjacent
+
+
+@dataclass
+class RelayNetwork:
+    """
+    Relay targets of a tree and the chain of every user: indices of the
+    targets from the base to the user, in ``users`` order.
+    """
+
+    targets: np.ndarray  # (n_relays, 3)
+    chains: List[np.ndarray]
+    # user every relay faces: the nearest one whose chain passes it
+    facing: np.ndarray
+
+
+def _relays(length: np.ndarray, spacing: float) -> np.ndarray:
+    """Relays needed inside edges of the given length."""
+    return np.maximum(np.ceil(length / spacing - 1e-9).astype(np.int64) - 1, 0)
+
+
+def _spanning_tree(points: np.ndarray) -> np.ndarray:
+    """
+    Euclidean minimum spanning tree (Prim), edges as (parent, child).
+    """
+    n = len(points)
+    attached = np.zeros(n, bool)
+    attached[0] = True
+    nearest = np.linalg.norm(points - points[0], axis=1)
+    parent = np.zeros(n, np.int64)
+
+    edges = []
+    for _ in range(n - 1):
+        candidates = np.where(attached, np.inf, nearest)
+        child = int(np.argmin(candidates))
+        edges.append((int(parent[child]), child))
+        attached[child] = True
+
+        distance = np.linalg.norm(points - points[child], axis=1)
+        closer = ~attached & (distance < nearest)
+        nearest[closer] = distance[closer]
+        parent[closer] = child
+
+    return np.array(edges, np.int64).reshape(-1, 2)
+
+
+def _fermat_points(triangles: np.ndarray) -> np.ndarray:
+    """
+    Points with the minimal total distance to the three vertices of
+    every (n, 3, 3) triangle.
+    """
+    points = triangles.mean(axis=1)
+    for _ in range(FERMAT_ITERATIONS):
+        weights = 1.0 / np.maximum(
+            np.linalg.norm(triangles - points[:, None, :], axis=2), 1e-9
+        )
+        points = np.einsum("ij,ijk->ik", weights, triangles) / weights.sum(
+            axis=1, keepdims=True
+        )
+    return points
+
+
+def relay_tree(
+    base: np.ndarray, users: np.ndarray, max_drone_spacing: float
+) -> RelayTree:
+    """
+    Steiner tree approximation over the base and the users.
+
+    Starts from their minimum spanning tree. Every round, each pair of
+    edges of a vertex ``v`` that meet at less than 120 degrees is a
+    candidate for a Steiner point: the Fermat point ``F`` of ``v`` and the
+    two other ends replaces both edges with three edges to ``F``. All
+    candidates are evaluated at once; the ones that save relays, or
+    length with as many relays, are applied greedily, best first, as long
+    as they touch different vertices.
+
+    A user with more than one edge holds a relay itself, so do all
+    Steiner points; the base never does.
+    """
+    points = np.vstack([base, users]).astype(float)
+    edges = _spanning_tree(points)
+    n_users = len(users)
+
+    while True:
+        tree = RelayTree(points, edges, n_users)
+        adjacent = tree.neighbours()
+        degree = np.array([len(a) for a in adjacent])
+
+        pairs = np.array(
+            [
+                (v, a, b)
+                for v, around in enumerate(adjacent)
+                for i, a in enumerate(around)
+                for b in around[i + 1 :]
+            ],
+            np.int64,
+        ).reshape(-1, 3)
+        if len(pairs) == 0:
+            break
+
+        v, a, b = pairs.T
+        to_a, to_b = points[a] - points[v], points[b] - points[v]
+        along_a = np.linalg.norm(to_a, axis=1)
+        along_b = np.linalg.norm(to_b, axis=1)
+        cos = np.einsum("ij,ij->i", to_a, to_b) / np.maximum(along_a * along_b, 1e-12)
+
+        acute = (cos > -0.5) & (along_a > 1e-9) & (along_b > 1e-9)
+        if not acute.any():
+            break
+        pairs, v, a, b = pairs[acute], v[acute], a[acute], b[acute]
+        along_a, along_b = along_a[acute], along_b[acute]
+
+        fermat = _fermat_points(points[pairs])
+        spokes = np.linalg.norm(points[pairs] - fermat[:, None, :], axis=2)
+
+        # a user loses its relay when it is left with a single edge
+        holds_relay = (v > 0) & ((v > n_users) | (degree[v] > 1))
+        keeps_relay = (v > 0) & ((v > n_users) | (degree[v] > 2))
+
+        relays_before = (
+            _relays(along_a, max_drone_spacing)
+            + _relays(along_b, max_drone_spacing)
+            + holds_relay
+        )
+        relays_after = _relays(spokes, max_drone_spacing).sum(axis=1) + 1 + keeps_relay
+        saved_relays = relays_before - relays_after
+        saved_length = along_a + along_b - spokes.sum(axis=1)
+
+        better = (saved_relays > 0) | ((saved_relays == 0) & (saved_length > 1e-6))
+        if not better.any():
+            break
+
+        order = np.lexsort((-saved_length, -saved_relays))
+        touched = np.zeros(len(points), bool)
+        new_points, removed, added = [], set(), []
+        for k in order[better[order]].tolist():
+            if touched[pairs[k]].any():
+                continue
+            touched[pairs[k]] = True
+
+            steiner = len(points) + len(new_points)
+            new_points.append(fermat[k])
+            removed |= {
+                (min(v[k], a[k]), max(v[k], a[k])),
+                (min(v[k], b[k]), max(v[k], b[k])),
+            }
+            added += [(v[k], steiner), (a[k], steiner), (b[k], steiner)]
+
+        kept = [
+            (p, c) for p, c in edges.tolist() if (min(p, c), max(p, c)) not in removed
+        ]
+        points = np.vstack([points, new_points])
+        edges = np.array(kept + added, np.int64)
+
+    return RelayTree(points, edges, n_users)
+
+
+def relay_network(tree: RelayTree, max_drone_spacing: float) -> RelayNetwork:
+    """
+    Relay targets of the tree, at most ``max_drone_spacing`` apart along
+    its edges, and the chains of all users.
+
+    Every user gets at least one relay, like a single bridge does.
+    """
+    adjacent = tree.neighbours()
+    n_vertices, n_users = len(tree.points), tree.n_users
+
+    # tree rooted at the base: parent of every vertex, breadth first
+    parent = np.full(n_vertices, -1)
+    order = [0]
+    for vertex in order:
+        for other in adjacent[vertex]:
+            if other != 0 and parent[other] < 0:
+                parent[other] = vertex
+                order.append(other)
+
+    children = np.array(order[1:], np.int64)
+    parents = parent[children]
+    length = np.linalg.norm(tree.points[children] - tree.points[parents], axis=1)
+
+    inner = _relays(length, max_drone_spacing)
+    # a user next to the base still gets its relay
+    direct = (parents == 0) & (children <= n_users) & (length >= 0.1)
+    inner[direct] = np.maximum(inner[direct], 1)
+
+    holds_relay = np.array([len(a) > 1 for a in adjacent])
+    holds_relay[0] = False
+    holds_relay[n_users + 1 :] = True
+    own = holds_relay[children].astype(np.int64)
+
+    # targets of an edge: its inner relays from the parent on, then the
+    # relay of the child vertex
+    counts = inner + own
+    first = np.zeros(len(children) + 1, np.int64)
+    np.cumsum(counts, out=first[1:])
+
+    edge = np.repeat(np.arange(len(children)), counts)
+    k = np.arange(first[-1]) - first[edge] + 1
+    t = np.minimum(k / (inner[edge] + 1), 1.0)[:, None]
+    targets = tree.points[parents[edge]] + t * (
+        tree.points[children[edge]] - tree.points[parents[edge]]
+    )
+
+    edge_of = np.full(n_vertices, -1)
+    edge_of[children] = np.arange(len(children))
+
+    chains = []
+    for user in range(1, n_users + 1):
+        path = []
+        vertex = user
+        while vertex != 0:
+            e = edge_of[vertex]
+            path.append(np.arange(first[e], first[e + 1]))
+            vertex = parent[vertex]
+        chains.append(np.concatenate(path[::-1]) if path else np.empty(0, np.int64))
+
+    facing = np.zeros(len(targets), np.int64)
+    nearest = np.full(len(targets), np.inf)
+    for user, chain in enumerate(chains):
+        distance = np.linalg.norm(
+            targets[chain, :2] - tree.points[user + 1, :2], axis=1
+        )
+        closer = distance < nearest[chain]
+        nearest[chain[closer]] = distance[closer]
+        facing[chain[closer]] = user
+
+    return RelayNetwork(targets, chains, facing)
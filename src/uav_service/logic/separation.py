@@ -0,0 +1,292 @@
+"""
+Separation between drones of one plan: conflicts over all trajectories
+at once with a sort and sweep broadphase per time step, and their
+resolution by altitude layers or departure delays.
+
+All drones start together and fly one step per time unit; a drone that
+arrived hovers at its last point.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from uav_service.logic.obstacles import VoxelGrid
+from uav_service.logic.trajectories import DroneTrajectories
+
+
+@dataclass
+class Conflicts:
+    """
+    Pairs of drones that come closer than the minimal separation, one
+    entry per pair at its closest approach.
+    """
+
+    first: np.ndarray  # drone indices, first < second
+    second: np.ndarray
+    step: np.ndarray  # step nearest to the closest approach
+    distance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+    def to_jsonable(self, labels: List[str]) -> List[Dict]:
+        return [
+            {"drones": [labels[a], labels[b]], "step": step, "distance": distance}
+            for a, b, step, distance in zip(
+                self.first.tolist(),
+                self.second.tolist(),
+                self.step.tolist(),
+                self.distance.tolist(),
+            )
+        ]
+
+
+def find_conflicts(trajectories: DroneTrajectories, min_distance: float) -> Conflicts:
+    """
+    Drone pairs closer than ``min_distance`` at any moment, drones moving
+    in a straight line between their steps.
+
+    Broadphase (sort and sweep): flights are sorted by step, then by their
+    midpoint along the axis the drones spread most, and every flight is
+    only paired with the following ones that are close enough along it,
+    found by one binary search for all of them. A drone that arrived is a
+    single hovering point from its last step on, paired with the flights
+    and other hovering points around it the same way. Only pairs that are
+    close enough on all axes get the exact closest approach of two linear
+    motions.
+    """
+    if len(trajectories) < 2:
+        return Conflicts(*(np.empty(0, np.int64),) * 3, np.empty(0))
+
+    points = trajectories.data[:, :3]
+    drone = np.repeat(np.arange(len(trajectories)), trajectories.steps)
+    step = np.arange(len(points)) - trajectories.offsets[drone]
+
+    # hovering points: the last row of every drone, from that step on
+    last = trajectories.offsets[1:] - 1
+    rows = np.setdiff1d(np.arange(len(points)), last, assume_unique=True)
+
+    starts = points[rows]
+    moves = points[rows + 1] - starts
+    middles = starts + moves / 2
+    longest = float(np.sqrt(np.einsum("ij,ij->i", moves, moves).max(initial=0.0)))
+
+    axis = int(np.argmax(np.ptp(points, axis=0)))
+    extent = np.ptp(points[:, axis])
+    origin = points[:, axis].min()
+
+    # flights of the same step: midpoints closer than min_distance + longest
+    reach = min_distance + longest
+    sweep = step[rows] * (extent + 2 * reach) + (middles[:, axis] - origin)
+    a, b = _sweep(sweep, reach)
+    a, b = _near(middles, a, middles, b, reach)
+    flight_pairs = (
+        drone[rows[a]],
+        drone[rows[b]],
+        step[rows[a]],
+        starts[a] - starts[b],
+        moves[a] - moves[b],
+    )
+
+    # flights and hovering points: closer than min_distance + longest / 2
+    hover = points[last]
+    reach = min_distance + longest / 2
+    order = np.argsort(hover[:, axis])
+    lo = np.searchsorted(hover[order, axis], middles[:, axis] - reach, side="left")
+    hi = np.searchsorted(hover[order, axis], middles[:, axis] + reach, side="right")
+
+    a = np.repeat(np.arange(len(rows)), hi - lo)
+    b = order[np.repeat(lo, hi - lo) + _ragged_arange(hi - lo)]
+    arrived = step[last[b]] <= step[rows[a]]
+    a, b = _near(middles, a[arrived], hover, b[arrived], reach)
+    hover_pairs = (drone[rows[a]], b, step[rows[a]], starts[a] - hover[b], moves[a])
+
+    # hovering points of both drones
+    a, b = _sweep(hover[:, axis], min_distance)
+    a, b = _near(hover, a, hover, b, min_distance)
+    resting_pairs = (
+        a,
+        b,
+        np.maximum(step[last[a]], step[last[b]]),
+        hover[a] - hover[b],
+        np.zeros((len(a), 3)),
+    )
+
+    first, second, at, offset, relative = (
+        np.concatenate(parts) for parts in zip(flight_pairs, hover_pairs, resting_pairs)
+    )
+
+    # closest approach of the relative motion within the step
+    t = np.clip(
+        -np.einsum("ij,ij->i", offset, relative)
+        / np.maximum(np.einsum("ij,ij->i", relative, relative), 1e-12),
+        0.0,
+        1.0,
+    )
+    distance = np.linalg.norm(offset + relative * t[:, None], axis=1)
+
+    close = distance < min_distance
+    first, second = np.minimum(first, second)[close], np.maximum(first, second)[close]
+    at = np.rint(at[close] + t[close]).astype(np.int64)
+    distance = distance[close]
+
+    # closest approach of every pair
+    order = np.lexsort((distance, second, first))
+    first, second, at, distance = (v[order] for v in (first, second, at, distance))
+    head = np.ones(len(first), bool)
+    head[1:] = (first[1:] != first[:-1]) | (second[1:] != second[:-1])
+
+    return Conflicts(first[head], second[head], at[head], distance[head])
+
+
+def _sweep(values: np.ndarray, reach: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index pairs of all values at most ``reach`` apart.
+    """
+    order = np.argsort(values)
+    values = values[order]
+    later = np.searchsorted(values, values + reach, side="right")
+    later -= np.arange(len(values)) + 1
+
+    a = np.repeat(np.arange(len(values)), later)
+    return order[a], order[a + 1 + _ragged_arange(later)]
+
+
+def _near(
+    points: np.ndarray,
+    a: np.ndarray,
+    others: np.ndarray,
+    b: np.ndarray,
+    reach: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pairs of ``points[a]`` and ``others[b]`` at most ``reach`` apart on all axes.
+    """
+    near = np.all(np.abs(points[a] - others[b]) <= reach, axis=1)
+    return a[near], b[near]
+
+
+def _ragged_arange(counts: np.ndarray) -> np.ndarray:
+    """
+    Concatenated ``arange(n)`` for every n of ``counts``.
+    """
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def resolve_conflicts(
+    trajectories: DroneTrajectories,
+    min_distance: float,
+    method: str,
+    step_size: float,
+    layer_spacing: float,
+    delay_steps: int,
+    max_rounds: int,
+    grid: VoxelGrid | None = None,
+) -> DroneTrajectories:
+    """
+    Trajectories with conflicts resolved round by round.
+
+    ``method="altitude"``: in every round one drone of each conflicting
+    pair, preferably the higher one still on its way at the closest
+    approach, climbs one more layer. Layers are ``layer_spacing`` above the
+    planned path, climbed at the start and left at the end one
+    ``step_size`` a step. A drone whose raised path would cross an
+    obstacle of ``grid`` is delayed instead.
+
+    ``method="delay"``: one drone of each pair departs ``delay_steps``
+    later, the one that would already hover at its target if there is
+    one, so that the other passes before it arrives.
+
+    Rounds go on until no conflict is left, no drone can be changed or
+    ``max_rounds``; the round with the fewest conflicts wins. Conflicts of
+    drones that start or end too close to each other can not be resolved.
+    """
+    labels = trajectories.labels
+    planned = [trajectories[label] for label in labels]
+    moving = np.array([len(p) > 1 for p in planned])
+
+    layer = np.zeros(len(labels), np.int64)
+    delay = np.zeros(len(labels), np.int64)
+
+    current = best = trajectories
+    conflicts = fewest = find_conflicts(current, min_distance)
+
+    for _ in range(max_rounds):
+        if len(conflicts) == 0:
+            break
+
+        pair = np.stack([conflicts.first, conflicts.second])
+        arrived = current.steps[pair] - 1 <= conflicts.step
+        # drones still at their start or both at their targets stay in conflict
+        resolvable = (conflicts.step > 0) & ~arrived.all(axis=0)
+
+        if method == "altitude":
+            # a drone on its way, the higher one, climbs away from the other
+            row = current.offsets[pair] + np.minimum(
+                conflicts.step, current.steps[pair] - 1
+            )
+            height = current.data[row, 2]
+            score = 2 * ~arrived + (height >= height[::-1])
+        else:
+            score = arrived.astype(int)
+
+        # ties go to the second drone
+        choice = (score[1] >= score[0]).astype(int)
+        changed = pair[choice, np.arange(len(choice))][resolvable]
+
+        changed = np.unique(changed[moving[changed]])
+        if len(changed) == 0:
+            break
+
+        if method == "altitude":
+            layer[changed] += 1
+        else:
+            delay[changed] += delay_steps
+
+        arrays = [current[label] for label in labels]
+        for i in changed:
+            arrays[i] = _separated(
+                planned[i], layer[i] * layer_spacing, delay[i], step_size
+            )
+            if grid is not None and layer[i] and _blocked(grid, arrays[i]):
+                layer[i] = 0
+                delay[i] += delay_steps
+                arrays[i] = _separated(planned[i], 0.0, delay[i], step_size)
+
+        current = DroneTrajectories.from_arrays(labels, arrays)
+        conflicts = find_conflicts(current, min_distance)
+        if len(conflicts) < len(fewest):
+            best, fewest = current, conflicts
+
+    return best
+
+
+def _separated(
+    path: np.ndarray, height: float, delay: int, step_size: float
+) -> np.ndarray:
+    """
+    (steps, 4) path flown ``height`` higher after waiting ``delay`` steps.
+    """
+    parts = [np.repeat(path[:1], delay, axis=0)]
+
+    if height > 0:
+        climb = max(1, int(np.ceil(height / step_size)))
+        lift = np.zeros(4)
+        lift[2] = height
+
+        up = np.arange(climb) / climb
+        parts += [
+            path[:1] + up[:, None] * lift,
+            path + lift,
+            path[-1:] + up[::-1, None] * lift,
+        ]
+    else:
+        parts.append(path)
+
+    return np.concatenate(parts)
+
+
+def _blocked(grid: VoxelGrid, path: np.ndarray) -> bool:
+    return bool(grid.segments_blocked(path[:-1, :3], path[1:, :3]).any())
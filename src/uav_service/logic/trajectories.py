@@ -0,0 +1,119 @@
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from uav_service.logic.models import Coordinates3D
+
+COLUMNS = ("x", "y", "z", "yaw")
+
+
+class DroneTrajectories:
+    """
+    Columnar storage of all drone trajectories of one computation.
+
+    Steps of every drone live in a single contiguous float64 array
+    ``data`` of shape (total_steps, 4) with x, y, z, yaw columns.
+    Steps of the i-th drone are ``data[offsets[i]:offsets[i + 1]]``.
+
+    Pydantic ``Coordinates3D`` objects are only built on demand.
+    """
+
+    __slots__ = ("labels", "data", "offsets", "_index")
+
+    def __init__(self, labels: Sequence[str], data: np.ndarray, offsets: np.ndarray):
+        self.labels = list(labels)
+        self.data = np.ascontiguousarray(data, dtype=np.float64).reshape(-1, 4)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._index = {label: i for i, label in enumerate(self.labels)}
+
+        if len(self.offsets) != len(self.labels) + 1:
+            raise ValueError("offsets must have one more item than labels")
+
+    @classmethod
+    def empty(cls) -> "DroneTrajectories":
+        return cls([], np.empty((0, 4)), np.zeros(1, dtype=np.int64))
+
+    @classmethod
+    def from_padded(
+        cls,
+        labels: Sequence[str],
+        positions: np.ndarray,
+        steps: np.ndarray,
+    ) -> "DroneTrajectories":
+        """
+        Build from padded (n_drones, n_steps, 4) array and real step counts.
+        """
+        steps = np.asarray(steps, dtype=np.int64)
+        mask = np.arange(positions.shape[1])[None, :] < steps[:, None]
+
+        offsets = np.zeros(len(steps) + 1, dtype=np.int64)
+        np.cumsum(steps, out=offsets[1:])
+
+        return cls(labels, positions[mask], offsets)
+
+    @classmethod
+    def from_arrays(
+        cls, labels: Sequence[str], arrays: Sequence[np.ndarray]
+    ) -> "DroneTrajectories":
+        """
+        Build from one (steps, 4) array per drone.
+        """
+        if not labels:
+            return cls.empty()
+
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+
+        return cls(labels, np.concatenate(arrays), offsets)
+
+    @property
+    def steps(self) -> np.ndarray:
+        """Number of steps per drone, in ``labels`` order."""
+        return np.diff(self.offsets)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.labels)
+
+    def __contains__(self, label: object) -> bool:
+        return label in self._index
+
+    def __getitem__(self, label: str) -> np.ndarray:
+        """(steps, 4) view of one drone trajectory."""
+        i = self._index[label]
+        return self.data[self.offsets[i] : self.offsets[i + 1]]
+
+    def keys(self) -> List[str]:
+        return list(self.labels)
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray]]:
+        for label in self.labels:
+            yield label, self[label]
+
+    def subset(self, labels: Sequence[str]) -> "DroneTrajectories":
+        """Trajectories of the given drones only, in the given order."""
+        return self.from_arrays(labels, [self[label] for label in labels])
+
+    def coordinates(self, label: str) -> List[Coordinates3D]:
+        return [
+            Coordinates3D(x=x, y=y, z=z, yaw=yaw)
+            for x, y, z, yaw in self[label].tolist()
+        ]
+
+    def to_coordinates(self) -> Dict[str, List[Coordinates3D]]:
+        return {label: self.coordinates(label) for label in self.labels}
+
+    def jsonable(self, label: str) -> List[Dict[str, float]]:
+        """
+        Plain ``[{"x", "y", "z", "yaw"}, ...]`` list of one drone.
+        """
+        return [dict(zip(COLUMNS, row)) for row in self[label].tolist()]
+
+    def to_jsonable(self) -> Dict[str, List[Dict[str, float]]]:
+        """
+        Plain ``{label: [{"x", "y", "z", "yaw"}, ...]}`` structure,
+        the same shape ``UavComputeResponse.drone_positions`` is serialized to.
+        """
+        return {label: self.jsonable(label) for label in self.labels}
@@ -31,3 +31,28 @@ def dh_transform(theta: float, d: float, a: float, alpha: float) -> np.ndarray:
     )
 
     return T
+
+
+def dh_translation(
+    theta: np.ndarray, d: np.ndarray, a: np.ndarray, alpha: np.ndarray | float = 0.0
+) -> np.ndarray:
+    """
+    Translation column of a batch of Denavit-Hartenberg transforms.
+
+    Equivalent to ``dh_transform(theta, d, a, alpha)[:3, 3]`` evaluated
+    element-wise over broadcast arrays, without building the 4x4 matrices.
+
+    Args:
+        theta: Rotation about Z axis (radians)
+        d: Translation along Z axis
+        a: Translation along X axis
+        alpha: Rotation about X axis (radians), does not affect translation
+
+    Returns:
+        array of shape (*broadcast_shape, 3)
+    """
+    theta, d, a = np.broadcast_arrays(
+        np.asarray(theta, float), np.asarray(d, float), np.asarray(a, float)
+    )
+
+    return np.stack([a * np.cos(theta), a * np.sin(theta), d], axis=-1)
@@ -0,0 +1,167 @@
+"""
+Waypoint form of trajectories: only the steps needed to rebuild all the
+others by linear interpolation within a position and a yaw tolerance.
+
+Straight DH flights are linear in the step index, so apart from the yaw
+turning towards the user most of their steps are redundant.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from uav_service.logic.trajectories import DroneTrajectories
+
+
+@dataclass
+class Waypoints:
+    """
+    Kept steps of every drone: their points in ``trajectories`` and the
+    step index of every row of ``trajectories.data`` in ``steps``.
+
+    The first and the last step of every drone are always kept.
+    """
+
+    trajectories: DroneTrajectories
+    steps: np.ndarray
+
+    @property
+    def labels(self) -> List[str]:
+        return self.trajectories.labels
+
+    def __len__(self) -> int:
+        return len(self.trajectories)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.trajectories)
+
+    def items(self) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+        """(label, (waypoints, 4) points, step indices) of every drone."""
+        offsets = self.trajectories.offsets
+        for i, label in enumerate(self.labels):
+            rows = slice(offsets[i], offsets[i + 1])
+            yield label, self.trajectories.data[rows], self.steps[rows]
+
+    def subset(self, labels: Sequence[str]) -> "Waypoints":
+        """Waypoints of the given drones only, in the given order."""
+        kept = {label: (points, steps) for label, points, steps in self.items()}
+        return Waypoints(
+            DroneTrajectories.from_arrays(labels, [kept[label][0] for label in labels]),
+            np.concatenate([kept[label][1] for label in labels] + [[]]).astype(
+                np.int64
+            ),
+        )
+
+    def jsonable_steps(self) -> Dict[str, List[int]]:
+        """
+        Plain ``{label: [step, ...]}`` structure, one step index per point
+        of ``trajectories.to_jsonable()``.
+        """
+        return {label: steps.tolist() for label, _, steps in self.items()}
+
+
+def _wrap(yaw: np.ndarray) -> np.ndarray:
+    """Angles in degrees to [-180, 180)."""
+    return (yaw + 180.0) % 360.0 - 180.0
+
+
+def simplify(
+    trajectories: DroneTrajectories,
+    position_tolerance: float,
+    yaw_tolerance: float,
+) -> Waypoints:
+    """
+    Waypoints of all drones at once with Ramer-Douglas-Peucker.
+
+    The deviation of a step is measured from the point interpolated at
+    the same step between the waypoints around it, not from the segment
+    line, so interpolation rebuilds every step within ``position_tolerance``
+    meters and ``yaw_tolerance`` degrees, at the right time.
+
+    Every round splits all segments of all drones that still have a step
+    out of tolerance at their worst step.
+    """
+    data, offsets = trajectories.data, trajectories.offsets
+    rows = np.arange(len(data))
+    drone = np.repeat(np.arange(len(trajectories)), trajectories.steps)
+
+    keep = np.zeros(len(data), bool)
+    keep[offsets[:-1][trajectories.steps > 0]] = True
+    keep[offsets[1:][trajectories.steps > 0] - 1] = True
+
+    # inner steps of the segments still out of tolerance
+    inner = rows[~keep]
+    while len(inner):
+        # waypoints around every inner step, always of the same drone
+        kept = rows[keep]
+        after = np.searchsorted(kept, inner)
+        left, right = kept[after - 1], kept[after]
+
+        t = (inner - left) / (right - left)
+        position = data[left, :3] + t[:, None] * (data[right, :3] - data[left, :3])
+        yaw = data[left, 3] + t * _wrap(data[right, 3] - data[left, 3])
+
+        error = np.maximum(
+            np.linalg.norm(data[inner, :3] - position, axis=1) / position_tolerance,
+            np.abs(_wrap(data[inner, 3] - yaw)) / yaw_tolerance,
+        )
+
+        # worst step of every segment, inner steps of a segment are adjacent
+        first = np.ones(len(inner), bool)
+        first[1:] = left[1:] != left[:-1]
+        segment = np.cumsum(first) - 1
+        worst = np.maximum.reduceat(error, np.flatnonzero(first))
+
+        split = np.flatnonzero((error > 1.0) & (error == worst[segment]))
+        _, at = np.unique(segment[split], return_index=True)
+        keep[inner[split[at]]] = True
+
+        inner = inner[(worst[segment] > 1.0) & ~keep[inner]]
+
+    counts = np.bincount(drone[keep], minlength=len(trajectories))
+    waypoint_offsets = np.zeros(len(trajectories) + 1, dtype=np.int64)
+    np.cumsum(counts, out=waypoint_offsets[1:])
+
+    return Waypoints(
+        DroneTrajectories(trajectories.labels, data[keep], waypoint_offsets),
+        (rows - offsets[drone])[keep],
+    )
+
+
+def interpolate(waypoints: Waypoints) -> DroneTrajectories:
+    """
+    Dense trajectories, one point per step, rebuilt from waypoints.
+
+    Positions are linear between waypoints, yaw turns the short way round.
+    """
+    trajectories, steps = waypoints.trajectories, waypoints.steps
+    counts = trajectories.steps
+    if not counts.all():
+        raise ValueError("Every drone needs at least one waypoint")
+
+    drone = np.repeat(np.arange(len(trajectories)), counts)
+    dense_offsets = np.zeros(len(trajectories) + 1, dtype=np.int64)
+    np.cumsum(steps[trajectories.offsets[1:] - 1] + 1, out=dense_offsets[1:])
+
+    # global position of every waypoint among the dense steps
+    at = dense_offsets[drone] + steps
+    if len(at) == dense_offsets[-1]:
+        return trajectories
+
+    dense = np.arange(dense_offsets[-1])
+    i = np.searchsorted(at, dense, side="right") - 1
+    j = np.minimum(i + 1, len(at) - 1)
+
+    # zero at every waypoint, including the last one of a drone
+    t = (dense - at[i]) / np.maximum(at[j] - at[i], 1)
+    data = trajectories.data
+    points = np.empty((len(dense), 4))
+    points[:, :3] = data[i, :3] + t[:, None] * (data[j, :3] - data[i, :3])
+    points[:, 3] = np.where(
+        t > 0,
+        _wrap(data[i, 3] + t * _wrap(data[j, 3] - data[i, 3])),
+        data[i, 3],
+    )
+
+    return DroneTrajectories(trajectories.labels, points, dense_offsets)
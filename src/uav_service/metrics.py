@@ -0,0 +1,345 @@
+"""
+Stage timers, histograms and counters in Prometheus text format and
+``Server-Timing``.
+
+Every process keeps its metrics in memory and writes them to
+``<directory>/<pid>.json`` (at most every ``flush_interval_seconds``,
+compute pool workers after every task). The exposition merges the files
+of all processes, so compute workers and uvicorn workers sharing
+``METRICS_MULTIPROC_DIR`` are reported together.
+"""
+
+import bisect
+import contextvars
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from uav_service.settings import settings
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+_lock = threading.Lock()
+_metrics: Dict[str, "Histogram | Counter"] = {}
+
+_directory: str | None = None
+_own_directory = False
+_last_flush = 0.0
+
+# (stage, seconds) of the current request, for the Server-Timing header
+_request_timings: contextvars.ContextVar[List[Tuple[str, float]] | None] = (
+    contextvars.ContextVar("request_timings", default=None)
+)
+
+
+def _flush_if_due():
+    if time.monotonic() - _last_flush >= settings.metrics.flush_interval_seconds:
+        flush()
+
+
+class Histogram:
+    """
+    Histogram with one series per label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket, count above the last bucket, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+        _metrics[name] = self
+
+    def observe(self, value: float, *labelvalues: str):
+        with _lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+        _flush_if_due()
+
+    def _snapshot(self) -> List:
+        return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def _render(self, labels: Tuple[str, ...], values: List[float]) -> List[str]:
+        lines = []
+        cumulative = 0
+        for le, count in zip((*self.buckets, "+Inf"), values[:-1]):
+            cumulative += count
+            lines.append(
+                f"{self.name}_bucket{_labels(self.labelnames, labels, le=le)}"
+                f" {cumulative}"
+            )
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {values[-1]}")
+        lines.append(
+            f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+        )
+        return lines
+
+
+class Counter:
+    """
+    Counter with one series per label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # label values -> [value]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+        _metrics[name] = self
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with _lock:
+            series = self._series.setdefault(labelvalues, [0])
+            series[0] += amount
+
+        _flush_if_due()
+
+    def _snapshot(self) -> List:
+        return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def _render(self, labels: Tuple[str, ...], values: List[float]) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, labels)} {values[0]}"]
+
+
+stage_duration = Histogram(
+    "uav_stage_duration_seconds",
+    "Duration of request processing stages.",
+    ("stage",),
+)
+
+request_duration = Histogram(
+    "uav_http_request_duration_seconds",
+    "Duration of HTTP requests.",
+    ("method", "route", "status"),
+)
+
+hashing_queue_wait = Histogram(
+    "uav_hashing_queue_wait_seconds",
+    "Time password hashing tasks wait for a free worker.",
+    (),
+)
+
+hashing_tasks = Counter(
+    "uav_hashing_tasks_total",
+    "Password hashing tasks by outcome (completed, rejected).",
+    ("outcome",),
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block, or a function when used as a decorator.
+    """
+    if not settings.metrics.enabled:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, name)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def directory() -> str:
+    global _directory, _own_directory
+
+    with _lock:
+        if _directory is None:
+            if settings.metrics.multiproc_dir:
+                _directory = settings.metrics.multiproc_dir
+                os.makedirs(_directory, exist_ok=True)
+            else:
+                _directory = tempfile.mkdtemp(prefix="uav-metrics-")
+                _own_directory = True
+        return _directory
+
+
+def set_directory(path: str):
+    """
+    Use the directory of the parent process (compute pool initializer).
+    """
+    global _directory
+    _directory = path
+
+
+def flush():
+    """
+    Write metrics of this process to the directory.
+    """
+    global _last_flush
+
+    if not settings.metrics.enabled:
+        return
+
+    path = directory()
+    with _lock:
+        snapshot = {name: m._snapshot() for name, m in _metrics.items()}
+        _last_flush = time.monotonic()
+
+    tmp = os.path.join(path, f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp, os.path.join(path, f"{os.getpid()}.json"))
+
+
+def close():
+    """
+    Remove the temporary directory created for this process.
+    """
+    global _directory, _own_directory
+
+    if _own_directory and _directory:
+        shutil.rmtree(_directory, ignore_errors=True)
+
+    _directory = None
+    _own_directory = False
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """
+    Metrics of all processes in Prometheus text exposition format.
+    """
+    flush()
+
+    merged: Dict[str, Dict[Tuple[str, ...], List[float]]] = {
+        name: {} for name in _metrics
+    }
+    for path in glob.glob(os.path.join(directory(), "*.json")):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for name, series in snapshot.items():
+            if name not in merged:
+                continue
+            for labels, values in series:
+                total = merged[name].setdefault(tuple(labels), [0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+
+    lines = []
+    for name, metric in _metrics.items():
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+
+        for labels, values in sorted(merged[name].items()):
+            lines.extend(metric._render(labels, values))
+
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    totals: Dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items()
+    )
+
+
+class MetricsMiddleware:
+    """
+    Records request duration and adds the ``Server-Timing`` header with
+    the stages timed while handling the request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timings.append(("total", time.perf_counter() - started))
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", server_timing(timings)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+
+            route = scope.get("route")
+            request_duration.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status),
+            )
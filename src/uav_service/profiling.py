@@ -0,0 +1,89 @@
+"""
+On-demand cProfile captures of single requests, kept in a bounded
+on-disk ring of pstats files (``settings.profiling``).
+"""
+
+import cProfile
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+from uav_service.settings import settings
+
+T = TypeVar("T")
+
+PROFILE_SUFFIX = ".prof"
+PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+# only one profiler may be active in the process at a time
+_lock = threading.Lock()
+
+
+def directory() -> Path:
+    path = Path(settings.profiling.directory)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def capture(func: Callable[..., T], *args: Any, **kwargs: Any) -> Tuple[T, str]:
+    """
+    Run ``func`` under cProfile in the calling thread.
+
+    Returns the result and the id of the saved profile; the profile is
+    saved even if ``func`` raises.
+    """
+    with _lock:
+        profile = cProfile.Profile()
+        try:
+            result = profile.runcall(func, *args, **kwargs)
+        finally:
+            profile_id = _save(profile)
+
+    return result, profile_id
+
+
+def _save(profile: cProfile.Profile) -> str:
+    profile_id = f"{time.time_ns() // 1_000_000}-{uuid.uuid4().hex[:8]}"
+    profile.dump_stats(directory() / f"{profile_id}{PROFILE_SUFFIX}")
+
+    # ring: drop the oldest profiles above the limit
+    paths = sorted(directory().glob(f"*{PROFILE_SUFFIX}"), key=_created_ms)
+    for path in paths[: max(0, len(paths) - settings.profiling.max_profiles)]:
+        path.unlink(missing_ok=True)
+
+    return profile_id
+
+
+def _created_ms(path: Path) -> int:
+    return int(path.stem.split("-")[0])
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """
+    Saved profiles, newest first.
+    """
+    profiles = []
+    for path in directory().glob(f"*{PROFILE_SUFFIX}"):
+        if not PROFILE_ID.match(path.stem):
+            continue
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            continue
+        profiles.append(
+            {"id": path.stem, "created_ms": _created_ms(path), "size": size}
+        )
+
+    return sorted(profiles, key=lambda p: p["created_ms"], reverse=True)
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not PROFILE_ID.match(profile_id):
+        return None
+
+    path = directory() / f"{profile_id}{PROFILE_SUFFIX}"
+    return path if os.path.isfile(path) else None
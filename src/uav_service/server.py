@@ -0,0 +1,82 @@
+"""
+Production server: gunicorn master with uvicorn workers (``settings.server``).
+
+The master imports NumPy and builds the app before forking, so the workers
+share those pages copy-on-write and start serving without the import cost.
+Everything opened at import time must therefore be fork-safe; DB engines,
+executors and caches connect or start lazily in each worker.
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Any, Dict
+
+from fastapi import FastAPI
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from uav_service.asgi import build_app
+from uav_service.settings import settings
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": settings.server.loop,
+        "http": settings.server.http,
+        "lifespan": "on",
+        "timeout_graceful_shutdown": settings.server.timeout_graceful_shutdown,
+        "limit_concurrency": settings.server.limit_concurrency,
+        "access_log": settings.server.access_log,
+    }
+
+
+class Application(BaseApplication):
+    def __init__(self, app: FastAPI, options: Dict[str, Any]):
+        self.application = app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> FastAPI:
+        return self.application
+
+
+def run() -> None:
+    server = settings.server
+
+    # every worker starts its own compute pool, split the cores between them
+    if "compute_workers" not in settings.executor.model_fields_set:
+        settings.executor.compute_workers = max(
+            1, (os.cpu_count() or 1) // server.workers
+        )
+
+    # /metrics of any worker reports all of them
+    own_metrics_dir = None
+    if settings.metrics.enabled and not settings.metrics.multiproc_dir:
+        own_metrics_dir = tempfile.mkdtemp(prefix="uav-metrics-")
+        settings.metrics.multiproc_dir = own_metrics_dir
+
+    def on_exit(arbiter):
+        if own_metrics_dir:
+            shutil.rmtree(own_metrics_dir, ignore_errors=True)
+
+    options = {
+        "bind": f"{server.host}:{server.port}",
+        "workers": server.workers,
+        "worker_class": Worker,
+        "preload_app": True,
+        "backlog": server.backlog,
+        "keepalive": server.timeout_keep_alive,
+        # the master kills workers still running after this
+        "graceful_timeout": server.timeout_graceful_shutdown + 5,
+        "max_requests": server.max_requests,
+        "max_requests_jitter": server.max_requests_jitter,
+        "accesslog": "-" if server.access_log else None,
+        "on_exit": on_exit,
+    }
+    # built in the master, with NumPy and the compute modules it imports
+    Application(build_app(), options).run()
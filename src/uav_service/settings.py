@@ -1,3 +1,6 @@
+import os
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings as _BaseSettings
 
@@ -18,8 +21,149 @@ class MiscSettings(BaseSettings):
     secret_key: str
 
 
+class DatabaseSettings(BaseSettings, env_prefix="DB_"):
+    url: str = "sqlite+pysqlite:///./uav.sqlite"
+    echo: bool = False
+
+    # connection pool, pool_size defaults to the DB executor size
+    pool_size: int | None = None
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
+    # SQLite tuning
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024  # negative - KiB
+    sqlite_busy_timeout: int = 5000  # ms
+
+    # "rows" - one trajectories row per step, "blob" - one packed row per drone
+    trajectory_storage: Literal["rows", "blob"] = "rows"
+    trajectory_blob_dtype: Literal["<f4", "<f8"] = "<f8"
+    trajectory_blob_compression: Literal["zlib", "none"] = "zlib"
+    # store only the waypoints within settings.waypoints tolerances,
+    # trajectories are interpolated back to every step on load
+    trajectory_waypoints: bool = False
+
+
+class ExecutorSettings(BaseSettings, env_prefix="EXECUTOR_"):
+    # process pool for CPU-bound compute, 0 - run compute in the thread pool
+    compute_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    # thread pool for blocking DB work
+    db_workers: int = 8
+
+
+class CacheSettings(BaseSettings, env_prefix="CACHE_"):
+    enabled: bool = True
+    # in-process LRU tier, bounded by trajectory array bytes
+    max_bytes: int = 64 * 1024 * 1024
+    ttl_seconds: float = 300.0
+    # optional SQLite file shared by all workers
+    disk_path: str | None = None
+    disk_max_entries: int = 1024
+
+
+class AuthSettings(BaseSettings, env_prefix="AUTH_"):
+    # verified access tokens, each cached until its own `exp`
+    token_cache_size: int = 10_000
+    # users loaded by get_current_user
+    user_cache_size: int = 10_000
+    user_cache_ttl_seconds: float = 30.0
+
+    # dedicated password hashing threads and how many requests may wait
+    # for them before login/register answer 429
+    hashing_workers: int = 2
+    hashing_queue_size: int = 16
+
+    # argon2 cost (passlib defaults)
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536  # KiB
+    argon2_parallelism: int = 4
+
+
+class MetricsSettings(BaseSettings, env_prefix="METRICS_"):
+    enabled: bool = True
+    # directory shared by all worker processes, a temporary one per process
+    # if not set (then /metrics of every uvicorn worker only shows its own)
+    multiproc_dir: str | None = None
+    # how often a process writes its histograms to the directory
+    flush_interval_seconds: float = 1.0
+
+
+class ProfilingSettings(BaseSettings, env_prefix="PROFILING_"):
+    # users allowed to profile requests and read the profiles, as JSON list
+    admin_emails: list[str] = []
+    directory: str = "./profiles"
+    # the oldest profiles are removed above this count
+    max_profiles: int = 50
+
+
+class ObstacleSettings(BaseSettings, env_prefix="OBSTACLES_"):
+    # defaults of new obstacle maps, meters
+    resolution: float = 2.0
+    clearance: float = 1.0
+    # voxel grids above this size are rejected
+    max_cells: int = 4_000_000
+    # compiled grids kept per process
+    grid_cache_size: int = 16
+    # A* gives up after this many expanded cells
+    max_expansions: int = 20_000
+
+
+class SeparationSettings(BaseSettings, env_prefix="SEPARATION_"):
+    # drones closer than this at the same time are in conflict, meters
+    min_distance: float = 2.0
+    # altitude layering: height between layers, meters
+    layer_spacing: float = 3.0
+    # departure delays: steps added per round
+    delay_steps: int = 3
+    # resolution gives up after this many rounds
+    max_rounds: int = 8
+
+
+class WaypointSettings(BaseSettings, env_prefix="WAYPOINTS_"):
+    # interpolated steps stay this close to the planned ones, meters / degrees
+    position_tolerance: float = 0.05
+    yaw_tolerance: float = 0.5
+
+
+class ServerSettings(BaseSettings, env_prefix="SERVER_"):
+    # "dev" - one uvicorn process with reload, "prod" - gunicorn with
+    # preloaded uvicorn workers
+    mode: Literal["dev", "prod"] = "dev"
+    host: str = "0.0.0.0"
+    port: int = 8000
+
+    # prod only
+    workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    loop: Literal["auto", "asyncio", "uvloop"] = "uvloop"
+    http: Literal["auto", "h11", "httptools"] = "httptools"
+    backlog: int = 2048
+    timeout_keep_alive: int = 5
+    # open requests may finish within this time on shutdown / restart
+    timeout_graceful_shutdown: int = 30
+    # 503 above this many connections and tasks per worker
+    limit_concurrency: int | None = None
+    # restart a worker after this many requests (+ random jitter), 0 - never
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    access_log: bool = True
+
+
 class Settings(BaseSettings):
     misc: MiscSettings = Field(default_factory=MiscSettings)
+    db: DatabaseSettings = Field(default_factory=DatabaseSettings)
+    executor: ExecutorSettings = Field(default_factory=ExecutorSettings)
+    cache: CacheSettings = Field(default_factory=CacheSettings)
+    auth: AuthSettings = Field(default_factory=AuthSettings)
+    metrics: MetricsSettings = Field(default_factory=MetricsSettings)
+    profiling: ProfilingSettings = Field(default_factory=ProfilingSettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
+    obstacles: ObstacleSettings = Field(default_factory=ObstacleSettings)
+    separation: SeparationSettings = Field(default_factory=SeparationSettings)
+    waypoints: WaypointSettings = Field(default_factory=WaypointSettings)
 
 
 settings = Settings()
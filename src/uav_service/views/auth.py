@@ -1,28 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from uav_service.auth.constants import ALGORITHM
 from uav_service.auth.jwt import create_access_token, create_refresh_token
-from uav_service.auth.security import verify_password
+from uav_service.auth.security import hash_password, verify_password
 from uav_service.db import User
-from uav_service.db.dependencies import get_db
-from uav_service.db.logic import create_user
+from uav_service.db.dependencies import get_async_db
+from uav_service.db.logic import create_user_async
+from uav_service.executors import HashingQueueFull, run_hashing
 from uav_service.settings import settings
 from uav_service.views.models import LoginRequest, RefreshRequest, TokenPair
 
 router = APIRouter(prefix="/auth")
 
 
+async def _hashing(func, *args):
+    try:
+        return await run_hashing(func, *args)
+    except HashingQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests",
+            headers={"Retry-After": "1"},
+        )
+
+
 @router.post("/login", response_model=TokenPair)
-def login(
+async def login(
     payload: LoginRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = db.query(User).filter(User.email == payload.email).first()
+    user = await db.scalar(select(User).where(User.email == payload.email))
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    if not user or not await _hashing(
+        verify_password, payload.password, user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -56,14 +71,15 @@ def refresh_token(payload: RefreshRequest):
 
 
 @router.post("/register", response_model=TokenPair)
-def register(
+async def register(
     payload: LoginRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = create_user(
+    hashed_password = await _hashing(hash_password, payload.password)
+    user = await create_user_async(
         db,
         email=payload.email,
-        password=payload.password,
+        hashed_password=hashed_password,
     )
     if not user:
         raise HTTPException(status_code=400, detail="User already exists")
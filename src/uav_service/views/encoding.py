@@ -0,0 +1,148 @@
+"""
+Response encodings negotiated with the Accept header: JSON rendered by
+orjson, msgpack (optional dependency) and packed trajectory arrays.
+
+Packed trajectories (``PACKED_MEDIA_TYPE``), all little-endian, every
+section starting at a multiple of 8 bytes so that it can be viewed with a
+typed array without copying:
+
+    header   magic "UAVT", version u8, float size u8 (4 or 8),
+             flags u16 (1 - step indices present),
+             n_drones u32, n_points u32, meta length u32
+    meta     UTF-8 JSON object: the response fields without positions,
+             plus "labels" in drone order
+    offsets  u32 x (n_drones + 1), points of the i-th drone are
+             offsets[i]..offsets[i + 1]
+    steps    u32 x n_points, step of every point (waypoints only)
+    points   float x n_points x 4: x, y, z, yaw
+"""
+
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+from uav_service.logic.trajectories import DroneTrajectories
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+PACKED_MEDIA_TYPE = "application/x-uav-trajectories"
+
+# other names clients send for the same encodings
+ALIASES = {"application/x-msgpack": MSGPACK_MEDIA_TYPE}
+
+PACKED_MAGIC = b"UAVT"
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct("<4sBBHIII")
+PACKED_DTYPES = {"float32": "<f4", "float64": "<f8"}
+PACKED_WITH_STEPS = 1
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON rendered by orjson, NumPy arrays and scalars included.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def supported_media_types() -> Tuple[str, ...]:
+    if msgpack is None:
+        return JSON_MEDIA_TYPE, PACKED_MEDIA_TYPE
+    return JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, PACKED_MEDIA_TYPE
+
+
+def negotiate(accept: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Supported media type the Accept header prefers and its parameters,
+    JSON if it names none of them.
+    """
+    supported = supported_media_types()
+    offers = []
+
+    for position, part in enumerate(accept.split(",")):
+        media_type, *parameters = [p.strip() for p in part.split(";")]
+        params = dict(
+            (name.strip().lower(), value.strip())
+            for name, _, value in (p.partition("=") for p in parameters)
+        )
+        try:
+            quality = float(params.pop("q", 1.0))
+        except ValueError:
+            quality = 0.0
+
+        if quality > 0:
+            media_type = media_type.lower()
+            offers.append(
+                (-quality, position, ALIASES.get(media_type, media_type), params)
+            )
+
+    for _, _, media_type, params in sorted(offers):
+        if media_type in supported:
+            return media_type, params
+        if media_type in ("*/*", "application/*"):
+            break
+
+    return JSON_MEDIA_TYPE, {}
+
+
+def pack_trajectories(
+    meta: Dict[str, Any],
+    trajectories: DroneTrajectories,
+    steps: np.ndarray | None = None,
+    dtype: str = "<f4",
+) -> bytes:
+    """
+    Packed trajectories (see module docstring), ``meta`` goes to the JSON
+    section together with the labels.
+    """
+    meta = orjson.dumps({**meta, "labels": trajectories.labels})
+    flags = PACKED_WITH_STEPS if steps is not None else 0
+
+    sections = [
+        PACKED_HEADER.pack(
+            PACKED_MAGIC,
+            PACKED_VERSION,
+            np.dtype(dtype).itemsize,
+            flags,
+            len(trajectories),
+            len(trajectories.data),
+            len(meta),
+        ),
+        meta,
+        trajectories.offsets.astype("<u4").tobytes(),
+    ]
+    if steps is not None:
+        sections.append(np.asarray(steps).astype("<u4").tobytes())
+    sections.append(trajectories.data.astype(dtype).tobytes())
+
+    packed = bytearray()
+    for section in sections:
+        packed += section
+        packed += bytes(-len(packed) % 8)
+
+    return bytes(packed)
+
+
+def packed_dtype(params: Dict[str, str]) -> str:
+    """
+    Float type asked for with ``;dtype=float32|float64``, float32 by default.
+    """
+    return PACKED_DTYPES.get(params.get("dtype", "float32"), PACKED_DTYPES["float32"])
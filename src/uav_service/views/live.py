@@ -0,0 +1,274 @@
+"""
+Live tracking over a WebSocket.
+
+The client connects to ``/uav/live?simulation_id=...&token=...`` and sends
+user positions, either as JSON text ``{"x": .., "y": ..}`` or as 16 bytes
+of two little-endian float64. The bridge of the simulation is re-planned
+for every position (see ``replan_drone_positions``) and only the drones
+that move or turn are pushed back. Positions that arrive while a re-plan
+is running replace each other, so a slow client gets the latest state
+instead of a backlog.
+
+After connecting the server sends ``{"type": "ready", "labels": [...]}``,
+then one message per planned position. With ``encoding=binary`` (default)
+it is a packed little-endian message:
+
+    header   -- version u8 (2), flags u8 (1 = full re-plan), reserved u16,
+                n_drones u32, seq u32
+    indices  -- u32[n_drones], drone index in ``labels``
+    steps    -- u32[n_drones], number of points, 0 for a released drone
+    points   -- f32[sum(steps), 4] with x, y, z, yaw columns
+
+Every section starts at a 4-byte boundary, so it can be read with typed
+arrays directly. With ``encoding=json`` the same delta is sent as
+``{"type": "delta", "seq", "full_replan", "drone_positions", "released"}``.
+"""
+
+import asyncio
+import struct
+from dataclasses import dataclass
+from typing import List, Literal
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from starlette import status
+
+from uav_service.auth.dependencies import authenticate
+from uav_service.db.logic import (current_drones, get_simulation,
+                                  load_obstacle_map, load_trajectories)
+from uav_service.db.session import SessionLocal
+from uav_service.executors import run_compute, run_db
+from uav_service.logic.compute import replan_drone_positions
+from uav_service.logic.models import (Coordinates, Coordinates3D, Drone,
+                                      ObstacleMap)
+from uav_service.logic.trajectories import COLUMNS, DroneTrajectories
+
+router = APIRouter(prefix="/uav")
+
+DELTA_VERSION = 2
+DELTA_HEADER = struct.Struct("<BBxxII")
+FLAG_FULL_REPLAN = 1
+
+USER_POSITION = struct.Struct("<dd")
+
+
+@dataclass
+class LiveState:
+    """
+    Bridge of one live session, kept in memory between updates.
+    """
+
+    base: Coordinates3D
+    step_size: float
+    drones: List[Drone]
+    assigned: List[str]
+    obstacle_map: ObstacleMap | None = None
+
+    @property
+    def labels(self) -> List[str]:
+        return [d.label for d in self.drones]
+
+    def apply(self, plan: DroneTrajectories):
+        """
+        Move drones of the plan to its end points.
+        """
+        self.drones = [
+            (
+                Drone(
+                    label=d.label,
+                    coordinates=Coordinates3D(
+                        **dict(zip(COLUMNS, plan[d.label][-1].tolist()))
+                    ),
+                )
+                if d.label in plan
+                else d
+            )
+            for d in self.drones
+        ]
+        self.assigned = list(plan.labels)
+
+
+class LatestPosition:
+    """
+    Single-slot mailbox: a newer position replaces the one not yet taken.
+    """
+
+    def __init__(self):
+        self._position: Coordinates | None = None
+        self._ready = asyncio.Event()
+
+    def put(self, position: Coordinates):
+        self._position = position
+        self._ready.set()
+
+    async def take(self) -> Coordinates:
+        await self._ready.wait()
+        self._ready.clear()
+        position, self._position = self._position, None
+        return position
+
+
+def pack_delta(
+    seq: int,
+    full_replan: bool,
+    labels: List[str],
+    delta: DroneTrajectories,
+    released: List[str],
+) -> bytes:
+    index = {label: i for i, label in enumerate(labels)}
+
+    indices = np.array(
+        [index[label] for label in delta.labels + released], dtype="<u4"
+    )
+    steps = np.concatenate([delta.steps, np.zeros(len(released), dtype=np.int64)])
+
+    return b"".join(
+        (
+            DELTA_HEADER.pack(
+                DELTA_VERSION,
+                FLAG_FULL_REPLAN if full_replan else 0,
+                len(indices),
+                seq,
+            ),
+            indices.tobytes(),
+            steps.astype("<u4").tobytes(),
+            delta.data.astype("<f4").tobytes(),
+        )
+    )
+
+
+def _load_state(token: str, simulation_id: int) -> LiveState | None:
+    with SessionLocal() as db:
+        user = authenticate(token, db)
+
+        simulation = get_simulation(db, simulation_id=simulation_id, user_id=user.id)
+        if simulation is None:
+            return None
+
+        trajectories = load_trajectories(db, simulation_id=simulation.id)
+        config = simulation.configuration
+
+        return LiveState(
+            base=Coordinates3D(x=config.base_x, y=config.base_y, z=config.base_z),
+            step_size=config.step_size,
+            drones=current_drones(simulation, trajectories),
+            assigned=list(trajectories.labels),
+            obstacle_map=(
+                load_obstacle_map(
+                    db, obstacle_map_id=config.obstacle_map_id, user_id=user.id
+                )
+                if config.obstacle_map_id is not None
+                else None
+            ),
+        )
+
+
+async def _receive_positions(websocket: WebSocket, latest: LatestPosition):
+    while True:
+        message = await websocket.receive()
+
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(
+                message.get("code", status.WS_1000_NORMAL_CLOSURE)
+            )
+
+        if message.get("bytes") is not None:
+            x, y = USER_POSITION.unpack(message["bytes"])
+            latest.put(Coordinates(x=x, y=y))
+        else:
+            latest.put(Coordinates.model_validate_json(message["text"]))
+
+
+async def _push_deltas(
+    websocket: WebSocket,
+    state: LiveState,
+    latest: LatestPosition,
+    encoding: str,
+):
+    seq = 0
+
+    while True:
+        user = await latest.take()
+        seq += 1
+
+        try:
+            plan, changed, full_replan = await run_compute(
+                replan_drone_positions,
+                user_coordinates=user,
+                base_coordinates=state.base,
+                drones=state.drones,
+                assigned=state.assigned,
+                step_size=state.step_size,
+                obstacle_map=state.obstacle_map,
+            )
+        except Exception as e:
+            await websocket.send_json({"type": "error", "seq": seq, "detail": str(e)})
+            continue
+
+        released = [label for label in state.assigned if label not in plan]
+        delta = plan.subset(changed)
+        state.apply(plan)
+
+        if encoding == "json":
+            await websocket.send_json(
+                {
+                    "type": "delta",
+                    "seq": seq,
+                    "full_replan": full_replan,
+                    "drone_positions": delta.to_jsonable(),
+                    "released": released,
+                }
+            )
+        else:
+            await websocket.send_bytes(
+                pack_delta(seq, full_replan, state.labels, delta, released)
+            )
+
+
+@router.websocket("/live")
+async def live_tracking(
+    websocket: WebSocket,
+    simulation_id: int,
+    token: str,
+    encoding: Literal["binary", "json"] = "binary",
+):
+    # browsers can not set headers on a WebSocket, so the token is a query param
+    try:
+        state = await run_db(_load_state, token, simulation_id)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        return
+
+    if state is None:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason="Simulation not found"
+        )
+        return
+
+    await websocket.accept()
+    await websocket.send_json(
+        {"type": "ready", "simulation_id": simulation_id, "labels": state.labels}
+    )
+
+    latest = LatestPosition()
+    tasks = {
+        asyncio.create_task(_receive_positions(websocket, latest)),
+        asyncio.create_task(_push_deltas(websocket, state, latest, encoding)),
+    }
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    error = next(iter(done)).exception()
+    if isinstance(error, WebSocketDisconnect):
+        return
+    if isinstance(error, (ValueError, struct.error)):
+        await websocket.close(
+            code=status.WS_1003_UNSUPPORTED_DATA, reason="Invalid user position"
+        )
+        return
+    if error is not None:
+        raise error
@@ -1,6 +1,10 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal
 
-from uav_service.logic.models import Coordinates, Coordinates3D, Drone
+from pydantic import BaseModel, Field
+
+from uav_service.logic.models import (Coordinates, Coordinates3D, Drone,
+                                      Obstacle)
 
 
 class LoginRequest(BaseModel):
@@ -22,7 +26,28 @@ class UavComputeRequest(BaseModel):
     user: Coordinates
     base: Coordinates3D | None = None
     initial_drone_positions: list[Drone] | None = None
-    step_size: float = 3.0
+    step_size: float = Field(default=3.0, gt=0)
+    # "projection" - nearest to the bridge line, ordered along it
+    # "hungarian" - minimal total travel distance
+    assignment: Literal["projection", "hungarian"] = "projection"
+    # stored obstacle map the bridge and trajectories go around
+    obstacle_map_id: int | None = None
+    # drones closer than this are in conflict, settings.separation if not set
+    min_separation: float | None = Field(default=None, gt=0)
+    # "altitude" - conflicting drones fly higher layers
+    # "delay" - conflicting drones depart later
+    resolve_conflicts: Literal["none", "altitude", "delay"] = "none"
+    # "dense" - a point per step
+    # "waypoints" - only the points needed to interpolate all steps within
+    # settings.waypoints tolerances, their steps in waypoint_steps
+    output: Literal["dense", "waypoints"] = "dense"
+
+
+class SeparationConflict(BaseModel):
+    drones: tuple[str, str]
+    # step of the closest approach and the distance there
+    step: int
+    distance: float
 
 
 class UavComputeResponse(BaseModel):
@@ -30,3 +55,115 @@ class UavComputeResponse(BaseModel):
     user_coordinates: Coordinates
     drone_positions: dict[str, list[Coordinates3D]]
     simulation_id: int
+    # drone pairs that still come closer than the minimal separation
+    conflicts: list[SeparationConflict]
+    # step of every drone_positions point, with output="waypoints" only
+    waypoint_steps: dict[str, list[int]] | None = None
+
+
+class UavReplanRequest(BaseModel):
+    simulation_id: int
+    user: Coordinates
+    # drones closer than this to their new target stay in place
+    position_tolerance: float = 0.01
+    # drones that stay in place are reported only if they turn more than this
+    yaw_tolerance: float = 0.5
+    output: Literal["dense", "waypoints"] = "dense"
+
+
+class UavReplanResponse(BaseModel):
+    simulation_id: int
+    previous_simulation_id: int
+    user_coordinates: Coordinates
+    # drones were re-assigned, because the number of bridge targets changed
+    full_replan: bool
+    # only the drones that move or turn
+    drone_positions: dict[str, list[Coordinates3D]]
+    # drones that left the bridge and keep their last position
+    released: list[str]
+    # between drones of the bridge, with the default minimal separation
+    conflicts: list[SeparationConflict]
+    waypoint_steps: dict[str, list[int]] | None = None
+
+
+class UavRelayRequest(BaseModel):
+    # ground users served at once, relays are shared between them
+    users: list[Coordinates] = Field(min_length=1)
+    base: Coordinates3D | None = None
+    initial_drone_positions: list[Drone] = Field(min_length=1)
+    step_size: float = Field(default=3.0, gt=0)
+    min_separation: float | None = Field(default=None, gt=0)
+    resolve_conflicts: Literal["none", "altitude", "delay"] = "none"
+    output: Literal["dense", "waypoints"] = "dense"
+
+
+class UavRelayResponse(BaseModel):
+    base_coordinates: Coordinates3D
+    users: list[Coordinates]
+    # only the drones that relay, the rest of the fleet stays in place
+    drone_positions: dict[str, list[Coordinates3D]]
+    # relay labels of every user from the base on, in users order;
+    # relays near the base are in several chains
+    chains: list[list[str]]
+    simulation_id: int
+    conflicts: list[SeparationConflict]
+    waypoint_steps: dict[str, list[int]] | None = None
+
+
+class UavComputeBatchItem(BaseModel):
+    result: UavComputeResponse | None = None
+    error: str | None = None
+
+
+class UavComputeBatchResponse(BaseModel):
+    items: list[UavComputeBatchItem]
+
+
+class SimulationSummary(BaseModel):
+    id: int
+    started_at: datetime
+    finished_at: datetime | None
+    success: bool | None
+    base_coordinates: Coordinates3D
+    user_coordinates: Coordinates
+    step_size: float
+    # all users of a relay network, None for a single bridge
+    users: list[Coordinates] | None = None
+
+
+class SimulationPage(BaseModel):
+    items: list[SimulationSummary]
+    # pass as `cursor` to get the next page, None on the last page
+    next_cursor: str | None = None
+
+
+class ObstacleMapCreate(BaseModel):
+    name: str = Field(max_length=255)
+    # voxel size and obstacle inflation in meters, settings.obstacles if not set
+    resolution: float | None = Field(default=None, gt=0)
+    clearance: float | None = Field(default=None, ge=0)
+    obstacles: list[Obstacle]
+
+
+class ObstacleMapSummary(BaseModel):
+    id: int
+    name: str
+    created_at: datetime
+    resolution: float
+    clearance: float
+
+
+class ObstacleMapDetails(ObstacleMapSummary):
+    obstacles: list[Obstacle]
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    created_at: datetime
+    size: int
+
+
+class SimulationDetails(SimulationSummary):
+    initial_drone_positions: list[Drone]
+    drone_positions: dict[str, list[Coordinates3D]]
+    waypoint_steps: dict[str, list[int]] | None = None
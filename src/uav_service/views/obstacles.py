@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from uav_service.auth.dependencies import get_current_user
+from uav_service.db import User
+from uav_service.db.dependencies import get_async_db
+from uav_service.db.logic import (create_obstacle_map_async, get_obstacle_map,
+                                  list_obstacle_maps, load_obstacle_map)
+from uav_service.logic.models import ObstacleMap
+from uav_service.logic.obstacles import grid_frame
+from uav_service.settings import settings
+from uav_service.views.models import (ObstacleMapCreate, ObstacleMapDetails,
+                                      ObstacleMapSummary)
+
+router = APIRouter(prefix="/uav/obstacle-maps")
+
+
+async def resolve_obstacle_map(
+    db: AsyncSession, obstacle_map_id: int | None, user_id: int
+) -> ObstacleMap | None:
+    """
+    Obstacle map referenced by a request, 404 ``HTTPException`` if the user
+    has no such map.
+    """
+    if obstacle_map_id is None:
+        return None
+
+    obstacle_map = await db.run_sync(
+        load_obstacle_map, obstacle_map_id=obstacle_map_id, user_id=user_id
+    )
+    if obstacle_map is None:
+        raise HTTPException(status_code=404, detail="Obstacle map not found")
+
+    return obstacle_map
+
+
+@router.post("", status_code=201, response_model=ObstacleMapSummary)
+async def create_obstacle_map(
+    *,
+    request_data: ObstacleMapCreate,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> ObstacleMapSummary:
+    """
+    Store an obstacle map. Maps can not be changed, store a new one instead.
+    """
+    resolution = request_data.resolution or settings.obstacles.resolution
+    clearance = (
+        request_data.clearance
+        if request_data.clearance is not None
+        else settings.obstacles.clearance
+    )
+
+    if request_data.obstacles:
+        try:
+            grid_frame(
+                request_data.obstacles,
+                resolution,
+                clearance,
+                max_cells=settings.obstacles.max_cells,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    obstacle_map = await create_obstacle_map_async(
+        db,
+        user_id=user.id,
+        name=request_data.name,
+        resolution=resolution,
+        clearance=clearance,
+        obstacles=jsonable_encoder(request_data.obstacles),
+    )
+
+    return ObstacleMapSummary.model_validate(obstacle_map, from_attributes=True)
+
+
+@router.get("", response_model=list[ObstacleMapSummary])
+async def obstacle_maps(
+    *,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> list[ObstacleMapSummary]:
+    return [
+        ObstacleMapSummary.model_validate(m, from_attributes=True)
+        for m in await db.run_sync(list_obstacle_maps, user_id=user.id)
+    ]
+
+
+@router.get("/{obstacle_map_id}", response_model=ObstacleMapDetails)
+async def obstacle_map_details(
+    *,
+    obstacle_map_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> ObstacleMapDetails:
+    obstacle_map = await db.run_sync(
+        get_obstacle_map, obstacle_map_id=obstacle_map_id, user_id=user.id
+    )
+    if obstacle_map is None:
+        raise HTTPException(status_code=404, detail="Obstacle map not found")
+
+    return ObstacleMapDetails.model_validate(obstacle_map, from_attributes=True)
@@ -1,24 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+from datetime import datetime
+from typing import Iterator, Literal
 
-from uav_service.auth.dependencies import get_current_user
-from uav_service.db import User
-from uav_service.db.dependencies import get_db
-from uav_service.db.logic import persist_full_simulation
-from uav_service.logic.compute import compute_drone_bridge_positions
-from uav_service.logic.models import Coordinates3D, Drone
-from uav_service.views.models import UavComputeRequest, UavComputeResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from uav_service import profiling
+from uav_service.auth.dependencies import get_admin_user, get_current_user
+from uav_service.db import Simulation, User
+from uav_service.db.dependencies import get_async_db
+from uav_service.db.logic import (current_drones, get_simulation,
+                                  list_simulations, load_trajectories,
+                                  persist_full_simulation,
+                                  persist_full_simulation_async,
+                                  persist_simulations_async)
+from uav_service.db.session import SessionLocal
+from uav_service.executors import run_compute, run_db
+from uav_service.logic.cache import compute_cache, compute_cache_key
+from uav_service.logic.compute import (compute_drone_bridge_positions,
+                                       compute_drone_positions_batch,
+                                       compute_relay_network_positions,
+                                       replan_drone_positions)
+from uav_service.logic.models import (Coordinates, Coordinates3D, Drone,
+                                      ObstacleMap)
+from uav_service.logic.separation import find_conflicts
+from uav_service.logic.trajectories import DroneTrajectories
+from uav_service.logic.waypoints import Waypoints, simplify
+from uav_service.metrics import stage
+from uav_service.settings import settings
+from uav_service.views.encoding import (MSGPACK_MEDIA_TYPE, PACKED_MEDIA_TYPE,
+                                        MsgpackResponse, ORJSONResponse,
+                                        negotiate, pack_trajectories,
+                                        packed_dtype)
+from uav_service.views.models import (ProfileInfo, SimulationDetails,
+                                      SimulationPage, SimulationSummary,
+                                      UavComputeBatchResponse,
+                                      UavComputeRequest, UavComputeResponse,
+                                      UavRelayRequest, UavRelayResponse,
+                                      UavReplanRequest, UavReplanResponse)
+from uav_service.views.obstacles import resolve_obstacle_map
 
 router = APIRouter(prefix="/uav")
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# admin-only: run the compute handler under cProfile
+PROFILE_HEADER = "X-Profile"
 
-@router.post("/compute/", status_code=200)
-async def start(
-    *,
-    request_data: UavComputeRequest,
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> UavComputeResponse:
+
+def _compute_params(
+    request_data: UavComputeRequest, obstacle_map: ObstacleMap | None = None
+) -> dict:
     base_coordinates = request_data.base or Coordinates3D(x=0, y=0, z=0)
     drones = request_data.initial_drone_positions or [
         Drone(label="UAV_1", coordinates=Coordinates3D(x=10, y=5, z=10)),
@@ -28,31 +62,646 @@ async def start(
         Drone(label="UAV_5", coordinates=Coordinates3D(x=50, y=25, z=18)),
     ]
 
+    return dict(
+        user_coordinates=request_data.user,
+        base_coordinates=base_coordinates,
+        drones=drones,
+        step_size=request_data.step_size,
+        assignment=request_data.assignment,
+        obstacle_map=obstacle_map,
+        min_separation=(
+            request_data.min_separation or settings.separation.min_distance
+        ),
+        resolve_conflicts=request_data.resolve_conflicts,
+    )
+
+
+def _conflicts(drone_positions: DroneTrajectories, min_distance: float) -> list:
+    with stage("separation"):
+        return find_conflicts(drone_positions, min_distance).to_jsonable(
+            drone_positions.labels
+        )
+
+
+def _waypoints(drone_positions: DroneTrajectories) -> Waypoints:
+    with stage("waypoints"):
+        return simplify(
+            drone_positions,
+            settings.waypoints.position_tolerance,
+            settings.waypoints.yaw_tolerance,
+        )
+
+
+def _positions_content(drone_positions: DroneTrajectories, output: str) -> dict:
+    """
+    ``drone_positions`` of a response, only the waypoints and their
+    ``waypoint_steps`` with ``output="waypoints"``.
+    """
+    if output == "dense":
+        return {"drone_positions": drone_positions.to_jsonable()}
+
+    waypoints = _waypoints(drone_positions)
+    return {
+        "drone_positions": waypoints.trajectories.to_jsonable(),
+        "waypoint_steps": waypoints.jsonable_steps(),
+    }
+
+
+def _simulation_record(
+    user_id: int,
+    compute_params: dict,
+    drone_positions: DroneTrajectories,
+) -> dict:
+    # relay networks keep all their users, the first one is the user
+    users = compute_params.get("users")
+    user = users[0] if users else compute_params["user_coordinates"]
+    return dict(
+        user_id=user_id,
+        base=compute_params["base_coordinates"].model_dump(),
+        user={**user.model_dump(), "z": 0},
+        users=[{**u.model_dump(), "z": 0} for u in users] if users else None,
+        algorithm_params={
+            "max_distance": 10,
+            "step_size": compute_params["step_size"],
+            "obstacle_map_id": (
+                compute_params["obstacle_map"].id
+                if compute_params.get("obstacle_map")
+                else None
+            ),
+        },
+        drones=[d.model_dump() for d in compute_params["drones"]],
+        trajectories=drone_positions,
+    )
+
+
+def _response_header(
+    compute_params: dict,
+    drone_positions: DroneTrajectories,
+    simulation_id: int,
+) -> dict:
+    """
+    Fields of a compute response without the drone positions.
+    """
+    return {
+        "base_coordinates": compute_params["base_coordinates"].model_dump(),
+        "user_coordinates": compute_params["user_coordinates"].model_dump(),
+        "simulation_id": simulation_id,
+        "conflicts": _conflicts(drone_positions, compute_params["min_separation"]),
+    }
+
+
+def _response_content(
+    compute_params: dict,
+    drone_positions: DroneTrajectories,
+    simulation_id: int,
+    output: str = "dense",
+) -> dict:
+    # drone positions are serialized straight from the columnar arrays,
+    # without validating every point into Coordinates3D
+    return {
+        **_response_header(compute_params, drone_positions, simulation_id),
+        **_positions_content(drone_positions, output),
+    }
+
+
+def _encoded_response(
+    request: Request,
+    header: dict,
+    drone_positions: DroneTrajectories,
+    output: str = "dense",
+) -> Response:
+    """
+    ``header`` and the drone positions in the encoding the Accept header
+    prefers: JSON, msgpack or packed trajectories with ``header`` as their
+    metadata.
+    """
+    media_type, params = negotiate(request.headers.get("accept", ""))
+
+    with stage("serialize"):
+        if media_type == PACKED_MEDIA_TYPE:
+            steps = None
+            if output == "waypoints":
+                waypoints = _waypoints(drone_positions)
+                drone_positions, steps = waypoints.trajectories, waypoints.steps
+            return Response(
+                pack_trajectories(header, drone_positions, steps, packed_dtype(params)),
+                media_type=PACKED_MEDIA_TYPE,
+            )
+
+        content = {**header, **_positions_content(drone_positions, output)}
+        if media_type == MSGPACK_MEDIA_TYPE:
+            return MsgpackResponse(content=content)
+        return ORJSONResponse(content=content)
+
+
+def _ndjson_lines(
+    compute_params: dict,
+    drone_positions: DroneTrajectories,
+    simulation_id: int,
+    output: str = "dense",
+) -> Iterator[bytes]:
+    """
+    Header line without drone positions, then one line per drone, with
+    the ``steps`` of its points with ``output="waypoints"``.
+    """
+    yield orjson.dumps(
+        _response_header(compute_params, drone_positions, simulation_id)
+    ) + b"\n"
+
+    steps = None
+    if output == "waypoints":
+        waypoints = _waypoints(drone_positions)
+        drone_positions, steps = waypoints.trajectories, waypoints.jsonable_steps()
+
+    for label in drone_positions:
+        line = {"label": label, "positions": drone_positions.jsonable(label)}
+        if steps is not None:
+            line["steps"] = steps[label]
+        yield orjson.dumps(line) + b"\n"
+
+
+def _profiled_compute(
+    user_id: int, compute_params: dict
+) -> tuple[DroneTrajectories, int]:
+    """
+    Compute and persistence of one request in the calling thread, so the
+    profiler sees all of it. The compute cache is bypassed.
+    """
+    drone_positions = compute_drone_bridge_positions(**compute_params)
+    with SessionLocal() as db:
+        simulation_id = persist_full_simulation(
+            db,
+            **_simulation_record(user_id, compute_params, drone_positions),
+            bulk=True,
+            storage=settings.db.trajectory_storage,
+        )
+    return drone_positions, simulation_id
+
+
+@router.post(
+    "/compute/",
+    status_code=200,
+    response_model=UavComputeResponse,
+    responses={
+        200: {
+            "content": {
+                NDJSON_MEDIA_TYPE: {},
+                MSGPACK_MEDIA_TYPE: {},
+                PACKED_MEDIA_TYPE: {},
+            },
+            "description": "With `Accept: application/x-ndjson` or `stream=true`"
+            " a header line is followed by one `{label, positions}` line per drone."
+            " `application/msgpack` is the JSON response in msgpack,"
+            " `application/x-uav-trajectories[;dtype=float64]` packs the positions"
+            " into little-endian arrays (float32 by default).",
+        }
+    },
+)
+async def start(
+    *,
+    request: Request,
+    request_data: UavComputeRequest,
+    stream: bool = False,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    compute_params = _compute_params(
+        request_data,
+        await resolve_obstacle_map(db, request_data.obstacle_map_id, user.id),
+    )
+
+    if PROFILE_HEADER in request.headers:
+        return await _start_profiled(
+            request, stream, user, compute_params, request_data.output
+        )
+
+    with stage("cache"):
+        cache_key = (
+            compute_cache_key(**compute_params) if settings.cache.enabled else None
+        )
+        drone_positions = (
+            await run_db(compute_cache.get, cache_key) if cache_key else None
+        )
+
+    if drone_positions is None:
+        try:
+            with stage("compute"):
+                drone_positions = await run_compute(
+                    compute_drone_bridge_positions, **compute_params
+                )
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if cache_key:
+            await run_db(compute_cache.set, cache_key, drone_positions)
+
+    simulation_id = await persist_full_simulation_async(
+        db,
+        **_simulation_record(user.id, compute_params, drone_positions),
+        bulk=True,
+        storage=settings.db.trajectory_storage,
+    )
+
+    return _compute_response(
+        request,
+        stream,
+        compute_params,
+        drone_positions,
+        simulation_id,
+        request_data.output,
+    )
+
+
+async def _start_profiled(
+    request: Request,
+    stream: bool,
+    user: User,
+    compute_params: dict,
+    output: str,
+) -> Response:
+    get_admin_user(user)
+
+    try:
+        (drone_positions, simulation_id), profile_id = await run_db(
+            profiling.capture, _profiled_compute, user.id, compute_params
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    response = _compute_response(
+        request, stream, compute_params, drone_positions, simulation_id, output
+    )
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _compute_response(
+    request: Request,
+    stream: bool,
+    compute_params: dict,
+    drone_positions: DroneTrajectories,
+    simulation_id: int,
+    output: str,
+) -> Response:
+    if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _ndjson_lines(compute_params, drone_positions, simulation_id, output),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    return _encoded_response(
+        request,
+        _response_header(compute_params, drone_positions, simulation_id),
+        drone_positions,
+        output,
+    )
+
+
+@router.post("/compute/batch", status_code=200, response_model=UavComputeBatchResponse)
+async def start_batch(
+    *,
+    request_data: list[UavComputeRequest],
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    Several compute requests in one call: trajectories of all items are
+    generated together and all simulations are stored in one transaction.
+    Items come back in request order, failed ones with ``error`` set.
+    """
+    # an unknown obstacle map fails only the items that reference it
+    obstacle_maps = {}
+    for obstacle_map_id in {item.obstacle_map_id for item in request_data}:
+        try:
+            obstacle_maps[obstacle_map_id] = await resolve_obstacle_map(
+                db, obstacle_map_id, user.id
+            )
+        except HTTPException as e:
+            obstacle_maps[obstacle_map_id] = LookupError(e.detail)
+
+    failed = {
+        i: obstacle_maps[item.obstacle_map_id]
+        for i, item in enumerate(request_data)
+        if isinstance(obstacle_maps[item.obstacle_map_id], LookupError)
+    }
+    params = [
+        (
+            None
+            if i in failed
+            else _compute_params(item, obstacle_maps[item.obstacle_map_id])
+        )
+        for i, item in enumerate(request_data)
+    ]
+
+    keys = [
+        compute_cache_key(**p) if p is not None and settings.cache.enabled else None
+        for p in params
+    ]
+    results = await run_db(
+        lambda: [compute_cache.get(key) if key else None for key in keys]
+    )
+    for i, error in failed.items():
+        results[i] = error
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        computed = await run_compute(
+            compute_drone_positions_batch, [params[i] for i in missing]
+        )
+        for i, result in zip(missing, computed):
+            results[i] = result
+            if keys[i] and not isinstance(result, Exception):
+                await run_db(compute_cache.set, keys[i], result)
+
+    succeeded = [
+        i for i, result in enumerate(results) if isinstance(result, DroneTrajectories)
+    ]
+    simulation_ids = await persist_simulations_async(
+        db,
+        simulations=[
+            _simulation_record(user.id, params[i], results[i]) for i in succeeded
+        ],
+        bulk=True,
+        storage=settings.db.trajectory_storage,
+    )
+    simulation_id_of = dict(zip(succeeded, simulation_ids))
+
+    items = [
+        (
+            {
+                "result": _response_content(
+                    params[i], result, simulation_id_of[i], request_data[i].output
+                ),
+                "error": None,
+            }
+            if i in simulation_id_of
+            else {"result": None, "error": str(result)}
+        )
+        for i, result in enumerate(results)
+    ]
+
+    return ORJSONResponse(content={"items": items})
+
+
+@router.post("/compute/relays", status_code=200, response_model=UavRelayResponse)
+async def start_relays(
+    *,
+    request: Request,
+    request_data: UavRelayRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    One relay network for several ground users at once.
+
+    Relays are shared between the chains of the users and the fleet is
+    assigned to all of them together, so no drone serves two networks.
+    """
+    compute_params = dict(
+        users=request_data.users,
+        base_coordinates=request_data.base or Coordinates3D(x=0, y=0, z=0),
+        drones=request_data.initial_drone_positions,
+        step_size=request_data.step_size,
+        min_separation=(
+            request_data.min_separation or settings.separation.min_distance
+        ),
+        resolve_conflicts=request_data.resolve_conflicts,
+    )
+
+    try:
+        with stage("compute"):
+            drone_positions, chains = await run_compute(
+                compute_relay_network_positions, **compute_params
+            )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    simulation_id = await persist_full_simulation_async(
+        db,
+        **_simulation_record(user.id, compute_params, drone_positions),
+        bulk=True,
+        storage=settings.db.trajectory_storage,
+    )
+
+    return _encoded_response(
+        request,
+        {
+            "base_coordinates": compute_params["base_coordinates"].model_dump(),
+            "users": [u.model_dump() for u in request_data.users],
+            "chains": chains,
+            "simulation_id": simulation_id,
+            "conflicts": _conflicts(drone_positions, compute_params["min_separation"]),
+        },
+        drone_positions,
+        request_data.output,
+    )
+
+
+@router.post("/compute/replan", status_code=200, response_model=UavReplanResponse)
+async def replan(
+    *,
+    request: Request,
+    request_data: UavReplanRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    Re-plan a previous simulation for a new user position.
+
+    Drones start where the previous simulation left them and keep their
+    place in the bridge when possible. The result is stored as a new
+    simulation (pass its id to the next re-plan), the response holds only
+    the drones that move or turn.
+    """
+    previous = await db.run_sync(
+        get_simulation, simulation_id=request_data.simulation_id, user_id=user.id
+    )
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    if previous.configuration.users:
+        raise HTTPException(
+            status_code=400, detail="Relay networks can not be re-planned"
+        )
+
+    previous_positions = await db.run_sync(load_trajectories, simulation_id=previous.id)
+
+    config = previous.configuration
+    compute_params = dict(
+        user_coordinates=request_data.user,
+        base_coordinates=Coordinates3D(
+            x=config.base_x, y=config.base_y, z=config.base_z
+        ),
+        drones=current_drones(previous, previous_positions),
+        step_size=config.step_size,
+        obstacle_map=await resolve_obstacle_map(db, config.obstacle_map_id, user.id),
+    )
+
     try:
-        drone_positions = compute_drone_bridge_positions(
-            user_coordinates=request_data.user,
-            base_coordinates=base_coordinates,
-            drones=drones,
-            step_size=request_data.step_size,
+        plan, changed, full_replan = await run_compute(
+            replan_drone_positions,
+            **compute_params,
+            assigned=previous_positions.labels,
+            position_tolerance=request_data.position_tolerance,
+            yaw_tolerance=request_data.yaw_tolerance,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    simulation_id = persist_full_simulation(
-        session=db,
+    simulation_id = await persist_full_simulation_async(
+        db,
+        **_simulation_record(user.id, compute_params, plan),
+        bulk=True,
+        storage=settings.db.trajectory_storage,
+    )
+
+    return _encoded_response(
+        request,
+        {
+            "simulation_id": simulation_id,
+            "previous_simulation_id": previous.id,
+            "user_coordinates": request_data.user.model_dump(),
+            "full_replan": full_replan,
+            "released": [
+                label for label in previous_positions.labels if label not in plan
+            ],
+            "conflicts": _conflicts(plan, settings.separation.min_distance),
+        },
+        plan.subset(changed),
+        request_data.output,
+    )
+
+
+@router.get("/compute/cache/")
+async def cache_stats(
+    *,
+    user: User = Depends(get_current_user),
+) -> dict[str, int]:
+    return compute_cache.stats()
+
+
+def _encode_cursor(simulation: Simulation) -> str:
+    raw = f"{simulation.started_at.isoformat()}|{simulation.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        started_at, simulation_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(started_at), int(simulation_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _simulation_summary(simulation: Simulation) -> SimulationSummary:
+    config = simulation.configuration
+    return SimulationSummary(
+        id=simulation.id,
+        started_at=simulation.started_at,
+        finished_at=simulation.finished_at,
+        success=simulation.success,
+        base_coordinates=Coordinates3D(
+            x=config.base_x, y=config.base_y, z=config.base_z
+        ),
+        user_coordinates=Coordinates(x=config.user_x, y=config.user_y),
+        step_size=config.step_size,
+        users=config.users,
+    )
+
+
+@router.get("/simulations", response_model=SimulationPage)
+async def simulations_history(
+    *,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> SimulationPage:
+    simulations = await db.run_sync(
+        list_simulations,
         user_id=user.id,
-        base=base_coordinates.model_dump(),
-        user={**request_data.user.model_dump(), "z": 0},
-        algorithm_params={"max_distance": 10, "step_size": request_data.step_size},
-        drones=[d.model_dump() for d in drones],
-        trajectories={
-            k: [i.model_dump() for i in v] for k, v in drone_positions.items()
+        limit=limit,
+        before=_decode_cursor(cursor) if cursor else None,
+    )
+
+    return SimulationPage(
+        items=[_simulation_summary(s) for s in simulations],
+        next_cursor=(
+            _encode_cursor(simulations[-1]) if len(simulations) == limit else None
+        ),
+    )
+
+
+@router.get("/simulations/{simulation_id}", response_model=SimulationDetails)
+async def simulation_details(
+    *,
+    request: Request,
+    simulation_id: int,
+    output: Literal["dense", "waypoints"] = "dense",
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    simulation = await db.run_sync(
+        get_simulation, simulation_id=simulation_id, user_id=user.id
+    )
+    if simulation is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+
+    drone_positions = await db.run_sync(load_trajectories, simulation_id=simulation_id)
+
+    drones = sorted(simulation.configuration.drones, key=lambda d: d.id)
+    initial_drone_positions = [
+        Drone(
+            label=d.label,
+            coordinates=Coordinates3D(
+                x=d.init_x, y=d.init_y, z=d.init_z, yaw=d.init_yaw
+            ),
+        )
+        for d in drones
+    ]
+
+    return _encoded_response(
+        request,
+        {
+            **jsonable_encoder(_simulation_summary(simulation)),
+            "initial_drone_positions": jsonable_encoder(initial_drone_positions),
         },
+        drone_positions,
+        output,
     )
 
-    return UavComputeResponse(
-        base_coordinates=base_coordinates,
-        user_coordinates=request_data.user,
-        drone_positions=drone_positions,
-        simulation_id=simulation_id,
+
+@router.get("/profiles", response_model=list[ProfileInfo])
+async def profiles(
+    *,
+    user: User = Depends(get_admin_user),
+) -> list[ProfileInfo]:
+    return [
+        ProfileInfo(
+            id=p["id"],
+            created_at=datetime.fromtimestamp(p["created_ms"] / 1000),
+            size=p["size"],
+        )
+        for p in await run_db(profiling.list_profiles)
+    ]
+
+
+@router.get("/profiles/{profile_id}", response_class=FileResponse)
+async def download_profile(
+    *,
+    profile_id: str,
+    user: User = Depends(get_admin_user),
+) -> FileResponse:
+    """
+    pstats file, e.g. for ``python -m pstats`` or snakeviz.
+    """
+    path = await run_db(profiling.profile_path, profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=path.name,
     )